@@ -1,9 +1,10 @@
 # 导入基础控制器库
 from base_ctrl import BaseController
 import threading
-import yaml, os
+import yaml, os, sys
 os.makedirs('logs', exist_ok=True)
 import logging.config
+from log_utils import install_queue_logging
 
 curpath = os.path.realpath(__file__)
 thisPath = os.path.dirname(curpath)
@@ -14,6 +15,7 @@ def setup_logging(config_path):
         config_path = os.path.abspath(config_path)
         with open(config_path, "r") as f:
             config = yaml.safe_load(f)
+        queue_config = config.pop("queue", None) or {}
 
         # 处理日志路径
         for handler in config.get("handlers", {}).values():
@@ -23,6 +25,10 @@ def setup_logging(config_path):
                 os.makedirs(os.path.dirname(handler["filename"]), exist_ok=True)
 
         logging.config.dictConfig(config)
+
+        # 处理器移到后台线程，记录日志的线程不再等待格式化和 SD 卡写入
+        if queue_config.get("enabled", False):
+            install_queue_logging(list(config.get("loggers", {})) + [""], queue_config.get("size", 10000))
     except Exception as e:
         print(f"[ERROR] Failed to load logging configuration: {e}", file=sys.stderr)
         logging.basicConfig(level=logging.INFO)
@@ -69,17 +75,14 @@ base.base_oled(2, f"{f['base_config']['main_type']}{f['base_config']['module_typ
 base.base_oled(3, "Starting...")
 logger.info("OLED显示初始化完成")
 
-# 导入Flask及相关库
+# 导入Flask及相关库，视觉/音频/WebRTC等可选子系统在启动线程或首次使用时才导入
+from lazy_import import timed_import, import_report
 from flask import Flask, render_template, Response, request, jsonify, redirect, url_for, send_from_directory, send_file
-from flask_socketio import SocketIO, emit
+flask_socketio = timed_import('flask_socketio')
+SocketIO, emit = flask_socketio.SocketIO, flask_socketio.emit
 from werkzeug.utils import secure_filename
-from aiortc import RTCPeerConnection, RTCSessionDescription
 import json
-import uuid
-import asyncio
 import time
-import cv_ctrl
-import robot_mouth.audio_ctrl as audio_ctrl
 import os_info
 
 # 获取系统信息
@@ -92,14 +95,28 @@ app = Flask(__name__)
 socketio = SocketIO(app)
 logger.info("Flask应用和SocketIO初始化完成")
 
-# WebRTC连接管理
-active_pcs = {}
-MAX_CONNECTIONS = 1
-pcs = set()
-
-# 相机控制对象
-cvf = cv_ctrl.OpencvFuncs(thisPath, base)
-logger.info("相机控制初始化完成")
+# 相机控制对象和音频模块，由 load_subsystems 加载，加载完成前为 None
+cvf = None
+audio_ctrl = None
+webrtc = None
+subsystems_ready = threading.Event()
+# 启动流程结束(成功或失败)，视频流等待它而不是 subsystems_ready，失败时不会一直阻塞
+subsystems_done = threading.Event()
+boot_start_time = time.time()
+boot_time = None
+boot_error = None
+
+def load_subsystems():
+    """导入并初始化音频和视觉子系统"""
+    global cvf, audio_ctrl, webrtc
+    audio_ctrl = timed_import('robot_mouth.audio_ctrl')
+    cv_ctrl = timed_import('cv_ctrl')
+    cvf = cv_ctrl.OpencvFuncs(thisPath, base)
+    # aiortc 在第一次收到 offer 时才导入
+    webrtc = timed_import('webrtc_stream').WebRtcServer(f['webrtc'], cvf.stream_hub)
+    cvf.snapshots.on_saved = lambda filename, size: si.add_pictures_size(size)
+    logger.info("相机控制初始化完成")
+    subsystems_ready.set()
 
 # 命令与动作映射表
 cmd_actions = {
@@ -109,7 +126,7 @@ cmd_actions = {
     f['code']['zoom_x4']: lambda: cvf.scale_ctrl(4),
 
     # 图片和视频控制
-    f['code']['pic_cap']: cvf.picture_capture,
+    f['code']['pic_cap']: lambda: cvf.picture_capture(),
     f['code']['vid_sta']: lambda: cvf.video_record(True),
     f['code']['vid_end']: lambda: cvf.video_record(False),
 
@@ -165,6 +182,13 @@ cmd_feedback_actions = [f['code']['cv_none'], f['code']['cv_moti'],
                         f['code']['base_ct']
                         ]
 
+# 不依赖视觉子系统的命令，启动完成前也可以执行
+base_cmd_actions = [f['code']['release'], f['code']['s_panid'],
+                    f['code']['s_tilid'], f['code']['set_mid'],
+                    f['code']['base_of'], f['code']['base_on'],
+                    f['code']['base_ct']
+                    ]
+
 # 处理计算机视觉信息
 def process_cv_info(cmd):
     if cmd[f['fb']['detect_type']] != f['code']['cv_none']:
@@ -172,19 +196,21 @@ def process_cv_info(cmd):
         pass
 
 # 生成视频帧
-def generate_frames():
-    while True:
-        frame = cvf.frame_process()
-        try:
-            yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n') 
-        except Exception as e:
-            logger.error(f"生成视频帧错误: {e}")
+def generate_frames(client_name=''):
+    if not subsystems_done.wait(f['stream']['boot_wait']) or not subsystems_ready.is_set():
+        logger.error(f"[app.generate_frames] 子系统不可用，结束视频流: {boot_error or '加载超时'}")
+        return
+    # 每个客户端独立调整画质和帧率，只发送最新帧
+    session = cvf.stream_hub.open_session(client_name)
+    for frame in session.frames():
+        yield (b'--frame\r\n'
+           b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
 
 # 主页路由
 @app.route('/')
 def index():
-    audio_ctrl.play_random_audio("connected", False)
+    if audio_ctrl is not None:
+        audio_ctrl.play_random_audio("connected", False)
     logger.info("用户访问主页")
     return render_template('index.html')
 
@@ -212,15 +238,60 @@ def serve_static(filename):
 @app.route('/get_photo_names')
 def get_photo_names():
     logger.debug("获取图片列表")
+    if cvf is not None:
+        return jsonify(cvf.snapshots.gallery.names())
     photo_files = sorted(os.listdir(thisPath + '/templates/pictures'), key=lambda x: os.path.getmtime(os.path.join(thisPath + '/templates/pictures', x)), reverse=True)
     return jsonify(photo_files)
 
+# 获取CV模型加载状态
+@app.route('/models')
+def get_models_status():
+    if cvf is None:
+        return jsonify({})
+    return jsonify(cvf.models.status())
+
+# 获取各视频流客户端(MJPEG 和 WebRTC)的码率、延迟等统计
+@app.route('/stream')
+def get_stream_status():
+    if cvf is None:
+        return jsonify({})
+    return jsonify(cvf.stream_hub.status())
+
+# 获取画面流水线各阶段耗时 p50/p95/max(ms)
+@app.route('/timing')
+def get_timing_status():
+    if cvf is None:
+        return jsonify({})
+    return jsonify(cvf.timing.status())
+
+# 下位机串口反馈统计
+@app.route('/telemetry')
+def get_telemetry_status():
+    return jsonify(base.transport.status())
+
+# 获取某个CV模式的 cProfile 采样报告
+@app.route('/timing/profile/<mode_name>')
+def get_timing_profile(mode_name):
+    if cvf is None or mode_name not in cvf.timing.profiles:
+        return Response('no profile', status=404, mimetype='text/plain')
+    return Response(cvf.timing.profiles[mode_name], mimetype='text/plain')
+
+# 获取启动状态和各模块导入耗时
+@app.route('/boot')
+def get_boot_status():
+    return jsonify({'ready': subsystems_ready.is_set(),
+                    'boot_time': boot_time,
+                    'error': boot_error,
+                    'imports': import_report()})
+
 # 删除图片
 @app.route('/delete_photo', methods=['POST'])
 def delete_photo():
     filename = request.form.get('filename')
     try:
         os.remove(os.path.join(thisPath + '/templates/pictures', filename))
+        if cvf is not None:
+            si.add_pictures_size(-cvf.snapshots.gallery.remove(filename))
         logger.info(f"删除图片: {filename}")
         return jsonify(success=True)
     except Exception as e:
@@ -254,36 +325,6 @@ def delete_video():
         logger.error(f"删除视频失败: {e}")
         return jsonify(success=False)
 
-# WebRTC连接管理
-def manage_connections(pc_id):
-    if len(active_pcs) >= MAX_CONNECTIONS:
-        oldest_pc_id = next(iter(active_pcs))
-        old_pc = active_pcs.pop(oldest_pc_id)
-        old_pc.close()
-        logger.info(f"关闭旧连接: {oldest_pc_id}")
-    active_pcs[pc_id] = pc
-    logger.info(f"新建连接: {pc_id}")
-
-# WebRTC offer处理
-async def offer_async():
-    params = await request.json
-    offer = RTCSessionDescription(sdp=params["sdp"], type=params["type"])
-    pc = RTCPeerConnection()
-    pc_id = "PeerConnection(%s)" % uuid.uuid4()
-    pc_id = pc_id[:8]
-    manage_connections(pc_id)
-    await pc.createOffer(offer)
-    await pc.setLocalDescription(offer)
-    response_data = {"sdp": pc.localDescription.sdp, "type": pc.localDescription.type}
-    logger.info(f"创建WebRTC连接: {pc_id}")
-    return jsonify(response_data)
-
-def offer():
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    future = asyncio.run_coroutine_threadsafe(offer_async(), loop)
-    return future.result()
-
 # 设置产品版本
 def set_version(input_main, input_module):
     logger.info(f"设置产品版本: main={input_main}, module={input_module}")
@@ -369,6 +410,12 @@ def cmdline_ctrl(args_string):
             cvf.change_target_color(lower_nums, upper_nums)
         elif args[1] == '-s' or args[1] == '--select':
             cvf.selet_target_color(args[2])
+        elif args[1] == '-m' or args[1] == '--models':
+            for name, model_status in cvf.models.status().items():
+                if model_status['loaded']:
+                    cvf.info_update(f"{name}: {model_status['load_ms']}ms {model_status['rss_mb']}MB", (0,255,255), 0.36)
+                else:
+                    cvf.info_update(f"{name}: unloaded", (255,255,255), 0.36)
 
     # 视频控制命令
     elif args[0] == 'video' or args[0] == 'v':
@@ -379,6 +426,31 @@ def cmdline_ctrl(args_string):
                 return
             cvf.set_video_quality(int(args[2]))
 
+    # 耗时统计命令: timing -o on|off 显示OSD, timing -p [次数] 对当前模式采样 cProfile
+    elif args[0] == 'timing':
+        if args[1] == '-o' or args[1] == '--osd':
+            cvf.timing.osd = args[2] == 'on'
+        elif args[1] == '-p' or args[1] == '--profile':
+            try:
+                calls = int(args[2]) if len(args) > 2 else None
+            except:
+                return
+            cvf.timing.profile(cvf.cv_mode_name(), calls)
+
+    # 拍照命令: pic [-b 张数 间隔] [-f] [-l]
+    elif args[0] == 'pic':
+        count, interval = 1, 0.0
+        try:
+            if '-b' in args or '--burst' in args:
+                index = args.index('-b') if '-b' in args else args.index('--burst')
+                count = int(args[index + 1])
+                interval = float(args[index + 2])
+        except:
+            return
+        full_res = '-f' in args or '--full' in args
+        flash = '-l' in args or '--light' in args
+        cvf.picture_capture(count, interval, full_res, flash)
+
     # 线路控制命令
     elif args[0] == 'line':
         if args[1] == '-r' or args[1] == '--range':
@@ -410,6 +482,12 @@ def cmdline_ctrl(args_string):
             except:
                 return
             cvf.set_line_track_args(float(args[2]), float(args[3]), float(args[4]), float(args[5]), float(args[6]), float(args[7]), float(args[8]))
+        elif args[1] == '-l' or args[1] == '--lines':
+            try:
+                lines = [float(line) for line in args[2].strip("[]").split(",")]
+            except:
+                return
+            cvf.set_line_sampling(lines)
 
     # 跟踪控制命令
     elif args[0] == 'track':
@@ -463,21 +541,30 @@ def cmdline_ctrl(args_string):
     elif args[0] == 'test':
         cvf.update_base_data({"T":1003,"mac":1111,"megs":"helllo aaaaaaaa"})
 
-# WebRTC路由
+# WebRTC路由，浏览器发送 offer，返回带视频轨道的 answer
 @app.route('/offer', methods=['POST'])
 def offer_route():
-    return offer()
+    if webrtc is None:
+        return jsonify({'error': 'loading'}), 503
+    params = request.get_json()
+    try:
+        return jsonify(webrtc.handle_offer(params["sdp"], params["type"]))
+    except Exception as e:
+        logger.error(f"WebRTC连接失败: {e}")
+        return jsonify({'error': str(e)}), 500
 
 # 视频流路由
 @app.route('/video_feed')
 def video_feed():
-    return Response(generate_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return Response(generate_frames(request.remote_addr), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 # 命令处理路由
 @app.route('/send_command', methods=['POST'])
 def handle_command():
     command = request.form['command']
     logger.info(f"收到命令: {command}")
+    if not subsystems_ready.is_set():
+        return jsonify({"status": "error", "message": "Subsystems loading"})
     cvf.info_update("CMD:" + command, (0,255,255), 0.36)
     try:
         cmdline_ctrl(command)
@@ -505,6 +592,8 @@ def upload_audio():
 
 @app.route('/playAudio', methods=['POST'])
 def play_audio():
+    if audio_ctrl is None:
+        return jsonify({'error': 'Audio is loading'})
     audio_file = request.form['audio_file']
     logger.debug(f"播放音频文件: {thisPath}/sounds/others/{audio_file}")
     audio_ctrl.play_audio_thread(thisPath + '/sounds/others/' + audio_file)
@@ -512,6 +601,8 @@ def play_audio():
 
 @app.route('/stop_audio', methods=['POST'])
 def audio_stop():
+    if audio_ctrl is None:
+        return jsonify({'error': 'Audio is loading'})
     audio_ctrl.stop()
     return jsonify({'success': 'Audio stop'})
 
@@ -530,7 +621,11 @@ def handle_socket_json(json):
 
 # 更新WebSocket数据
 def update_data_websocket_single():
+    if not subsystems_ready.is_set():
+        return
     try:
+        sched_status = cvf.cv_sched.status(cvf.cv_mode)
+        track_status = cvf.tracker_status()
         socket_data = {
             f['fb']['picture_size']:si.pictures_size,
             f['fb']['video_size']:  si.videos_size,
@@ -544,10 +639,16 @@ def update_data_websocket_single():
             f['fb']['detect_react']:cvf.detection_reaction_mode,
             f['fb']['pan_angle']:   cvf.pan_angle,
             f['fb']['tilt_angle']:  cvf.tilt_angle,
-            f['fb']['base_voltage']:base.base_data['v'],
+            f['fb']['base_voltage']:base.base_info().get('v', 0),
             f['fb']['video_fps']:   cvf.video_fps,
             f['fb']['cv_movtion_mode']: cvf.cv_movtion_lock,
-            f['fb']['base_light']:  base.base_light_status
+            f['fb']['base_light']:  base.base_light_status,
+            f['fb']['cv_rate']:     sched_status['rate'],
+            f['fb']['cv_scale']:    sched_status['scale'],
+            f['fb']['cv_cost']:     sched_status['cost'],
+            f['fb']['cv_fps']:      sched_status['fps'],
+            f['fb']['cv_det_fps']:  track_status['detect_fps'],
+            f['fb']['cv_trk_fps']:  track_status['track_fps']
         }
         socketio.emit('update', socket_data, namespace='/ctrl')
     except Exception as e:
@@ -582,8 +683,6 @@ def base_data_loop():
     sensor_interval = 1
     sensor_read_time = time.time()
     while True:
-        cvf.update_base_data(base.feedback_data())
-
         # 获取传感器数据
         if base.extra_sensor:
             if time.time() - sensor_read_time > sensor_interval:
@@ -605,6 +704,9 @@ def handle_socket_cmd(message):
         logger.error("解析JSON错误.[app.handle_socket_cmd]")
         return
     cmd_a = float(json_data.get("A", 0))
+    if not subsystems_ready.is_set() and cmd_a not in base_cmd_actions:
+        logger.warning(f"子系统加载中，忽略命令: {cmd_a}")
+        return
     if cmd_a in cmd_actions:
         cmd_actions[cmd_a]()
     else:
@@ -628,11 +730,25 @@ def cmd_on_boot():
         cvf.info_update(cmd_list[i], (0,255,255), 0.36)
     set_version(f['base_config']['main_type'], f['base_config']['module_type'])
 
-# 主程序入口
-if __name__ == "__main__":
-    # 关闭灯光
-    base.lights_ctrl(255, 255)
-    
+# 加载子系统并启动依赖它们的循环
+def start_subsystems():
+    global boot_error
+    try:
+        boot_subsystems()
+    except Exception as e:
+        boot_error = f"{type(e).__name__}: {e}"
+        logger.exception("[app.start_subsystems] 子系统加载失败")
+        base.base_oled(3, "Boot failed")
+        # 非延迟启动时和以前一样直接退出
+        if not f['base_config']['deferred_boot']:
+            raise
+    finally:
+        subsystems_done.set()
+
+def boot_subsystems():
+    global boot_time
+    load_subsystems()
+
     # 播放启动音频
     audio_ctrl.play_random_audio("robot_started", False)
 
@@ -651,7 +767,10 @@ if __name__ == "__main__":
     data_update_thread = threading.Thread(target=update_data_loop, daemon=True)
     data_update_thread.start()
 
-    # 启动基础数据更新
+    # 下位机反馈由串口读取线程推送，不再轮询
+    base.reader.subscribe(None, cvf.update_base_data)
+
+    # 启动基础数据更新(额外传感器和激光雷达)
     base_update_thread = threading.Thread(target=base_data_loop, daemon=True)
     base_update_thread.start()
 
@@ -659,5 +778,20 @@ if __name__ == "__main__":
     base.lights_ctrl(0, 0)
     cmd_on_boot()
 
+    boot_time = round(time.time() - boot_start_time, 2)
+    logger.info(f"启动完成: {boot_time}s, 导入耗时(ms): {import_report()}")
+
+# 主程序入口
+if __name__ == "__main__":
+    # 关闭灯光
+    base.lights_ctrl(255, 255)
+
+    # 延迟启动模式下，主页和控制socket先开始服务，子系统在后台加载
+    if f['base_config']['deferred_boot']:
+        base.base_oled(3, "Loading...")
+        threading.Thread(target=start_subsystems, daemon=True).start()
+    else:
+        start_subsystems()
+
     # 运行主Web应用
     socketio.run(app, host='0.0.0.0', port=5000, allow_unsafe_werkzeug=True)
@@ -1,5 +1,4 @@
-import serial
-import json
+import sys
 import time
 import logging
 import yaml
@@ -22,6 +21,9 @@ logger = logging.getLogger('body')
 curpath = os.path.realpath(__file__)
 thisPath = os.path.dirname(curpath)
 
+sys.path.insert(0, os.path.dirname(thisPath))
+from base_ctrl import open_transport, release_transport
+
 # 加载配置文件
 with open(thisPath + '/../config/config.yaml', 'r') as yaml_file:
     f = yaml.safe_load(yaml_file)
@@ -36,7 +38,8 @@ class LightController:
             buad_set: 波特率
         """
         logger.info(f"初始化LightController,串口:{uart_dev_set},波特率:{buad_set}")
-        self.ser = serial.Serial(uart_dev_set, buad_set, timeout=1)
+        # 与 BaseController 共用串口，其他进程已打开时通过 IPC 端点连接
+        self.transport = open_transport(uart_dev_set, buad_set)
         
         # 灯光状态
         self.base_light_status = 0
@@ -50,8 +53,7 @@ class LightController:
             data: 要发送的数据字典
         """
         try:
-            command = json.dumps(data) + '\n'
-            self.ser.write(command.encode("utf-8"))
+            self.transport.send(data)
             logger.debug(f"发送灯光命令: {data}")
         except Exception as e:
             logger.error(f"发送灯光命令失败: {e}")
@@ -164,8 +166,9 @@ class LightController:
     
     def close(self):
         """关闭串口连接"""
-        if hasattr(self, 'ser') and self.ser.is_open:
-            self.ser.close()
+        if getattr(self, 'transport', None) is not None:
+            release_transport(self.transport)
+            self.transport = None
             logger.info("灯光控制器串口已关闭")
 
 
@@ -1,5 +1,4 @@
-import serial
-import json
+import sys
 import time
 import logging
 import yaml
@@ -22,6 +21,9 @@ logger = logging.getLogger('body')
 curpath = os.path.realpath(__file__)
 thisPath = os.path.dirname(curpath)
 
+sys.path.insert(0, os.path.dirname(thisPath))
+from base_ctrl import open_transport, release_transport
+
 # 加载配置文件
 with open(thisPath + '/../config/config.yaml', 'r') as yaml_file:
     f = yaml.safe_load(yaml_file)
@@ -36,7 +38,8 @@ class Move:
             buad_set: 波特率
         """
         logger.info(f"初始化Move控制器,串口:{uart_dev_set},波特率:{buad_set}")
-        self.ser = serial.Serial(uart_dev_set, buad_set, timeout=1)
+        # 与 BaseController 共用串口，其他进程已打开时通过 IPC 端点连接
+        self.transport = open_transport(uart_dev_set, buad_set)
         
         # 获取速度配置
         self.max_speed = f['args_config']['max_speed']
@@ -52,8 +55,7 @@ class Move:
             data: 要发送的数据字典
         """
         try:
-            command = json.dumps(data) + '\n'
-            self.ser.write(command.encode("utf-8"))
+            self.transport.send(data)
             logger.debug(f"发送移动命令: {data}")
         except Exception as e:
             logger.error(f"发送移动命令失败: {e}")
@@ -195,8 +197,9 @@ class Move:
     
     def close(self):
         """关闭串口连接"""
-        if hasattr(self, 'ser') and self.ser.is_open:
-            self.ser.close()
+        if getattr(self, 'transport', None) is not None:
+            release_transport(self.transport)
+            self.transport = None
             logger.info("移动控制器串口已关闭")
 
 
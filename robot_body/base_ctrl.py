@@ -1,13 +1,17 @@
 import serial  
 import json
-import queue
 import threading
 import yaml
 import os
+import errno
 import time
 import glob
+import socket
 import numpy as np
 import logging
+from collections import deque, Counter
+from log_utils import hot_log
+from lidar_driver import LidarDriver
 
 # 日志配置（由主程序统一加载，这里只获取 logger）
 logger = logging.getLogger('body')
@@ -20,19 +24,755 @@ thisPath = os.path.dirname(curpath)
 with open(thisPath + '/config/config.yaml', 'r') as yaml_file:
     f = yaml.safe_load(yaml_file)
 
-class ReadLine:
-	"""串口读取类,用于读取串口数据、传感器数据和激光雷达数据"""
-	def __init__(self, s):
+class CommandEncoder:
+	"""下位机指令编码
+
+	使用紧凑分隔符，浮点数按下位机使用的精度取整；
+	cached_types 中的固定指令(急停、灯光、启动配置等)只含整数和字符串时编码结果缓存复用，
+	OLED 文字等内容不断变化的指令不缓存，以免占满缓存。
+	"""
+	def __init__(self, float_digits=2, cached_types=(), cache_size=256):
+		"""
+		Args:
+			float_digits: 浮点数保留的小数位数
+			cached_types: 缓存编码结果的 T 列表
+			cache_size: 缓存的指令数上限
+		"""
+		self.float_digits = float_digits
+		self.cached_types = set(cached_types)
+		self.cache_size = cache_size
+		self.templates = {}
+		self.hits = 0
+
+	def encode(self, data):
+		"""编码为以换行结尾的字节串"""
+		key = self._template_key(data)
+		if key is not None:
+			line = self.templates.get(key)
+			if line is not None:
+				self.hits += 1
+				return line
+		line = (json.dumps(self._round(data), separators=(',', ':')) + '\n').encode("utf-8")
+		if key is not None and len(self.templates) < self.cache_size:
+			self.templates[key] = line
+		return line
+
+	def _template_key(self, data):
+		if not isinstance(data, dict) or data.get('T') not in self.cached_types:
+			return None
+		for value in data.values():
+			# bool 是 int 的子类，json 编码不同，不缓存
+			if type(value) not in (int, str):
+				return None
+		return tuple(data.items())
+
+	def _round(self, value):
+		if isinstance(value, float):
+			rounded = round(value, self.float_digits)
+			return int(rounded) if rounded.is_integer() else rounded
+		if isinstance(value, dict):
+			return {key: self._round(item) for key, item in value.items()}
+		if isinstance(value, (list, tuple)):
+			return [self._round(item) for item in value]
+		if isinstance(value, np.generic):
+			return self._round(value.item())
+		return value
+
+
+class LinkBudget:
+	"""串口链路占用统计
+
+	按秒分桶记录收发两个方向每种 T 的字节数，占用率 = 字节数 * 10 位 / 波特率(8N1)。
+	最近 window 秒的发送或接收占用率超过 warn_utilization 时输出警告，
+	此时再增加指令就会开始排队。
+	"""
+	def __init__(self, baud, window=5, warn_utilization=0.7):
+		"""
+		Args:
+			baud: 波特率
+			window: 统计窗口(秒)
+			warn_utilization: 警告阈值(0~1)
+		"""
+		self.capacity = baud / 10.0
+		self.window = window
+		self.warn_utilization = warn_utilization
+		# (秒, {'tx': Counter(T -> 字节), 'rx': Counter(T -> 字节)})
+		self.buckets = deque(maxlen=window)
+		self._lock = threading.Lock()
+
+	def record(self, direction, t, size):
+		"""
+		Args:
+			direction: 'tx' 或 'rx'
+			t: 指令或反馈的 T
+			size: 字节数(含换行)
+		"""
+		second = int(time.monotonic())
+		with self._lock:
+			if not self.buckets or self.buckets[-1][0] != second:
+				self.buckets.append((second, {'tx': Counter(), 'rx': Counter()}))
+				rolled = len(self.buckets) > 1
+			else:
+				rolled = False
+			self.buckets[-1][1][direction][t] += size
+		if rolled:
+			self._check()
+
+	def _totals(self):
+		"""最近 window 秒(不含当前这一秒)各方向按 T 的字节数和统计秒数"""
+		now = int(time.monotonic())
+		totals = {'tx': Counter(), 'rx': Counter()}
+		with self._lock:
+			buckets = [bucket for second, bucket in self.buckets if now - self.window <= second < now]
+		for bucket in buckets:
+			for direction in totals:
+				totals[direction].update(bucket[direction])
+		return totals, self.window
+
+	def utilization(self):
+		totals, seconds = self._totals()
+		return {direction: sum(counter.values()) / seconds / self.capacity for direction, counter in totals.items()}
+
+	def _check(self):
+		for direction, value in self.utilization().items():
+			if value >= self.warn_utilization:
+				hot_log.every(5.0, logging.WARNING, "[base_ctrl.LinkBudget] 串口%s占用 %.0f%%，接近饱和",
+							  direction, value * 100)
+
+	def status(self):
+		totals, seconds = self._totals()
+		status = {'capacity_bytes_per_sec': self.capacity}
+		for direction, counter in totals.items():
+			status[direction] = {
+				'utilization': round(sum(counter.values()) / seconds / self.capacity, 3),
+				'types': {str(t): round(size / seconds / self.capacity, 4) for t, size in counter.most_common()},
+			}
+		return status
+
+
+class SerialReader:
+	"""下位机串口读取线程
+
+	阻塞读取串口(有数据或超时才返回，不轮询 in_waiting)，增量分行并解析 JSON，
+	按 T 类型保存带时间戳的最近若干条消息，并回调按 T 订阅的函数。
+	"""
+	def __init__(self, s, history=50, max_line=4096, link=None):
+		"""
+		Args:
+			s: 已打开的 serial.Serial，timeout 决定线程检查退出的间隔
+			history: 每种 T 保存的消息条数
+			max_line: 单行最大字节数，超过时丢弃该行
+			link: 串口链路占用统计 LinkBudget，None 表示不统计
+		"""
+		self.s = s
+		self.link = link
+		self.history = history
+		self.max_line = max_line
 		self.buf = bytearray()
+		# T -> deque[(time.monotonic(), 消息)]
+		self.rings = {}
+		# T -> [回调]，None 表示订阅全部消息
+		self.subscribers = {}
+		self.latest = None
+		self.counters = {'bytes': 0, 'messages': 0, 'parse_errors': 0, 'dropped': 0, 'overwritten': 0}
+		self.running = False
+		# 读取流对端关闭(ConnectionError)时调用，返回新的读取流，返回 None 时停止读取
+		self.on_closed = None
+		self._cond = threading.Condition()
+		self._thread = None
+
+	def start(self):
+		self.running = True
+		self._thread = threading.Thread(target=self._read_loop, daemon=True)
+		self._thread.start()
+		return self
+
+	def stop(self):
+		self.running = False
+
+	def subscribe(self, t, callback):
+		"""订阅消息，回调在读取线程中执行，应尽快返回
+		Args:
+			t: 消息的 T 值，None 表示全部消息
+			callback: callback(消息)
+		"""
+		self.subscribers.setdefault(t, []).append(callback)
+
+	def unsubscribe(self, t, callback):
+		if callback in self.subscribers.get(t, []):
+			self.subscribers[t].remove(callback)
+
+	def last(self, t):
+		"""T 类型的最新消息，没有时返回 None"""
+		ring = self.rings.get(t)
+		return ring[-1][1] if ring else None
+
+	def recent(self, t, count=None):
+		"""T 类型最近的 (时间戳, 消息) 列表，旧的在前"""
+		with self._cond:
+			items = list(self.rings.get(t, ()))
+		return items if count is None else items[-count:]
+
+	def wait(self, after_count, timeout=1.0):
+		"""等待消息总数超过 after_count，返回最新消息，超时返回 None"""
+		with self._cond:
+			if self._cond.wait_for(lambda: self.counters['messages'] > after_count, timeout):
+				return self.latest
+		return None
+
+	def _read_loop(self):
+		while self.running:
+			try:
+				data = self.s.read(max(1, self.s.in_waiting))
+			except ConnectionError as e:
+				if not self.running:
+					break
+				stream = self.on_closed(e) if self.on_closed is not None else None
+				if stream is None:
+					logger.error(f"[base_ctrl.SerialReader] 读取流已关闭，停止读取: {e}")
+					self.running = False
+					break
+				self.s = stream
+				self.buf.clear()
+				continue
+			except Exception as e:
+				if not self.running:
+					break
+				hot_log.every(5.0, logging.ERROR, "[base_ctrl.SerialReader] 读取失败: %s", e)
+				time.sleep(0.5)
+				continue
+			if data:
+				self.feed(data)
+
+	def feed(self, data):
+		"""分行并解析收到的字节"""
+		self.counters['bytes'] += len(data)
+		self.buf.extend(data)
+		start = 0
+		while True:
+			end = self.buf.find(b"\n", start)
+			if end < 0:
+				break
+			line = bytes(self.buf[start:end])
+			start = end + 1
+			if len(line) > self.max_line:
+				self.counters['dropped'] += 1
+				continue
+			self._parse(line)
+		del self.buf[:start]
+		if len(self.buf) > self.max_line:
+			# 一直没有换行，丢弃已缓存的数据
+			self.counters['dropped'] += 1
+			self.buf.clear()
+
+	def _parse(self, line):
+		line = line.strip()
+		if not line:
+			return
+		try:
+			message = json.loads(line)
+		except (UnicodeDecodeError, ValueError):
+			self.counters['parse_errors'] += 1
+			hot_log.every(1.0, logging.WARNING, "[base_ctrl.SerialReader] 解析失败: %r", line[:40])
+			return
+		if not isinstance(message, dict) or 'T' not in message:
+			self.counters['parse_errors'] += 1
+			return
+
+		t = message['T']
+		if self.link is not None:
+			self.link.record('rx', t, len(line) + 1)
+		with self._cond:
+			ring = self.rings.get(t)
+			if ring is None:
+				ring = self.rings[t] = deque(maxlen=self.history)
+			elif len(ring) == ring.maxlen:
+				self.counters['overwritten'] += 1
+			ring.append((time.monotonic(), message))
+			self.latest = message
+			self.counters['messages'] += 1
+			self._cond.notify_all()
+
+		for callback in self.subscribers.get(t, []) + self.subscribers.get(None, []):
+			try:
+				callback(message)
+			except Exception as e:
+				logger.error(f"[base_ctrl.SerialReader] 订阅回调出错: {e}")
+
+	def status(self):
+		status = dict(self.counters)
+		status['types'] = {str(t): len(ring) for t, ring in self.rings.items()}
+		return status
+
+
+class CommandScheduler:
+	"""下位机指令调度
+
+	连续控制类指令按执行机构分组(如底盘速度 T:1/T:13 一组，云台 T:133/134/135/141 一组)，
+	每组只保留最新一条，新指令覆盖还没发出的旧指令并排到队尾，同一执行机构最终停在最后请求的状态；
+	其他一次性指令按先后顺序全部发送；紧急指令(急停)插到最前面，并丢弃还没发出的运动指令，
+	其他连续控制指令(灯光、云台等)留在队列中，在紧急指令之后发送。
+	"""
+	def __init__(self, coalesce_groups, urgent_types, cancel_types, stats_window=200):
+		"""
+		Args:
+			coalesce_groups: 只保留最新一条的分组列表，每项是一个 T 或共用一个执行机构的 T 列表
+			urgent_types: 优先发送的 T 列表
+			cancel_types: 紧急指令排队时丢弃的 T 列表(运动指令)，包含这些 T 的分组整组丢弃
+			stats_window: 排队延迟统计的样本数
+		"""
+		# T -> 分组序号
+		self.group_of = {}
+		for index, group in enumerate(coalesce_groups):
+			for t in (group if isinstance(group, (list, tuple)) else [group]):
+				self.group_of[t] = index
+		self.urgent_types = set(urgent_types)
+		self.cancel_groups = {self.group_of[t] for t in cancel_types if t in self.group_of}
+		# 分组序号 -> (最新指令的排队时刻, 最新指令)，按排队时刻的先后排列
+		self.slots = {}
+		# (排队时刻, 指令)
+		self.fifo = deque()
+		self.urgent = deque()
+		self.counters = {'queued': 0, 'sent': 0, 'coalesced': 0, 'cancelled': 0, 'bytes': 0}
+		self.delays = deque(maxlen=stats_window)
+		self._rate_time = time.monotonic()
+		self._rate_bytes = 0
+		self.bytes_per_sec = 0.0
+		self._cond = threading.Condition()
+
+	def put(self, data):
+		now = time.monotonic()
+		t = data.get('T') if isinstance(data, dict) else None
+		with self._cond:
+			self.counters['queued'] += 1
+			if t in self.urgent_types:
+				self.urgent.append((now, data))
+				for group in self.cancel_groups & self.slots.keys():
+					del self.slots[group]
+					self.counters['cancelled'] += 1
+			elif t in self.group_of:
+				group = self.group_of[t]
+				# 覆盖时先删除再插入，排到之后排队的指令后面
+				if self.slots.pop(group, None) is not None:
+					self.counters['coalesced'] += 1
+				self.slots[group] = (now, data)
+			else:
+				self.fifo.append((now, data))
+			self._cond.notify()
+
+	def get(self, timeout=None):
+		"""取下一条要发送的指令，返回 (指令, 排队时刻)，超时返回 None"""
+		with self._cond:
+			if not self._cond.wait_for(self._pending, timeout):
+				return None
+			if self.urgent:
+				return self.urgent.popleft()[::-1]
+			group = next(iter(self.slots), None)
+			if group is not None and (not self.fifo or self.slots[group][0] <= self.fifo[0][0]):
+				return self.slots.pop(group)[::-1]
+			return self.fifo.popleft()[::-1]
+
+	def _pending(self):
+		return bool(self.urgent or self.slots or self.fifo)
+
+	def sent(self, size, queued_time):
+		"""记录一次串口写入
+		Args:
+			size: 写入的字节数
+			queued_time: 指令的排队时刻
+		"""
+		now = time.monotonic()
+		with self._cond:
+			self.counters['sent'] += 1
+			self.counters['bytes'] += size
+			self.delays.append(now - queued_time)
+			self._rate_bytes += size
+			elapsed = now - self._rate_time
+			if elapsed >= 1.0:
+				self.bytes_per_sec = self._rate_bytes / elapsed
+				self._rate_bytes = 0
+				self._rate_time = now
+
+	def status(self):
+		with self._cond:
+			delays = sorted(self.delays)
+			status = dict(self.counters)
+			status['pending'] = len(self.urgent) + len(self.slots) + len(self.fifo)
+		if time.monotonic() - self._rate_time > 2.0:
+			status['bytes_per_sec'] = 0.0
+		else:
+			status['bytes_per_sec'] = round(self.bytes_per_sec, 1)
+		if delays:
+			status['delay_ms'] = {
+				'p50': round(delays[len(delays) // 2] * 1000, 2),
+				'p95': round(delays[min(len(delays) - 1, int(len(delays) * 0.95))] * 1000, 2),
+				'max': round(delays[-1] * 1000, 2),
+			}
+		return status
+
+
+class SerialTransport:
+	"""独占串口的共享传输
+
+	进程内所有控制器(BaseController、Move、LightController)通过同一个对象发送指令，
+	只有一个写线程按 CommandScheduler 的顺序写串口，避免多个对象交错写入把行写坏；
+	同时在本地 Unix 套接字上提供 IPC 端点，其他进程的辅助脚本连上来共用串口，
+	发来的指令进入同一个调度队列，下位机的反馈原样转发给它们。
+	"""
+	def __init__(self, uart_dev, baud, ipc_path=None, reader=None):
+		"""
+		Args:
+			uart_dev: 串口设备名
+			baud: 波特率
+			ipc_path: IPC 套接字路径，None 或空表示不提供
+			reader: 继续使用的 SerialReader(IPC 对端退出后接管串口时)，None 时新建
+		"""
+		self.name = uart_dev
+		self.refs = 0
+		# 独占打开，其他进程已打开时失败，由调用者改为连接它的 IPC 端点
+		self.ser = serial.Serial(uart_dev, baud, timeout=1, exclusive=True)
+		self.link = LinkBudget(baud, f['uart']['budget_window'], f['uart']['warn_utilization'])
+		self.encoder = CommandEncoder(f['uart']['float_digits'], f['uart']['cached_types'])
+		self.scheduler = CommandScheduler(f['uart']['coalesce'], f['uart']['urgent'], f['uart']['cancel_on_urgent'],
+										  f['uart']['stats_window'])
+		if reader is None:
+			self.reader = SerialReader(self.ser, f['telemetry']['history'], f['telemetry']['max_line'], self.link)
+			self.reader.start()
+		else:
+			# 读取线程由 on_closed 的返回值切换到本串口
+			self.reader = reader
+			self.reader.link = self.link
+		self.write_thread = threading.Thread(target=self._write_loop, daemon=True)
+		self.write_thread.start()
+
+		self.ipc_path = ipc_path
+		self.ipc_server = None
+		self.ipc_clients = []
+		self._clients_lock = threading.Lock()
+		if ipc_path:
+			self._start_ipc(ipc_path)
+
+	def send(self, data):
+		"""把指令放入调度队列"""
+		self.scheduler.put(data)
+
+	def _write_loop(self):
+		"""按调度顺序把指令写入串口"""
+		while True:
+			data, queued_time = self.scheduler.get()
+			line = self.encoder.encode(data)
+			try:
+				self.ser.write(line)
+			except Exception as e:
+				logger.error(f"[base_ctrl.SerialTransport] 串口写入失败: {e}")
+				continue
+			self.scheduler.sent(len(line), queued_time)
+			self.link.record('tx', data.get('T') if isinstance(data, dict) else None, len(line))
+
+	def _start_ipc(self, ipc_path):
+		try:
+			if os.path.exists(ipc_path):
+				if _ipc_listening(ipc_path):
+					logger.error(f"[base_ctrl.SerialTransport] IPC 端点 {ipc_path} 已有进程在监听，不再提供")
+					return
+				# 连接不上，是上次退出时残留的文件
+				os.unlink(ipc_path)
+			server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+			server.bind(ipc_path)
+			server.listen(4)
+		except OSError as e:
+			logger.error(f"[base_ctrl.SerialTransport] IPC 端点 {ipc_path} 启动失败: {e}")
+			return
+		self.ipc_server = server
+		self.reader.subscribe(None, self._forward)
+		threading.Thread(target=self._accept_loop, daemon=True).start()
+		logger.info(f"[base_ctrl.SerialTransport] IPC 端点: {ipc_path}")
+
+	def _accept_loop(self):
+		while self.ipc_server is not None:
+			try:
+				conn, _ = self.ipc_server.accept()
+			except OSError:
+				break
+			conn.settimeout(1.0)
+			with self._clients_lock:
+				self.ipc_clients.append(conn)
+			threading.Thread(target=self._client_loop, args=(conn,), daemon=True).start()
+			logger.info(f"[base_ctrl.SerialTransport] IPC 客户端连接，共 {len(self.ipc_clients)} 个")
+
+	def _client_loop(self, conn):
+		"""读取 IPC 客户端发来的指令(每行一条 JSON)"""
+		buf = bytearray()
+		try:
+			while True:
+				try:
+					data = conn.recv(4096)
+				except socket.timeout:
+					continue
+				if not data:
+					break
+				buf.extend(data)
+				*lines, rest = buf.split(b"\n")
+				buf = bytearray(rest)
+				for line in lines:
+					if not line.strip():
+						continue
+					try:
+						self.send(json.loads(line))
+					except ValueError:
+						hot_log.every(1.0, logging.WARNING, "[base_ctrl.SerialTransport] IPC 指令解析失败: %r", line[:40])
+		except OSError:
+			pass
+		finally:
+			self._drop_client(conn)
+
+	def _forward(self, message):
+		"""把下位机反馈转发给 IPC 客户端"""
+		if not self.ipc_clients:
+			return
+		line = (json.dumps(message, separators=(',', ':')) + '\n').encode("utf-8")
+		for conn in list(self.ipc_clients):
+			try:
+				conn.sendall(line)
+			except OSError:
+				self._drop_client(conn)
+
+	def _drop_client(self, conn):
+		with self._clients_lock:
+			if conn not in self.ipc_clients:
+				return
+			self.ipc_clients.remove(conn)
+		conn.close()
+		logger.info(f"[base_ctrl.SerialTransport] IPC 客户端断开，剩余 {len(self.ipc_clients)} 个")
+
+	def close(self):
+		self.reader.stop()
+		if self.ipc_server is not None:
+			server, self.ipc_server = self.ipc_server, None
+			server.close()
+			for conn in list(self.ipc_clients):
+				self._drop_client(conn)
+			if os.path.exists(self.ipc_path):
+				os.unlink(self.ipc_path)
+		self.ser.close()
+
+	def status(self):
+		return {
+			'device': self.name,
+			'reader': self.reader.status(),
+			'commands': self.scheduler.status(),
+			'link': self.link.status(),
+			'ipc_clients': len(self.ipc_clients),
+		}
+
+
+class _SocketStream:
+	"""给 SerialReader 读取的套接字包装，提供 serial.Serial 的 read/in_waiting"""
+	# 每次最多读取的字节数，SerialReader 按 in_waiting 决定读多少
+	in_waiting = 4096
+
+	def __init__(self, sock):
+		self.sock = sock
+
+	def read(self, size):
+		try:
+			data = self.sock.recv(size)
+		except socket.timeout:
+			return b""
+		if not data:
+			raise ConnectionError("IPC 端点已关闭")
+		return data
+
+
+class IpcTransport:
+	"""通过 IPC 端点使用其他进程已打开的串口，接口与 SerialTransport 相同
+
+	对端进程退出后先尝试重新连接(可能已有其他进程接管)，否则自己打开串口，
+	成为新的 SerialTransport 并提供 IPC 端点，已订阅的回调继续有效。
+	"""
+	def __init__(self, ipc_path, uart_dev, baud):
+		"""
+		Args:
+			ipc_path: SerialTransport 的 IPC 套接字路径
+			uart_dev: 串口设备名，对端退出后接管时打开
+			baud: 波特率
+		"""
+		self.name = ipc_path
+		self.uart_dev = uart_dev
+		self.baud = baud
+		self.refs = 0
+		self.ser = None
+		# 接管串口后的 SerialTransport
+		self.owner = None
+		self.sock = self._connect()
+		self.encoder = CommandEncoder(f['uart']['float_digits'], f['uart']['cached_types'])
+		self.reader = SerialReader(_SocketStream(self.sock), f['telemetry']['history'], f['telemetry']['max_line'])
+		self.reader.on_closed = self._failover
+		self.reader.start()
+		self._send_lock = threading.Lock()
+
+	def _connect(self):
+		sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		try:
+			sock.connect(self.name)
+		except OSError:
+			sock.close()
+			raise
+		sock.settimeout(1.0)
+		return sock
+
+	def _failover(self, error):
+		"""IPC 对端关闭时在读取线程中调用，返回新的读取流"""
+		logger.warning(f"[base_ctrl.IpcTransport] IPC 端点 {self.name} 已断开: {error}")
+		self.sock.close()
+		deadline = time.monotonic() + f['uart']['owner_wait']
+		while True:
+			try:
+				self.sock = self._connect()
+				logger.info(f"[base_ctrl.IpcTransport] 重新连接 {self.name}")
+				return _SocketStream(self.sock)
+			except OSError:
+				pass
+			try:
+				self.owner = SerialTransport(self.uart_dev, self.baud, self.name, self.reader)
+				break
+			except Exception as e:
+				# 其他客户端先接管了串口，等它的 IPC 端点就绪后再连接
+				if not _locked_by_other(e) or time.monotonic() > deadline:
+					logger.error(f"[base_ctrl.IpcTransport] 打开串口 {self.uart_dev} 失败: {e}")
+					return None
+			time.sleep(0.1)
+		self.ser = self.owner.ser
+		logger.info(f"[base_ctrl.IpcTransport] 已接管串口 {self.uart_dev}")
+		return self.owner.ser
+
+	def send(self, data):
+		if self.owner is not None:
+			self.owner.send(data)
+			return
+		try:
+			with self._send_lock:
+				self.sock.sendall(self.encoder.encode(data))
+		except OSError as e:
+			hot_log.every(5.0, logging.WARNING, "[base_ctrl.IpcTransport] 指令发送失败: %s", e)
+
+	def close(self):
+		self.reader.stop()
+		if self.owner is not None:
+			self.owner.close()
+		else:
+			self.sock.close()
+
+	def status(self):
+		if self.owner is not None:
+			return self.owner.status()
+		return {'ipc': self.name, 'reader': self.reader.status()}
+
+
+def _ipc_listening(ipc_path):
+	"""是否有进程在 IPC 套接字上监听"""
+	sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	try:
+		sock.connect(ipc_path)
+		return True
+	except OSError:
+		return False
+	finally:
+		sock.close()
+
+
+def _locked_by_other(error):
+	"""串口打开失败是否因为其他进程已独占"""
+	return isinstance(error, serial.SerialException) and error.errno in (errno.EAGAIN, errno.EWOULDBLOCK)
+
+
+def transport_ipc_path(uart_dev):
+	"""串口对应的 IPC 套接字路径，路径中带有设备名，不同串口的传输不会互相连上
+	Returns:
+		uart.ipc_path 为空时返回 None
+	"""
+	ipc_path = f['uart']['ipc_path']
+	if not ipc_path:
+		return None
+	root, ext = os.path.splitext(ipc_path)
+	# /dev/serial0 等符号链接按实际设备区分
+	device = os.path.realpath(uart_dev).strip('/').replace('/', '_')
+	return f"{root}.{device}{ext}"
+
+
+# 串口设备名 -> 共享传输
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def open_transport(uart_dev, baud):
+	"""获取串口的共享传输
+	同一进程内同一串口共用一个对象；其他进程已经独占串口时，通过它的 IPC 端点连接，
+	端点还没就绪时最多等待 uart.owner_wait 秒。
+	用完后调用 release_transport。
+	Args:
+		uart_dev: 串口设备名
+		baud: 波特率
+	"""
+	ipc_path = transport_ipc_path(uart_dev)
+	with _transports_lock:
+		transport = _transports.get(uart_dev)
+		if transport is None:
+			transport = _open_shared(uart_dev, baud, ipc_path)
+			_transports[uart_dev] = transport
+		transport.refs += 1
+	return transport
+
+
+def _open_shared(uart_dev, baud, ipc_path):
+	deadline = time.monotonic() + f['uart']['owner_wait']
+	while True:
+		if ipc_path and os.path.exists(ipc_path):
+			try:
+				transport = IpcTransport(ipc_path, uart_dev, baud)
+				logger.info(f"[base_ctrl] 串口 {uart_dev} 已由其他进程打开，通过 {ipc_path} 连接")
+				return transport
+			except OSError:
+				pass
+		try:
+			return SerialTransport(uart_dev, baud, ipc_path)
+		except serial.SerialException as e:
+			if not ipc_path or not _locked_by_other(e) or time.monotonic() > deadline:
+				raise
+		time.sleep(0.1)
+
+
+def release_transport(transport):
+	"""释放 open_transport 得到的传输，最后一个使用者释放时关闭"""
+	with _transports_lock:
+		transport.refs -= 1
+		if transport.refs > 0:
+			return
+		for name, item in list(_transports.items()):
+			if item is transport:
+				del _transports[name]
+	transport.close()
+
+
+class ReadLine:
+	"""串口读取类,用于读取传感器数据和激光雷达数据"""
+	def __init__(self, s, sensor_dev=None, lidar_dev=None):
+		"""
+		Args:
+			s: 下位机串口
+			sensor_dev: USB传感器串口，None 时使用第一个 /dev/ttyUSB*
+			lidar_dev: 激光雷达串口，None 时使用第一个 /dev/ttyACM*
+		"""
 		self.s = s
+		self.lidar_dev = lidar_dev
 
 		# 传感器数据相关
 		self.sensor_data = []
 		self.sensor_list = []
 		try:
 			# 尝试连接USB传感器
-			self.sensor_data_ser = serial.Serial(glob.glob('/dev/ttyUSB*')[0], 115200)
-			logger.info("/dev/ttyUSB* connected succeed")
+			self.sensor_data_ser = serial.Serial(sensor_dev or glob.glob('/dev/ttyUSB*')[0], 115200)
+			logger.info(f"{sensor_dev or '/dev/ttyUSB*'} connected succeed")
 		except:
 			self.sensor_data_ser = None
 		self.sensor_data_max_len = 51
@@ -40,39 +780,26 @@ class ReadLine:
 		# 激光雷达相关
 		try:
 			# 尝试连接激光雷达
-			self.lidar_ser = serial.Serial(glob.glob('/dev/ttyACM*')[0], 230400, timeout=1)
-			logger.info("/dev/ttyACM* connected succeed")
+			self.lidar_ser = serial.Serial(lidar_dev or glob.glob('/dev/ttyACM*')[0], 230400, timeout=1)
+			logger.info(f"{lidar_dev or '/dev/ttyACM*'} connected succeed")
 		except:
 			self.lidar_ser = None
-		self.ANGLE_PER_FRAME = 12  # 每帧角度数
-		self.HEADER = 0x54         # 帧头
-		self.lidar_angles = []     # 激光雷达角度数据
-		self.lidar_distances = []  # 激光雷达距离数据
-		self.lidar_angles_show = []    # 用于显示的角度数据
-		self.lidar_distances_show = [] # 用于显示的距离数据
-		self.last_start_angle = 0      # 上一帧起始角度
-
-	def readline(self):
-		"""读取一行数据,直到遇到换行符"""
-		i = self.buf.find(b"\n")
-		if i >= 0:
-			r = self.buf[:i+1]
-			self.buf = self.buf[i+1:]
-			return r
-		while True:
-			i = max(1, min(512, self.s.in_waiting))
-			data = self.s.read(i)
-			i = data.find(b"\n")
-			if i >= 0:
-				r = self.buf + data[:i+1]
-				self.buf[0:] = data[i+1:]
-				return r
-			else:
-				self.buf.extend(data)
+		self.lidar = LidarDriver(self.lidar_ser)
 
-	def clear_buffer(self):
-		"""清空串口缓冲区"""
-		self.s.reset_input_buffer()
+	@property
+	def lidar_scan_id(self):
+		"""扫描计数，每完成一圈加一"""
+		return self.lidar.scan_id
+
+	@property
+	def lidar_angles_show(self):
+		"""最近一圈的角度数据(弧度)"""
+		return self.lidar.angles_show
+
+	@property
+	def lidar_distances_show(self):
+		"""最近一圈的距离数据(mm)"""
+		return self.lidar.distances_show
 
 	def read_sensor_data(self):
 		"""读取传感器数据"""
@@ -96,53 +823,16 @@ class ReadLine:
 		except Exception as e:
 			logger.error(f"[base_ctrl.read_sensor_data] error: {e}")
 
-	def parse_lidar_frame(self, data):
-		"""解析激光雷达数据帧"""
-		# header = data[0]
-		# verlen = data[1]
-		# speed  = data[3] << 8 | data[2]
-		start_angle = (data[5] << 8 | data[4]) * 0.01
-		# print(start)
-		# end_angle = (data[43] << 8 | data[42]) * 0.01
-		for i in range(0, self.ANGLE_PER_FRAME):
-			offset = 6 + i * 3
-			distance = data[offset+1] << 8 | data[offset]
-			confidence = data[offset+2]
-			# lidar_angles.append(np.radians(start_angle + i * 0.167))
-			self.lidar_angles.append(np.radians(start_angle + i * 0.83333 + 180))
-			# lidar_angles.append(np.radians(start_angle + end_angle))
-			self.lidar_distances.append(distance)
-		# end_angle = (data[43] << 8 | data[42]) * 0.01
-		# timestamp = data[45] << 8 | data[44]
-		# crc = data[46]
-		return start_angle
-
 	def lidar_data_recv(self):
-		"""接收激光雷达数据"""
+		"""接收激光雷达数据，一次解析串口上已到达的全部帧"""
 		if self.lidar_ser == None:
 			return
 		try:
-			while True:
-				self.header = self.lidar_ser.read(1)
-				if self.header == b'\x54':
-					# Read the rest of the data
-					data = self.header + self.lidar_ser.read(46)
-					hex_data = [int(hex(byte), 16) for byte in data]
-					start_angle = self.parse_lidar_frame(hex_data)
-					if self.last_start_angle > start_angle:
-						break
-					self.last_start_angle = start_angle
-				else:
-					self.lidar_ser.flushInput()
-
-			self.last_start_angle = start_angle
-			self.lidar_angles_show = self.lidar_angles.copy()
-			self.lidar_distances_show = self.lidar_distances.copy()
-			self.lidar_angles.clear()
-			self.lidar_distances.clear()
+			self.lidar.read()
 		except Exception as e:
 			logger.error(f"[base_ctrl.lidar_data_recv] error: {e}")
-			self.lidar_ser = serial.Serial(glob.glob('/dev/ttyACM*')[0], 230400, timeout=1)
+			self.lidar_ser = serial.Serial(self.lidar_dev or glob.glob('/dev/ttyACM*')[0], 230400, timeout=1)
+			self.lidar.ser = self.lidar_ser
 
 
 class BaseController:
@@ -155,86 +845,42 @@ class BaseController:
 			buad_set: 波特率
 		"""
 		logger.info(f"初始化BaseController,串口:{uart_dev_set},波特率:{buad_set}")
-		self.ser = serial.Serial(uart_dev_set, buad_set, timeout=1)
-		self.rl = ReadLine(self.ser)
-		self.command_queue = queue.Queue()
-		self.command_thread = threading.Thread(target=self.process_commands, daemon=True)
-		self.command_thread.start()
-		logger.info("命令处理线程已启动")
+		self.transport = open_transport(uart_dev_set, buad_set)
+		self.rl = ReadLine(self.transport.ser)
+		# 下位机反馈由读取线程解析，base_data 始终是最新一条消息
+		self.base_data = None
+		self.reader = self.transport.reader
+		self.reader.subscribe(None, self._on_message)
 
 		# 灯光状态
 		self.base_light_status = 0
 		self.head_light_status = 0
 
-		# 数据缓存
-		self.data_buffer = None
-		self.base_data = None
-
 		# 功能开关
 		self.use_lidar = f['base_config']['use_lidar']
 		self.extra_sensor = f['base_config']['extra_sensor']
 		logger.info(f"激光雷达状态:{self.use_lidar},额外传感器:{self.extra_sensor}")
 
-	def feedback_data(self):
-		"""获取反馈数据"""
-		try:
-			while self.rl.s.in_waiting > 0:
-				raw = self.rl.readline()
-				try:
-					text = raw.decode('utf-8')
-				except UnicodeDecodeError as e:
-					logger.warning(f"[decode] error: {e} | raw: {raw[:10].hex()}")
-					continue
+	def _on_message(self, message):
+		self.base_data = message
+		if message["T"] == 1003:
+			hot_log.every(1.0, logging.DEBUG, "[feedback_data] %s", message)
 
-				try:
-					self.data_buffer = json.loads(text)
-				except json.JSONDecodeError as e:
-					logger.warning(f"[json] error: {e} | text: {text}")
-					continue
-
-				if 'T' in self.data_buffer:
-					self.base_data = self.data_buffer
-					self.data_buffer = None
-					if self.base_data["T"] == 1003:
-						logger.debug(self.base_data)
-						return self.base_data
-
-			self.rl.clear_buffer()
-
-			raw = self.rl.readline()
-			try:
-				text = raw.decode('utf-8')
-				self.data_buffer = json.loads(text)
-				self.base_data = self.data_buffer
-				return self.base_data
-			except Exception as e:
-				logger.warning(f"[feedback_data final] error: {e} | raw: {raw[:10].hex()}")
-				return None, None
+	def feedback_data(self):
+		"""获取最新的反馈数据，不读取串口"""
+		return self.base_data
 
-		except Exception as e:
-			self.rl.clear_buffer()
-			logger.error(f"[base_ctrl.feedback_data] fatal error: {e}")
+	def base_info(self):
+		"""最新的底盘信息反馈(电压、姿态等)，还没有收到时返回空字典"""
+		return self.reader.last(f['cmd_config']['cmd_base_feedback']) or {}
 
-	def on_data_received(self):
-		"""接收数据回调"""
-		logger.debug("重置输入缓冲区并读取数据")
-		self.ser.reset_input_buffer()
-		data_read = json.loads(self.rl.readline().decode('utf-8'))
-		return data_read
+	def on_data_received(self, timeout=1.0):
+		"""等待下一条反馈数据，超时返回 None"""
+		return self.reader.wait(self.reader.counters['messages'], timeout)
 
 	def send_command(self, data):
-		"""发送命令到命令队列"""
-
-
-		self.command_queue.put(data)
-
-	def process_commands(self):
-		"""处理命令队列中的命令"""
-		while True:
-			data = self.command_queue.get()
-
-
-			self.ser.write((json.dumps(data) + '\n').encode("utf-8"))
+		"""发送命令到共享串口的调度队列"""
+		self.transport.send(data)
 
 	def base_json_ctrl(self, input_json):
 		"""基础JSON控制接口"""
@@ -246,7 +892,7 @@ class BaseController:
 		"""云台紧急停止"""
 		logger.info("云台紧急停止")
 		data = {"T":0}
-		logger.debug(f"速度控制 - 左:{input_left} 右:{input_right}")
+		self.send_command(data)
 
 	def base_speed_ctrl(self, input_left, input_right):
 		"""控制底盘左右轮速度
@@ -254,8 +900,7 @@ class BaseController:
 			input_left: 左轮速度
 			input_right: 右轮速度
 		"""
-		logger.info(f"[base_speed_ctrl] 速度控制 - 左:{input_left} 右:{input_right}")
-		logger.debug(f"[base_speed_ctrl] 指令内容: {{'T':1, 'L':{input_left}, 'R':{input_right}}}")
+		hot_log.every(0.5, logging.INFO, "[base_speed_ctrl] 速度控制 - 左:%s 右:%s", input_left, input_right)
 		data = {"T":1,"L":input_left,"R":input_right}
 		self.send_command(data)
 
@@ -267,8 +912,8 @@ class BaseController:
 			input_speed: 运动速度
 			input_acceleration: 加速度
 		"""
-		logger.info(f"[gimbal_ctrl] 云台控制 - X:{input_x} Y:{input_y} 速度:{input_speed} 加速度:{input_acceleration}")
-		logger.debug(f"[gimbal_ctrl] 指令内容: {{'T':133, 'X':{input_x}, 'Y':{input_y}, 'SPD':{input_speed}, 'ACC':{input_acceleration}}}")
+		hot_log.every(0.5, logging.INFO, "[gimbal_ctrl] 云台控制 - X:%s Y:%s 速度:%s 加速度:%s",
+					  input_x, input_y, input_speed, input_acceleration)
 		data = {"T":133,"X":input_x,"Y":input_y,"SPD":input_speed,"ACC":input_acceleration}
 		self.send_command(data)
 
@@ -279,8 +924,7 @@ class BaseController:
 			input_y: Y轴角度
 			input_speed: 运动速度
 		"""
-		logger.info(f"[gimbal_base_ctrl] 云台基础控制 - X:{input_x} Y:{input_y} 速度:{input_speed}")
-		logger.debug(f"[gimbal_base_ctrl] 指令内容: {{'T':141, 'X':{input_x}, 'Y':{input_y}, 'SPD':{input_speed}}}")
+		hot_log.every(0.5, logging.INFO, "[gimbal_base_ctrl] 云台基础控制 - X:%s Y:%s 速度:%s", input_x, input_y, input_speed)
 		data = {"T":141,"X":input_x,"Y":input_y,"SPD":input_speed}
 		self.send_command(data)
 
@@ -355,7 +999,7 @@ class BaseController:
 	def gimbal_dev_close(self):
 		"""关闭云台设备"""
 		logger.info("关闭云台设备")
-		self.ser.close()
+		release_transport(self.transport)
 
 	def breath_light(self, input_time):
 		"""呼吸灯效果
@@ -0,0 +1,132 @@
+import cv2
+import imutils
+import numpy as np
+import logging
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+
+def odd_kernel(size):
+    """不小于 1 的奇数核大小"""
+    size = max(1, int(round(size)))
+    return size if size % 2 else size + 1
+
+
+class ColorTracker:
+    """颜色跟踪引擎
+
+    画面中心采样圆的像素下标按分辨率和采样半径缓存，只在二者变化时重建；
+    颜色分割、腐蚀膨胀和轮廓查找在缩小的图像上进行，
+    最大轮廓的质心再在原分辨率的局部ROI中细化。
+    """
+    def __init__(self, cv_config, sampling_rad, min_radius):
+        """
+        Args:
+            cv_config: config.yaml 中的 cv 配置
+            sampling_rad: 采样圆半径(像素)
+            min_radius: 目标最小半径(原分辨率像素)
+        """
+        self.detect_scale = cv_config['color_detect_scale']
+        self.blur_size = cv_config['color_blur_size']
+        self.morph_iterations = cv_config['color_morph_iterations']
+        self.refine_margin = cv_config['color_refine_margin']
+        self.sampling_rad = sampling_rad
+        self.min_radius = min_radius
+
+        self._geometry_key = None
+        self.disk_rect = None
+        self.disk_index = None
+
+    def set_sampling_rad(self, sampling_rad):
+        self.sampling_rad = sampling_rad
+        self._geometry_key = None
+
+    def _prepare(self, height, width):
+        """按分辨率和采样半径缓存采样圆的像素下标"""
+        key = (height, width, self.sampling_rad)
+        if key == self._geometry_key:
+            return
+        center_x, center_y = width // 2, height // 2
+        # 外扩模糊核半径，使采样圆内的模糊结果与整帧模糊一致
+        pad = self.sampling_rad + odd_kernel(self.blur_size) // 2
+        x0, y0 = max(0, center_x - pad), max(0, center_y - pad)
+        x1, y1 = min(width, center_x + pad + 1), min(height, center_y + pad + 1)
+        disk = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        cv2.circle(disk, (center_x - x0, center_y - y0), self.sampling_rad, 255, thickness=-1)
+        self.disk_rect = (x0, y0, x1, y1)
+        self.disk_index = np.flatnonzero(disk)
+        self._geometry_key = key
+
+    def sampling_hsv(self, img):
+        """画面中心采样圆内的 HSV 最小/最大值"""
+        height, width = img.shape[:2]
+        self._prepare(height, width)
+        x0, y0, x1, y1 = self.disk_rect
+        kernel = odd_kernel(self.blur_size)
+        patch = cv2.GaussianBlur(img[y0:y1, x0:x1], (kernel, kernel), 0)
+        pixels = cv2.cvtColor(patch, cv2.COLOR_BGR2HSV).reshape(-1, 3)[self.disk_index]
+        return pixels.min(axis=0), pixels.max(axis=0)
+
+    def detect(self, img, lower, upper):
+        """查找颜色目标
+        Args:
+            img: BGR图像
+            lower: HSV 下限
+            upper: HSV 上限
+        Returns:
+            dict(x, y, radius, area) 原分辨率坐标，未找到时返回 None
+        """
+        height, width = img.shape[:2]
+        scale = self.detect_scale
+        small = cv2.resize(img, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        kernel = odd_kernel(self.blur_size * scale)
+        if kernel > 1:
+            small = cv2.GaussianBlur(small, (kernel, kernel), 0)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+
+        iterations = max(1, int(round(self.morph_iterations * scale)))
+        mask = cv2.inRange(hsv, lower, upper)
+        mask = cv2.erode(mask, None, iterations=iterations)
+        mask = cv2.dilate(mask, None, iterations=iterations)
+
+        cnts = imutils.grab_contours(cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE))
+        if not cnts:
+            return None
+        c = max(cnts, key=cv2.contourArea)
+        (_, radius) = cv2.minEnclosingCircle(c)
+        radius /= scale
+        if radius <= self.min_radius:
+            return None
+
+        M = cv2.moments(c)
+        if not M["m00"]:
+            return None
+        center_x, center_y = M["m10"] / M["m00"] / scale, M["m01"] / M["m00"] / scale
+
+        # 在原分辨率的局部ROI中细化质心：只做颜色分割，不再模糊和腐蚀膨胀，
+        # 并且只统计放大后的轮廓区域内的像素，缩小图上已滤掉的噪声和相邻的同色目标不参与
+        bx, by, bw, bh = cv2.boundingRect(c)
+        margin = self.refine_margin
+        x0, y0 = max(0, int(bx / scale) - margin), max(0, int(by / scale) - margin)
+        x1, y1 = min(width, int((bx + bw) / scale) + margin), min(height, int((by + bh) / scale) + margin)
+        contour_mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        roi_contour = np.round(c.astype(np.float32) / scale - (x0, y0)).astype(np.int32)
+        cv2.drawContours(contour_mask, [roi_contour], -1, 255, thickness=-1)
+        contour_area = cv2.countNonZero(contour_mask)
+        # 轮廓线加粗一个缩小图像素，补偿轮廓在缩小图上的量化误差
+        cv2.drawContours(contour_mask, [roi_contour], -1, 255, thickness=odd_kernel(2 / scale))
+
+        roi_mask = cv2.inRange(cv2.cvtColor(img[y0:y1, x0:x1], cv2.COLOR_BGR2HSV), lower, upper)
+        roi_mask = cv2.bitwise_and(roi_mask, contour_mask)
+
+        # area 为目标掩码的像素数(原分辨率)
+        roi_moments = cv2.moments(roi_mask, binaryImage=True)
+        if roi_moments["m00"]:
+            center_x = x0 + roi_moments["m10"] / roi_moments["m00"]
+            center_y = y0 + roi_moments["m01"] / roi_moments["m00"]
+            area = roi_moments["m00"]
+        else:
+            area = float(contour_area)
+
+        return {'x': center_x, 'y': center_y, 'radius': radius, 'area': area}
@@ -1,23 +1,31 @@
 import cv2
 import imutils
-import mediapipe as mp
-import imageio
 import threading
 import datetime, time
 import numpy as np
 import math
-import yaml, os, json, subprocess
+import yaml, os, json
 from collections import deque
 import textwrap
 import logging
-
-# 用于CSI摄像头的库
-from picamera2 import Picamera2
-from picamera2.encoders import H264Encoder, Encoder
-from picamera2.outputs import FfmpegOutput
-
-# 用于OAK摄像头的库
-import depthai as dai
+from cv_overlay import OverlayPanel
+from cv_sched import CvScheduler
+from cv_track import build_trackers
+from cv_face import FaceSearch
+from cv_dnn import ObjectDetector, DETECTION_DTYPE
+from cv_line import LineTracker
+from cv_color import ColorTracker
+from cv_models import ModelRegistry
+from lazy_import import LazyModule
+from log_utils import hot_log
+from frame_source import open_frame_source
+from video_recorder import VideoRecorder
+from snapshot_writer import SnapshotWriter
+from stream_hub import StreamHub
+from frame_timing import FrameTiming
+
+# MediaPipe在第一次使用时才导入
+mp = LazyModule('mediapipe')
 
 # 加载配置文件
 curpath = os.path.realpath(__file__)
@@ -45,10 +53,8 @@ class OpencvFuncs():
         
         # 图像和视频参数
         self.frame_scale = 1
-        self.picture_capture_flag = False
         self.set_video_record_flag = False
-        self.video_record_status_flag = False
-        self.writer = None
+        self.recorder = VideoRecorder(f['recorder'], self.video_path)
         self.overlay = None
         self.scale_rate = 1
         self.video_quality = f['video']['default_quality']
@@ -67,6 +73,15 @@ class OpencvFuncs():
         self.CMD_GIMBAL = f['cmd_config']['cmd_gimbal_ctrl']
         self.sampling_rad = f['cv']['sampling_rad']
 
+        # CV模式调度器，按模式控制分析频率和输入分辨率
+        self.cv_sched = CvScheduler(f['cv_sched'], f['code'])
+        self.analysis_scale = 1
+        # 分析帧的变焦倍数，画面像素对应的云台角度随变焦缩小
+        self.analysis_zoom = 1
+
+        # 人脸/目标/颜色模式的检测-跟踪器
+        self.trackers = build_trackers(f['cv_track'], f['code'])
+
         # 反应时间记录
         self.last_frame_capture_time = datetime.datetime.now()
         self.last_movtion_captured = datetime.datetime.now()
@@ -75,7 +90,6 @@ class OpencvFuncs():
         self.avg = None
 
         # 人脸检测和跟踪参数
-        self.faceCascade = cv2.CascadeClassifier(thisPath + '/models/haarcascade_frontalface_default.xml')
         self.min_radius = f['cv']['min_radius']
         self.track_faces_iterate = f['cv']['track_faces_iterate']
 
@@ -93,27 +107,26 @@ class OpencvFuncs():
             self.color_lower = np.array(f['cv']['color_lower'])
             self.color_upper = np.array(f['cv']['color_upper'])
         self.track_color_iterate = f['cv']['track_color_iterate']
+        self.color_sampling_hsv = (np.zeros(3, dtype=np.uint8), np.zeros(3, dtype=np.uint8))
+        self.color_tracker = ColorTracker(f['cv'], self.sampling_rad, self.min_radius)
 
         # DNN目标检测参数
-        self.net = cv2.dnn.readNetFromCaffe(thisPath + '/models/deploy.prototxt', thisPath + '/models/mobilenet_iter_73000.caffemodel')
         self.class_names = ["background", "aeroplane", "bicycle", "bird", "boat",
                             "bottle", "bus", "car", "cat", "chair", "cow", "diningtable",
                             "dog", "horse", "motorbike", "person", "pottedplant", "sheep",
                             "sofa", "train", "tvmonitor"]
-
-        # MediaPipe初始化
-        self.mpDraw = mp.solutions.drawing_utils
+        self.object_detections = np.empty(0, dtype=DETECTION_DTYPE)
 
         # MediaPipe手势检测参数
-        self.mpHands = mp.solutions.hands
-        self.hands = self.mpHands.Hands(max_num_hands=1)
         self.max_distance = 1
         self.gs_pic_interval = 6
         self.gs_pic_last_time = time.time()
 
         # 巡线自动驾驶参数
-        self.sampling_line_1 = 0.6
-        self.sampling_line_2 = 0.9
+        self.sampling_line_1 = f['cv']['line_sampling_lines'][0]
+        self.sampling_line_2 = f['cv']['line_sampling_lines'][-1]
+        self.line_tracker = LineTracker(f['cv']['line_sampling_lines'], f['cv']['line_band_half'],
+                                        int(self.sampling_rad/4))
         self.slope_impact = 1.5
         self.base_impact = 0.005
         self.speed_impact = 0.5
@@ -122,17 +135,23 @@ class OpencvFuncs():
         self.line_lower = np.array([25, 150, 70])
         self.line_upper = np.array([42, 255, 255])
 
-        # MediaPipe人脸检测参数
-        self.mp_face_detection = mp.solutions.face_detection
-        self.face_detection = self.mp_face_detection.FaceDetection(model_selection=0, min_detection_confidence=0.5)
-
-        # MediaPipe姿态检测参数
-        self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(static_image_mode=False, 
-                                    model_complexity=1, 
-                                    smooth_landmarks=True, 
-                                    min_detection_confidence=0.5, 
-                                    min_tracking_confidence=0.5)
+        # 模型在所属模式第一次被选中时才加载，空闲超时后卸载
+        self.models = ModelRegistry(f['models'], f['code'])
+        self.models.register('face_search', lambda: FaceSearch(
+            cv2.CascadeClassifier(thisPath + '/models/haarcascade_frontalface_default.xml'), f['cv']),
+            ['cv_face'])
+        self.models.register('object_detector', lambda: ObjectDetector(
+            cv2.dnn.readNetFromCaffe(thisPath + '/models/deploy.prototxt', thisPath + '/models/mobilenet_iter_73000.caffemodel'),
+            f['dnn']), ['cv_objs'])
+        self.models.register('mp_hands', lambda: self.mpHands.Hands(max_num_hands=1), ['mp_hand'])
+        self.models.register('mp_face', lambda: self.mp_face_detection.FaceDetection(
+            model_selection=0, min_detection_confidence=0.5), ['mp_face'])
+        self.models.register('mp_pose', lambda: self.mp_pose.Pose(static_image_mode=False, 
+                                                                  model_complexity=1, 
+                                                                  smooth_landmarks=True, 
+                                                                  min_detection_confidence=0.5, 
+                                                                  min_tracking_confidence=0.5), ['mp_pose'])
+        self.models.preload()
 
         # 基础数据显示参数
         self.show_base_info_flag = False
@@ -147,73 +166,81 @@ class OpencvFuncs():
         self.info_show_time = 10
         self.recv_line_max = 26
 
+        # 缓存的叠加面板，内容变化时才重新渲染
+        self.info_panel = OverlayPanel(bg_rect=(round((self.info_scale-0.005)*640), round(0.33*480),
+                                                round(0.98*640), round(0.78*480)),
+                                       bg_color=self.info_bg_color, bg_alpha=0.5)
+        self.recv_panel = OverlayPanel()
+        self.osd_sensor_panel = OverlayPanel()
+        self.osd_lidar_panel = OverlayPanel()
+        self.timing_panel = OverlayPanel(bg_rect=(5, 290, 245, 475))
+
         # 任务标志
         self.mission_flag = False
 
         # OSD设置
         self.add_osd = f['base_config']['add_osd']
 
-        # 摄像头类型检测
-        self.usb_camera_connected = self.usb_camera_detection()
-        self.csi_camera_connected = False
-        self.oak_camera_connected = False
-
-        # USB摄像头初始化
-        if self.usb_camera_connected:
-            self.camera = cv2.VideoCapture(0)
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, f['video']['default_res_w'])
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, f['video']['default_res_h'])
-
-        # CSI摄像头初始化
-        if not self.usb_camera_connected:
-            print("init csi camera.")
-            try:
-                self.encoder = H264Encoder(1000000)
-                self.picam2 = Picamera2()
-                self.picam2.configure(self.picam2.create_video_configuration(main={"format": 'XRGB8888', "size": (f['video']['default_res_w'], f['video']['default_res_h'])}))
-                self.picam2.start()
-                self.csi_camera_connected = True
-            except:
-                self.csi_camera_connected = False
-
-        # OAK摄像头初始化
-        if not self.usb_camera_connected and not self.csi_camera_connected:
-            try:
-                self.pipeline = dai.Pipeline()
-
-                self.camRgb = self.pipeline.createColorCamera()
-                self.camRgb.setBoardSocket(dai.CameraBoardSocket.RGB)
-                self.camRgb.setInterleaved(False)
-                # self.camRgb.setResolution(dai.ColorCameraProperties.SensorResolution.THE_480_P)
-                self.camRgb.setResolution(dai.ColorCameraProperties.SensorResolution.THE_720_P)
-
-                self.xout = self.pipeline.createXLinkOut()
-                self.xout.setStreamName("video")
-                self.camRgb.video.link(self.xout.input)
-
-                self.device = dai.Device(self.pipeline)
-                self.output_queue = self.device.getOutputQueue(name="video", maxSize=8, blocking=False)
-
-                self.oak_camera_connected = True
-            except Exception as e:
-                print(f"[cv_ctrl.frame_process] error: {e}")
-                self.oak_camera_connected = False
-
+        # 图像源(USB/CSI/OAK/视频文件/合成图案)，由独立线程采集到环形缓冲
+        self.frame_source = open_frame_source(f['video'])
+        self.last_frame_seq = 0
+        # 分析码流分辨率，需与主码流同宽高比
+        self.analysis_size = f['video'].get('analysis_size') or None
+        if self.analysis_size and (self.analysis_size[0] * f['video']['default_res_h']
+                                   != self.analysis_size[1] * f['video']['default_res_w']):
+            logger.error(f"[cv_ctrl] 分析码流 {self.analysis_size} 与主码流宽高比不同，不使用分析码流")
+            self.analysis_size = None
+
+        # 拍照，编码和写盘在后台 I/O 线程中进行
+        self.snapshots = SnapshotWriter(f['snapshot'], self.photo_path, self.frame_source, self.flash_ctrl)
+
+        # 流水线分阶段耗时统计和 cProfile 采样
+        self.timing = FrameTiming(f['timing'])
+
+        # 视频流分发，所有客户端共享一路 frame_process；没有客户端时录像和拍照也继续取帧
+        self.stream_image = None
+        self.stream_timestamp = None
+        self.stream_hub = StreamHub(f['stream'], self.stream_frame,
+                                    lambda: self.recorder.recording or self.snapshots.pending(), self.timing)
+
+
+    # MediaPipe解决方案模块，访问时才导入 mediapipe
+    @property
+    def mpDraw(self):
+        return mp.solutions.drawing_utils
+
+    @property
+    def mpHands(self):
+        return mp.solutions.hands
+
+    @property
+    def mp_face_detection(self):
+        return mp.solutions.face_detection
+
+    @property
+    def mp_pose(self):
+        return mp.solutions.pose
+
+    def stream_frame(self):
+        """生成一帧供 StreamHub 分发
+        Returns:
+            (叠加后的 BGR 画面, JPEG 数据, JPEG 质量, 采集时刻)，摄像头读取失败时画面和采集时刻为 None
+        """
+        self.stream_image = None
+        self.stream_timestamp = None
+        encoded = self.frame_process()
+        return self.stream_image, encoded, self.video_quality, self.stream_timestamp
 
     def frame_process(self):
         """处理摄像头帧,应用CV功能并返回处理后的帧"""
         try:
-            if self.usb_camera_connected:
-                success, input_frame = self.camera.read()
-                if not success:
-                    self.camera.release()
-                    time.sleep(1)
-                    self.camera = cv2.VideoCapture(0)
-            elif self.csi_camera_connected:
-                input_frame = self.picam2.capture_array()
-            elif self.oak_camera_connected:
-                input_frame = self.output_queue.get().getCvFrame()
-                input_frame = cv2.resize(input_frame, (640, 480))
+            frame = self.frame_source.read(self.last_frame_seq) if self.frame_source else None
+            if frame is not None:
+                self.last_frame_seq = frame.seq
+                self.timing.frame(frame.seq, frame.timestamp)
+                # 环形缓冲中的帧可能被多个消费者共享，叠加绘制在副本上进行；
+                # 非 BGR 格式在转换时已经生成新数组，不再额外复制
+                input_frame = frame.bgr(copy=True)
             else:
                 input_frame = 255 * np.ones((480, 640, 3), dtype=np.uint8)
                 cv2.putText(input_frame, f"camera read failed... \nusb - csi - oak", 
@@ -221,7 +248,8 @@ class OpencvFuncs():
                             cv2.FONT_HERSHEY_SIMPLEX, 0.369, (0, 0, 0), 1)
                 ret, buffer = cv2.imencode('.jpg', input_frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.video_quality])
                 input_frame = buffer.tobytes()
-                time.sleep(1)
+                if self.frame_source is None:
+                    time.sleep(1)
                 return input_frame
         except Exception as e:
             print(f"[cv_ctrl.frame_process] error: {e}")
@@ -234,87 +262,75 @@ class OpencvFuncs():
             return input_frame
 
         # opencv功能处理
+        stage_start = time.perf_counter()
         if self.cv_mode != f['code']['cv_none']:
-            if not self.cv_event.is_set():
+            if not self.cv_event.is_set() and self.cv_sched.should_run(self.cv_mode):
                 self.cv_event.set()
-                self.opencv_threading(input_frame)
+                # 分析使用环形缓冲中未被叠加绘制的原始帧
+                self.opencv_threading(frame)
             try:
-                mask = self.overlay.astype(bool)
-                input_frame[mask] = self.overlay[mask]
-                cv2.addWeighted(self.overlay, 1, input_frame, 1, 0, input_frame)
+                if self.cv_mode == f['code']['cv_objs']:
+                    # 目标检测输出结构化结果，直接画到画面上
+                    self.draw_object_detections(input_frame)
+                # 缩放分析时叠加层会短暂小于画面，跳过这一帧的合成
+                elif self.overlay.shape[:2] == input_frame.shape[:2]:
+                    mask = self.overlay.astype(bool)
+                    input_frame[mask] = self.overlay[mask]
+                    cv2.addWeighted(self.overlay, 1, input_frame, 1, 0, input_frame)
             except Exception as e:
                     print("An error occurred:", e)
         elif self.show_info_flag:
             if time.time() - self.info_update_time > self.info_show_time:
                 self.show_info_flag = False
-            self.overlay = input_frame.copy()
-            cv2.rectangle(self.overlay,  (round((self.info_scale-0.005)*640), round((0.33)*480)), 
-                                    (round(0.98*640), round((0.78)*480)), 
-                                    self.info_bg_color, -1)
-            cv2.addWeighted(self.overlay, 0.5, input_frame, 0.5, 0, input_frame)
-
-            # info_deque.appendleft(time.time())
-            for i in range(0, len(self.info_deque)):
-                cv2.putText(input_frame, str(self.info_deque[i]['text']), 
-                            (round(self.info_scale*640), round(self.info_scale*640 - i * 20)), 
-                            cv2.FONT_HERSHEY_SIMPLEX, self.info_deque[i]['size'], self.info_deque[i]['color'], 1)
+            info_key = tuple((str(info['text']), tuple(info['color']), info['size']) for info in self.info_deque)
+            self.info_panel.update(info_key, lambda: (self.info_panel_texts(info_key), ()), input_frame.shape[2])
+            self.info_panel.composite(input_frame)
 
         if self.show_base_info_flag:
-            for i in range(0, len(self.recv_deque)):
-                cv2.putText(input_frame, str(self.recv_deque[i]), 
-                        (round(0.05*640), round(0.1*640 + i * 13)), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.369, (255, 255, 255), 1)
+            recv_key = tuple(str(line) for line in self.recv_deque)
+            self.recv_panel.update(recv_key, lambda: (self.recv_panel_texts(recv_key), ()), input_frame.shape[2])
+            self.recv_panel.composite(input_frame)
+
+        stage_start = self.timing.lap('composite', stage_start)
 
         # 渲染OSD
         input_frame = self.osd_render(input_frame)
+        if self.timing.osd:
+            self.timing_osd_render(input_frame)
+        stage_start = self.timing.lap('osd', stage_start)
 
-        # 拍照
-        if self.picture_capture_flag:
-            logger.info("执行图片捕获")
-            current_time = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            photo_filename = f'{self.photo_path}photo_{current_time}.jpg'
-            try:
-                cv2.imwrite(photo_filename, input_frame)
-                self.picture_capture_flag = False
-                print(photo_filename)
-            except:
-                pass
-
-        # 录制视频
-        if not self.set_video_record_flag and not self.video_record_status_flag:
-            pass
-        elif self.set_video_record_flag and not self.video_record_status_flag:
+        # 录制视频，编码在后台录像线程中进行
+        if self.set_video_record_flag and not self.recorder.recording:
             logger.info(f"执行视频录制: {self.set_video_record_flag}")
-            current_time = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            video_filename = f'{self.video_path}video_{current_time}.mp4'
-            self.writer = imageio.get_writer(video_filename, fps=30)
-            self.video_record_status_flag = True
-        elif self.set_video_record_flag and self.video_record_status_flag:
+            self.recorder.start(self.frame_source.capture_fps)
+        elif not self.set_video_record_flag and self.recorder.recording:
+            self.recorder.stop()
+        # 拍照画面不带录像标记，有拍照请求时才需要复制
+        snapshot_frame = input_frame
+        if self.recorder.recording:
+            if self.snapshots.pending():
+                snapshot_frame = input_frame.copy()
             cv2.circle(input_frame, (15, 15), 5, (64, 64, 255), -1)
-            self.writer.append_data(np.array(cv2.cvtColor(input_frame, cv2.COLOR_BGRA2RGB)))
-        elif not self.set_video_record_flag and self.video_record_status_flag:
-            self.video_record_status_flag = False
-            self.writer.close()
-
-        # 帧缩放
-        if self.scale_rate == 1:
-            pass
-        else:
-            img_height, img_width = input_frame.shape[:2]
-            img_width_d2  = img_width/2
-            img_height_d2 = img_height/2
-            x_start = int(img_width_d2 - (img_width_d2//self.scale_rate))
-            x_end   = int(img_width_d2 + (img_width_d2//self.scale_rate))
-            y_start = int(img_height_d2 - (img_height_d2//self.scale_rate))
-            y_end   = int(img_height_d2 + (img_height_d2//self.scale_rate))
-            input_frame = input_frame[y_start:y_end, x_start:x_end]
+        record_frame = input_frame
+        record_time = time.perf_counter() - stage_start
 
         # 编码帧
+        stage_start = time.perf_counter()
+        encoded = None
         try:
             ret, buffer = cv2.imencode('.jpg', input_frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.video_quality])
-            input_frame = buffer.tobytes()
+            input_frame = encoded = buffer.tobytes()
         except:
             pass
+        stage_start = self.timing.lap('encode', stage_start)
+        self.timing.record('total', time.monotonic() - frame.timestamp)
+
+        # 录像帧、预录缓冲、拍照和视频流的其他档位只保存引用
+        self.stream_image = record_frame
+        self.stream_timestamp = frame.timestamp
+        self.recorder.push(frame.timestamp, record_frame, encoded)
+        self.snapshots.push(frame, snapshot_frame, encoded)
+        self.timing.record('record', record_time + time.perf_counter() - stage_start)
 
         # 计算FPS
         self.fps_count += 1
@@ -322,22 +338,24 @@ class OpencvFuncs():
             self.video_fps = self.fps_count/2
             self.fps_count = 0
             self.fps_start_time = time.time()
+            if self.cv_mode != f['code']['cv_none']:
+                self.cv_sched.adjust(self.cv_mode, self.video_fps)
+            self.models.release_idle(self.cv_mode)
 
         # 输出帧
         return input_frame
 
 
 
-    def usb_camera_detection(self):
-        """检测USB摄像头是否连接"""
-        lsusb_output = subprocess.check_output(["lsusb"]).decode("utf-8")
-        if "Camera" in lsusb_output:
-            print("USB Camera connected")
-            return True
-        else:
-            print("USB Camera not connected")
-            return False
+    def info_panel_texts(self, info_key):
+        """信息面板的文字列表"""
+        return [(text, (round(self.info_scale*640), round(self.info_scale*640 - i * 20)), size, color, 1)
+                for i, (text, color, size) in enumerate(info_key)]
 
+    def recv_panel_texts(self, recv_key):
+        """串口接收信息面板的文字列表"""
+        return [(line, (round(0.05*640), round(0.1*640 + i * 13)), 0.369, (255, 255, 255), 1)
+                for i, line in enumerate(recv_key)]
 
     def osd_render(self, osd_frame):
         """渲染OSD信息到帧上"""
@@ -347,31 +365,61 @@ class OpencvFuncs():
         # add your osd info here
         # cv2.putText(overlay_buffer, 'OSD_TEST', (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
 
-        # 渲染激光雷达数据
-        lidar_points = []
-        for lidar_angle, lidar_distance in zip(self.base_ctrl.rl.lidar_angles_show, self.base_ctrl.rl.lidar_distances_show):
-            lidar_x = int(lidar_distance * np.cos(lidar_angle) * 0.05) + 320
-            lidar_y = int(lidar_distance * np.sin(lidar_angle) * 0.05) + 240
-            lidar_points.append((lidar_x, lidar_y))
+        channels = osd_frame.shape[2]
 
-        for lidar_point in lidar_points:
-            cv2.circle(osd_frame, lidar_point, 3, (255, 0, 0), -1)
+        # 渲染激光雷达数据，每圈扫描只重新计算一次点位
+        rl = self.base_ctrl.rl
+        self.osd_lidar_panel.update(rl.lidar_scan_id, lambda: ((), self.osd_lidar_circles()), channels)
+        self.osd_lidar_panel.composite(osd_frame)
 
         # 渲染传感器数据
-        sensor_index = 0
-        for sensor_line in self.base_ctrl.rl.sensor_data:
-            # sensor_line = sensor_line[:-2]
-            cv2.putText(osd_frame, sensor_line,
-                        (100, 50 + sensor_index * 20), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255,255,255), 1)
-            sensor_index = sensor_index + 1
-
+        sensor_key = tuple(rl.sensor_data)
+        self.osd_sensor_panel.update(sensor_key,
+                                     lambda: ([(sensor_line, (100, 50 + i * 20), 0.5, (255, 255, 255), 1)
+                                               for i, sensor_line in enumerate(sensor_key)], ()),
+                                     channels)
+        self.osd_sensor_panel.composite(osd_frame)
 
         return osd_frame
 
-    def picture_capture(self):
+    def timing_osd_render(self, osd_frame):
+        """在画面左下角显示各阶段耗时 p50/p95/max(ms)，每秒刷新一次"""
+        self.timing_panel.update(int(time.time()),
+                                 lambda: ([(line, (10, 305 + i * 15), 0.4, (255, 255, 255), 1)
+                                           for i, line in enumerate(['stage       p50    p95    max']
+                                                                    + self.timing.osd_lines())], ()),
+                                 osd_frame.shape[2])
+        self.timing_panel.composite(osd_frame)
+
+    def cv_mode_name(self, cv_mode=None):
+        """模式码对应的模式名(config.yaml code 中的键)"""
+        cv_mode = self.cv_mode if cv_mode is None else cv_mode
+        for name, code in f['code'].items():
+            if code == cv_mode and name.startswith(('cv_', 'mp_')):
+                return name
+        return str(cv_mode)
+
+    def osd_lidar_circles(self):
+        """激光雷达点位的圆点列表"""
+        angles = np.asarray(self.base_ctrl.rl.lidar_angles_show, dtype=np.float32)
+        distances = np.asarray(self.base_ctrl.rl.lidar_distances_show, dtype=np.float32)
+        if not len(angles):
+            return []
+        lidar_x = (distances * np.cos(angles) * 0.05).astype(np.int32) + 320
+        lidar_y = (distances * np.sin(angles) * 0.05).astype(np.int32) + 240
+        inside = (lidar_x >= -3) & (lidar_x < 643) & (lidar_y >= -3) & (lidar_y < 483)
+        lidar_x, lidar_y = lidar_x[inside], lidar_y[inside]
+        return [((int(x), int(y)), 3, (255, 0, 0)) for x, y in zip(lidar_x, lidar_y)]
+
+    def picture_capture(self, count=1, interval=0.0, full_res=False, flash=False):
         logger.info("执行图片捕获")
-        self.picture_capture_flag = True
+        self.snapshots.capture(count, interval, full_res, flash)
+
+    def flash_ctrl(self, on):
+        if on:
+            self.base_ctrl.lights_ctrl(255, 255)
+        else:
+            self.base_ctrl.lights_ctrl(0, 0)
 
     def video_record(self, input_cmd):
         logger.info(f"执行视频录制: {input_cmd}")
@@ -386,6 +434,9 @@ class OpencvFuncs():
             self.scale_rate = 1
         else:
             self.scale_rate = input_rate
+        # 变焦在图像源采集端裁剪，检测和叠加都在变焦后的画面上进行
+        if self.frame_source is not None:
+            self.frame_source.set_zoom(self.scale_rate)
 
     def set_video_quality(self, input_quality):
         logger.info(f"设置视频质量: {input_quality}")
@@ -399,6 +450,12 @@ class OpencvFuncs():
     def set_cv_mode(self, input_mode):
         logger.info(f"设置CV模式: {input_mode}")
         self.cv_mode = input_mode
+        for tracker in self.trackers.values():
+            tracker.reset()
+        face_search = self.models.peek('face_search')
+        if face_search is not None:
+            face_search.reset()
+        self.models.select_mode(self.cv_mode)
         if self.cv_mode == f['code']['cv_none']:
             self.set_video_record_flag = False
 
@@ -411,12 +468,13 @@ class OpencvFuncs():
 
 
     def cv_detect_movition(self, img):
-        logger.info("执行运动检测")
+        hot_log.count('cv_detect_movition')
         timestamp = datetime.datetime.now()
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
         gray = cv2.GaussianBlur(gray, (21, 21), 0)
 
-        if self.avg is None:
+        # 分析分辨率变化时重新建立背景
+        if self.avg is None or self.avg.shape != gray.shape:
             self.avg = gray.copy().astype("float")
             return
         try:
@@ -435,7 +493,7 @@ class OpencvFuncs():
         overlay_buffer = np.zeros_like(img)
         for c in cnts:
             # if the contour is too small, ignore it
-            if cv2.contourArea(c) < 2000:
+            if cv2.contourArea(c) < 2000 * self.analysis_scale ** 2:
                 continue
             # compute the bounding box for the contour, draw it on the frame,
             # and update the text
@@ -460,11 +518,15 @@ class OpencvFuncs():
         self.overlay = overlay_buffer
 
     def gimbal_track(self, fx, fy, gx, gy, iterate):
-        logger.info(f"执行云台跟踪: fx={fx}, fy={fy}, gx={gx}, gy={gy}, iterate={iterate}")
+        hot_log.every(1.0, logging.INFO, "执行云台跟踪: fx=%.1f, fy=%.1f, gx=%.1f, gy=%.1f, iterate=%s",
+                      fx, fy, gx, gy, iterate)
         global gimbal_x, gimbal_y
-        distance = math.sqrt((fx - gx) ** 2 + (gy - fy) ** 2)
-        self.pan_angle += (gx - fx) * iterate
-        self.tilt_angle += (fy - gy) * iterate
+        # 分析图像被缩小时，把像素误差换算回原始分辨率；变焦时同样的像素误差对应更小的角度，
+        # 换算回全视场像素，保持跟踪增益不变
+        scale = self.analysis_scale * self.analysis_zoom
+        distance = math.sqrt((fx - gx) ** 2 + (gy - fy) ** 2) / scale
+        self.pan_angle += (gx - fx) * iterate / scale
+        self.tilt_angle += (fy - gy) * iterate / scale
         if self.pan_angle > 180:
             self.pan_angle = 180
         elif self.pan_angle < -180:
@@ -483,37 +545,36 @@ class OpencvFuncs():
         return distance
 
     def cv_detect_faces(self, img):
-        logger.info("执行人脸检测")
+        hot_log.count('cv_detect_faces')
         gray_img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        faces = self.faceCascade.detectMultiScale(
-                gray_img,     
-                scaleFactor=1.2,
-                minNeighbors=5,     
-                minSize=(20, 20)
-            )
+        tracker = self.trackers[f['code']['cv_face']]
+        if tracker.needs_detection(gray_img):
+            # 以跟踪器传播后的框作为ROI提示，做多分辨率搜索
+            faces = self.models.get('face_search').detect(gray_img, [track.int_box() for track in tracker.active()])
+            tracker.update_detections(gray_img, faces)
+        else:
+            tracker.track(gray_img)
+        faces = tracker.active()
         overlay_buffer = np.zeros_like(img)
 
         height, width = img.shape[:2]
         center_x, center_y = width // 2, height // 2
 
-        max_area = 0
-        max_face_center = (0, 0)
-
         if len(faces):
             if self.cv_light_mode == 1:
                 if self.base_ctrl.head_light_status == 0:
                     self.base_ctrl.head_light_status = 255
                     self.base_ctrl.lights_ctrl(self.base_ctrl.base_light_status, self.base_ctrl.head_light_status)
 
-            for (x,y,w,h) in faces:
+            for face in faces:
+                (x, y, w, h) = face.int_box()
                 cv2.rectangle(overlay_buffer,(x,y),(x+w,y+h),(64,128,255),1)
-                face_area = w * h
-                if face_area > max_area:
-                    max_area = face_area
-                    max_face_center = (x + w // 2, y + h // 2)
 
+            # 云台跟随平滑后的最大人脸中心
+            target_x, target_y = tracker.primary().smoothed_center()
+            cv2.circle(overlay_buffer, (int(target_x), int(target_y)), 3, (64, 128, 255), -1)
             if not self.cv_movtion_lock:
-                self.gimbal_track(center_x, center_y, max_face_center[0], max_face_center[1], self.track_faces_iterate)
+                self.gimbal_track(center_x, center_y, target_x, target_y, self.track_faces_iterate)
 
             if(datetime.datetime.now() - self.last_frame_capture_time).seconds >= 3:
                 if self.detection_reaction_mode == f['code']['re_none']:
@@ -541,62 +602,77 @@ class OpencvFuncs():
                                                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
         cv2.putText(overlay_buffer, ' ACC_R: {}'.format(self.track_acc_rate), (center_x+50, center_y+100), 
                                                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        cv2.putText(overlay_buffer, ' DET/TRK: {:.1f}/{:.1f}'.format(tracker.detect_fps, tracker.track_fps), (center_x+50, center_y+120), 
+                                                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
         self.overlay = overlay_buffer
 
     def cv_detect_objects(self, img):
-        logger.info("执行目标检测")
-        overlay_buffer = np.zeros_like(img)
-        cv2.putText(overlay_buffer, 'CV_OBJS', (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-
-        (h, w) = img.shape[:2]
-        blob = cv2.dnn.blobFromImage(cv2.resize(img, (300, 300)), 0.007843, (300, 300), 127.5)
-        self.net.setInput(blob)
-        detections = self.net.forward()
-
-        for i in range(0, detections.shape[2]):
-            confidence = detections[0, 0, i, 2]
-
-            if confidence > 0.2:
-                idx = int(detections[0, 0, i, 1])
-                box = detections[0, 0, i, 3:7] * np.array([w, h, w, h])
-                (startX, startY, endX, endY) = box.astype("int")
-
-                label = "{}: {:.2f}%".format(self.class_names[idx], confidence * 100)
-                cv2.rectangle(overlay_buffer, (startX, startY), (endX, endY), (0, 255, 0), 2)
-                y = startY - 15 if startY - 15 > 15 else startY + 15
-                cv2.putText(overlay_buffer, label, (startX, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-        self.overlay = overlay_buffer
+        hot_log.count('cv_detect_objects')
+        gray_img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        tracker = self.trackers[f['code']['cv_objs']]
+        if tracker.needs_detection(gray_img):
+            detector = self.models.get('object_detector')
+            detections = detector.detect(img, gray_img)
+            if detections is None:
+                # 异步推理的第一次调用还没有结果
+                detections = np.empty(0, dtype=DETECTION_DTYPE)
+            # 异步推理的结果属于上一次提交的帧：在那一帧上建立跟踪，再用光流传播到当前帧
+            detected_gray = detector.result_frame
+            if detected_gray is None or detected_gray.shape != gray_img.shape:
+                detected_gray = gray_img
+            boxes = list(zip(detections['x0'], detections['y0'],
+                             detections['x1'] - detections['x0'], detections['y1'] - detections['y0']))
+            tracker.update_detections(detected_gray, boxes, detections['class_id'].tolist(), detections['score'].tolist())
+            if detected_gray is not gray_img:
+                tracker.track(gray_img)
+        else:
+            tracker.track(gray_img)
+
+        # 跟踪结果换算回画面坐标后保存，由 frame_process 绘制
+        tracks = tracker.active()
+        objects = np.empty(len(tracks), dtype=DETECTION_DTYPE)
+        for i, track in enumerate(tracks):
+            x, y, w, h = track.box / self.analysis_scale
+            objects[i] = (track.label, track.score, x, y, x + w, y + h)
+        self.object_detections = objects
+
+    def draw_object_detections(self, frame):
+        """把目标检测结果画到画面上"""
+        cv2.putText(frame, 'CV_OBJS', (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        tracker = self.trackers[f['code']['cv_objs']]
+        cv2.putText(frame, 'DET/TRK: {:.1f}/{:.1f}'.format(tracker.detect_fps, tracker.track_fps), (50, 80), 
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        for detection in self.object_detections:
+            (startX, startY, endX, endY) = (int(detection['x0']), int(detection['y0']),
+                                            int(detection['x1']), int(detection['y1']))
+            label = "{}: {:.2f}%".format(self.class_names[detection['class_id']], detection['score'] * 100)
+            cv2.rectangle(frame, (startX, startY), (endX, endY), (0, 255, 0), 2)
+            y = startY - 15 if startY - 15 > 15 else startY + 15
+            cv2.putText(frame, label, (startX, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
 
     def cv_detect_color(self, img):
-        logger.info("执行颜色检测")
+        hot_log.count('cv_detect_color')
         global head_light_pwm
-        blurred = cv2.GaussianBlur(img, (11, 11), 0)
-        hsv = cv2.cvtColor(blurred, cv2.COLOR_BGR2HSV)
-
-        mask = cv2.inRange(hsv, self.color_lower, self.color_upper)
-        mask = cv2.erode(mask, None, iterations=5)
-        mask = cv2.dilate(mask, None, iterations=5)
-
-        cnts = cv2.findContours(mask.copy(), cv2.RETR_EXTERNAL,
-            cv2.CHAIN_APPROX_SIMPLE)
-        cnts = imutils.grab_contours(cnts)
-        center = None
-
-        overlay_buffer = np.zeros_like(img)
-
         height, width = img.shape[:2]
         center_x, center_y = width // 2, height // 2
 
-        mask = np.zeros((height, width), dtype=np.uint8)
-        cv2.circle(mask, (center_x, center_y), self.sampling_rad, (255), thickness=-1)
+        tracker = self.trackers[f['code']['cv_clor']]
+        # 颜色分割比光流跟踪更快，纯色目标内部也选不到特征点，默认每帧检测(detect_interval 为 1)，
+        # 只用跟踪器的卡尔曼滤波平滑中心；此时不需要整帧灰度图
+        gray_img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if tracker.detect_interval > 1 else None
+        if tracker.needs_detection(gray_img):
+            self.color_sampling_hsv = self.color_tracker.sampling_hsv(img)
+            boxes = []
+            color_target = self.color_tracker.detect(img, self.color_lower, self.color_upper)
+            if color_target is not None:
+                radius = color_target['radius']
+                boxes.append((color_target['x'] - radius, color_target['y'] - radius, 2 * radius, 2 * radius))
+            tracker.update_detections(gray_img, boxes)
+        else:
+            tracker.track(gray_img)
+        lower_hsv, upper_hsv = self.color_sampling_hsv
 
-        masked_hsv = cv2.bitwise_and(hsv, hsv, mask=mask)
-        masked_hsv_pixels = masked_hsv[mask == 255]
-        lower_hsv = np.min(masked_hsv_pixels, axis=0)
-        upper_hsv = np.max(masked_hsv_pixels, axis=0)
+        overlay_buffer = np.zeros_like(img)
 
         cv2.putText(overlay_buffer, ' UPPER: {}'.format(upper_hsv), (center_x+50, center_y+40), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
         cv2.putText(overlay_buffer, ' LOWER: {}'.format(lower_hsv), (center_x+50, center_y+60), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
@@ -609,57 +685,51 @@ class OpencvFuncs():
         
         cv2.circle(overlay_buffer, (center_x, center_y), self.sampling_rad, (64, 255, 64), 1)
 
-        # only proceed if at least one contour was found
-        if len(cnts) > 0:
-            # find the largest contour in the mask, then use
-            # it to compute the minimum enclosing circle and
-            # centroid
-            c = max(cnts, key=cv2.contourArea)
-            ((x, y), radius) = cv2.minEnclosingCircle(c)
-            M = cv2.moments(c)
-            center = (int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"]))
-
-            # only proceed if the radius meets a minimum size
-            if radius > self.min_radius:
-                if not self.cv_movtion_lock:
-                    distance = self.gimbal_track(center_x, center_y, center[0], center[1], self.track_color_iterate)
-                    if distance < self.aimed_error:
-                        head_light_pwm = 10
-                        self.base_ctrl.lights_ctrl(self.base_ctrl.base_light_status, head_light_pwm)
-                    else:
-                        head_light_pwm = 0
-                        self.base_ctrl.lights_ctrl(self.base_ctrl.base_light_status, head_light_pwm)
-                    cv2.putText(overlay_buffer, 'DIF: {}'.format(distance), (center_x+50, center_y+20), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-
-                # draw the circle and centroid on the frame,
-                # then update the list of tracked points
-                cv2.circle(overlay_buffer, (int(x), int(y)), int(radius),
-                    (128, 255, 255), 1)
-                cv2.circle(overlay_buffer, center, 3, (128, 255, 255), -1)
-                cv2.line(overlay_buffer, center, (center_x, center_y), (0, 0, 255), 1)
-                cv2.putText(overlay_buffer, 'RAD: {}'.format(radius), (center_x+50, center_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-
-                self.points.appendleft(center)
-            else:
+        target = tracker.primary()
+        if target is not None:
+            center = tuple(int(v) for v in target.center())
+            radius = target.box[2] / 2
+            if not self.cv_movtion_lock:
+                # 云台跟随卡尔曼平滑后的中心
+                target_x, target_y = target.smoothed_center()
+                distance = self.gimbal_track(center_x, center_y, target_x, target_y, self.track_color_iterate)
+                if distance < self.aimed_error:
+                    head_light_pwm = 10
+                    self.base_ctrl.lights_ctrl(self.base_ctrl.base_light_status, head_light_pwm)
+                else:
+                    head_light_pwm = 0
+                    self.base_ctrl.lights_ctrl(self.base_ctrl.base_light_status, head_light_pwm)
+                cv2.putText(overlay_buffer, 'DIF: {}'.format(distance), (center_x+50, center_y+20), 
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+            # draw the circle and centroid on the frame,
+            # then update the list of tracked points
+            cv2.circle(overlay_buffer, center, int(radius),
+                (128, 255, 255), 1)
+            cv2.circle(overlay_buffer, center, 3, (128, 255, 255), -1)
+            cv2.line(overlay_buffer, center, (center_x, center_y), (0, 0, 255), 1)
+            cv2.putText(overlay_buffer, 'RAD: {}'.format(radius), (center_x+50, center_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+            self.points.appendleft(center)
+        else:
+            if not self.cv_movtion_lock and self.base_ctrl.head_light_status != 0:
                 head_light_pwm = 0
                 self.base_ctrl.lights_ctrl(self.base_ctrl.base_light_status, head_light_pwm)
-                self.points.appendleft(None)
+            self.points.appendleft(None)
 
-            for i in range(1, len(self.points)):
-                if self.points[i-1] is None or self.points[i] is None:
-                    continue
-                cv2.line(overlay_buffer, self.points[i - 1], self.points[i], (255, 255, 128), 1)
+        for i in range(1, len(self.points)):
+            if self.points[i-1] is None or self.points[i] is None:
+                continue
+            cv2.line(overlay_buffer, self.points[i - 1], self.points[i], (255, 255, 128), 1)
 
-        self.overlay = np.zeros_like(img)
         self.overlay = overlay_buffer
 
     def calculate_distance(self, lm1, lm2):
-        logger.info(f"计算距离: lm1={lm1}, lm2={lm2}")
+        hot_log.count('calculate_distance')
         return ((lm1.x - lm2.x) ** 2 + (lm1.y - lm2.y) ** 2) ** 0.5
 
     def calculate_angle(self, A1, A2, B1, B2):
-        logger.info(f"计算角度: A1={A1}, A2={A2}, B1={B1}, B2={B2}")
+        hot_log.count('calculate_angle')
         vector_A = (A2.x - A1.x, A2.y - A1.y)
         vector_B = (B2.x - B1.x, B2.y - B1.y)
 
@@ -675,18 +745,18 @@ class OpencvFuncs():
         return angle_deg
 
     def map_value(self, value, original_min, original_max, new_min, new_max):
-        logger.info(f"映射值: value={value}, original_min={original_min}, original_max={original_max}, new_min={new_min}, new_max={new_max}")
+        hot_log.count('map_value')
         if original_max == 0:
             return 0
         return (value - original_min) / (original_max - original_min) * (new_max - new_min) + new_min
 
     def mp_detect_hand(self, img):
-        logger.info("执行MediaPipe手势检测")
+        hot_log.count('mp_detect_hand')
         height, width = img.shape[:2]
         center_x, center_y = width // 2, height // 2
 
         imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(imgRGB)
+        results = self.models.get('mp_hands').process(imgRGB)
 
         overlay_buffer = np.zeros_like(imgRGB)
         get_pwm = 0
@@ -750,10 +820,7 @@ class OpencvFuncs():
                     cv2.putText(overlay_buffer, ' GS: Take Pic', (center_x+50, center_y+100), 
                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 128, 128), 1)
                     if time.time() - self.gs_pic_last_time > self.gs_pic_interval:
-                        self.base_ctrl.lights_ctrl(255, 255)
-                        time.sleep(0.01)
-                        self.picture_capture()
-                        self.base_ctrl.lights_ctrl(0, 0)
+                        self.picture_capture(flash=True)
                         self.gs_pic_last_time = time.time()
 
                 # Not Found
@@ -772,92 +839,51 @@ class OpencvFuncs():
         self.overlay = overlay_buffer
 
     def cv_auto_drive(self, img):
-        logger.info("执行自动驾驶")
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-
-        # get a sampling
+        hot_log.count('cv_auto_drive')
         height, width = img.shape[:2]
         center_x, center_y = width // 2, height // 2
-        mask_sampling = np.zeros((height, width), dtype=np.uint8)
-        cv2.circle(mask_sampling, (center_x, center_y), int(self.sampling_rad/4), (255), thickness=-1)
-        masked_hsv = cv2.bitwise_and(hsv, hsv, mask=mask_sampling)
-        masked_hsv_pixels = masked_hsv[mask_sampling == 255]
-        lower_hsv = np.min(masked_hsv_pixels, axis=0)
-        upper_hsv = np.max(masked_hsv_pixels, axis=0)
-
-        # select the line color & get the mask
-        # img = cv2.GaussianBlur(img, (11, 11), 0)
-        line_mask = cv2.inRange(hsv, self.line_lower, self.line_upper)
-        line_mask = cv2.erode(line_mask, None, iterations=2)
-        line_mask = cv2.dilate(line_mask, None, iterations=2)
-
-        sampling_h1 = int(height * self.sampling_line_1)
-        sampling_h2 = int(height * self.sampling_line_2)
-
-        get_sampling_1 = line_mask[sampling_h1]
-        get_sampling_2 = line_mask[sampling_h2]
-
-        sampling_width_1 = np.sum(get_sampling_1 == 255)
-        sampling_width_2 = np.sum(get_sampling_2 == 255)
-
-        if sampling_width_1:
-            sam_1 = True
-        else:
-            sam_1 = False
-        if sampling_width_2:
-            sam_2 = True
-        else:
-            sam_2 = False
 
-        line_index_1 = np.where(get_sampling_1 == 255)
-        line_index_2 = np.where(get_sampling_2 == 255)
+        # get a sampling
+        lower_hsv, upper_hsv = self.line_tracker.sampling_hsv(img)
 
-        if sam_1:
-            sampling_1_left  = line_index_1[0][0]
-            sampling_1_right = line_index_1[0][sampling_width_1 - 1]
-            sampling_1_center= int((sampling_1_left + sampling_1_right) / 2)
-        if sam_2:
-            sampling_2_left  = line_index_2[0][0]
-            sampling_2_right = line_index_2[0][sampling_width_2 - 1]
-            sampling_2_center= int((sampling_2_left + sampling_2_right) / 2)
+        # 只处理采样线附近的横条
+        result = self.line_tracker.process(img, self.line_lower, self.line_upper)
+        rows = result['rows']
+        hits = result['hits']
+        found = [i for i, hit in enumerate(hits) if hit]
 
         line_slope = 0
         input_speed = 0
         input_turning = 0
-        if sam_1 and sam_2:
-            line_slope = (sampling_1_center - sampling_2_center) / abs(sampling_h1 - sampling_h2)
+        if result['slope'] is not None:
+            # 至少两条采样线命中，用拟合斜率和最下方命中点计算转向
+            line_slope = result['slope']
+            bottom_center = hits[found[-1]][2]
             impact_by_slope = self.slope_on_speed * abs(line_slope)
-            # if impact_by_slope > input_speed:
-            #     impact_by_slope = input_speed
             input_speed = self.line_track_speed - impact_by_slope
-            # print(f'im_by_slope:{impact_by_slope}   input_speed:{input_speed}')
-            input_turning = -(line_slope * self.slope_impact + (sampling_2_center - center_x) * self.base_impact) #+ (speed_impact * input_speed)
-        elif not sam_1 and sam_2:
+            input_turning = -(line_slope * self.slope_impact + (bottom_center - center_x) * self.base_impact) #+ (speed_impact * input_speed)
+        elif found and found[-1] == len(hits) - 1:
             input_speed = 0
-            input_turning = (sampling_2_center - center_x) * self.base_impact
-        elif sam_1 and not sam_2:
+            input_turning = (hits[-1][2] - center_x) * self.base_impact
+        elif found:
             input_speed = (self.line_track_speed / 3)
             input_turning = 0
         else:
             input_speed = - (self.line_track_speed / 3)
             input_turning = 0
 
-        # input_turning = - line_slope * slope_impact
-        # try:
-        #     input_turning = -(sampling_2_center - center_x) * base_impact
-        # except:
-        #     pass
         if not self.cv_movtion_lock:
             self.base_ctrl.base_json_ctrl({"T":13,"X":input_speed,"Z":input_turning})
 
         overlay_buffer = np.zeros_like(img)
-        overlay_buffer = cv2.cvtColor(line_mask, cv2.COLOR_GRAY2BGR)
+        for r0, r1, band_mask in result['bands']:
+            overlay_buffer[r0:r1][band_mask > 0] = 255
 
         cv2.putText(overlay_buffer, 'Line Following', (100, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
         cv2.circle(overlay_buffer, (center_x, center_y), int(self.sampling_rad/4), (64, 255, 64), 1)
 
-        cv2.putText(overlay_buffer, ' SAM_H1: {}'.format(self.sampling_line_1), (center_x-150, sampling_h1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 128, 128), 1)
-        cv2.putText(overlay_buffer, ' SAM_H2: {}'.format(self.sampling_line_2), (center_x-150, sampling_h2-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 128, 128), 1)
+        for i, (line, row) in enumerate(zip(self.line_tracker.lines, rows)):
+            cv2.putText(overlay_buffer, ' SAM_H{}: {}'.format(i + 1, line), (center_x-150, row-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 128, 128), 1)
 
         cv2.putText(overlay_buffer, f'X: {input_speed:.2f}, Z: {input_turning:.2f}', (center_x+50, center_y+0), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
 
@@ -870,24 +896,20 @@ class OpencvFuncs():
         cv2.putText(overlay_buffer, f' SAM_1 SAM_2 SLOPE_IM BASE_IM SPD_IM LT_SPD SLOPE_SPD', (center_x-250, center_y-70), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 128, 128), 1)
         cv2.putText(overlay_buffer, f' {self.sampling_line_1:.2f}   {self.sampling_line_2:.2f}   {self.slope_impact:.2f}      {self.base_impact:.4f}  {self.speed_impact:.2f}    {self.line_track_speed:.2f}    {self.slope_on_speed:.2f}', (center_x-250, center_y-50), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 128, 128), 1)
 
-        cv2.line(overlay_buffer, (0, sampling_h1), (width, sampling_h1), (255, 0, 0), 2)
-        cv2.line(overlay_buffer, (0, sampling_h2), (width, sampling_h2), (255, 0, 0), 2)
-
-        if sam_1:
-            cv2.line(overlay_buffer, (sampling_1_left, sampling_h1+20), (sampling_1_left, sampling_h1-20), (0, 255, 0), 2)
-            cv2.line(overlay_buffer, (sampling_1_right, sampling_h1+20), (sampling_1_right, sampling_h1-20), (0, 255, 0), 2)
-        if sam_2:
-            cv2.line(overlay_buffer, (sampling_2_left, sampling_h2+20), (sampling_2_left, sampling_h2-20), (0, 255, 0), 2)
-            cv2.line(overlay_buffer, (sampling_2_right, sampling_h2+20), (sampling_2_right, sampling_h2-20), (0, 255, 0), 2)
-        if sam_1 and sam_2:
-            cv2.line(overlay_buffer, (sampling_1_center, sampling_h1), (sampling_2_center, sampling_h2), (255, 0, 0), 2)
+        for row, hit in zip(rows, hits):
+            cv2.line(overlay_buffer, (0, row), (width, row), (255, 0, 0), 2)
+            if hit:
+                cv2.line(overlay_buffer, (hit[0], row+20), (hit[0], row-20), (0, 255, 0), 2)
+                cv2.line(overlay_buffer, (hit[1], row+20), (hit[1], row-20), (0, 255, 0), 2)
+        if len(found) >= 2:
+            cv2.line(overlay_buffer, (hits[found[0]][2], rows[found[0]]), (hits[found[-1]][2], rows[found[-1]]), (255, 0, 0), 2)
 
         self.overlay = overlay_buffer
 
     def mediaPipe_faces(self, img):
-        logger.info("执行MediaPipe人脸检测")
+        hot_log.count('mediaPipe_faces')
         image = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        results = self.face_detection.process(image)
+        results = self.models.get('mp_face').process(image)
 
         overlay_buffer = np.zeros_like(image)
         cv2.putText(overlay_buffer, 'MediaPipe Faces', (100, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
@@ -897,9 +919,9 @@ class OpencvFuncs():
         self.overlay = overlay_buffer
 
     def mediaPipe_pose(self, img):
-        logger.info("执行MediaPipe姿态检测")
+        hot_log.count('mediaPipe_pose')
         image = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(image)
+        results = self.models.get('mp_pose').process(image)
 
         overlay_buffer = np.zeros_like(image)
         cv2.putText(overlay_buffer, 'MediaPipe Pose', (100, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
@@ -934,7 +956,7 @@ class OpencvFuncs():
         print(self.show_base_info_flag)
 
     def format_json_numbers(self, obj):
-        logger.info("格式化JSON数字")
+        hot_log.count('format_json_numbers')
         if isinstance(obj, dict):
             return {k: self.format_json_numbers(v) for k, v in obj.items()}
         elif isinstance(obj, list):
@@ -964,8 +986,15 @@ class OpencvFuncs():
 
 
 
+    def tracker_status(self):
+        """当前模式的检测/跟踪频率"""
+        tracker = self.trackers.get(self.cv_mode)
+        if tracker is None:
+            return {'detect_fps': 0, 'track_fps': 0}
+        return tracker.status()
+
     def cv_process(self, frame):
-        logger.info("执行CV处理")
+        hot_log.count('cv_process')
         cv_mode_list = {
             f['code']['cv_moti']: self.cv_detect_movition,
             f['code']['cv_face']: self.cv_detect_faces,
@@ -976,15 +1005,51 @@ class OpencvFuncs():
             f['code']['mp_face']: self.mediaPipe_faces,
             f['code']['mp_pose']: self.mediaPipe_pose
         }
+        cv_mode = self.cv_mode
+        start_time = time.time()
         try:
-            cv_mode_list[self.cv_mode](frame)
+            image = frame.bgr()
+            height, width = image.shape[:2]
+            analysis_img = self.analysis_image(frame, image, cv_mode)
+            self.analysis_scale = analysis_img.shape[1] / width
+            self.analysis_zoom = frame.zoom
+            with self.timing.profiled(self.cv_mode_name(cv_mode)):
+                cv_mode_list[cv_mode](analysis_img)
+            # 叠加层按分析分辨率绘制，放大回主码流分辨率
+            if self.analysis_scale != 1 and self.overlay is not None:
+                self.overlay = cv2.resize(self.overlay, (width, height), interpolation=cv2.INTER_NEAREST)
         except Exception as e:
             print(f'[cv_ctrl.cv_process] error: {e}')
+        self.cv_sched.record(cv_mode, time.time() - start_time)
+        self.timing.record('analysis', time.time() - start_time)
         self.cv_event.clear()
 
-    def opencv_threading(self, input_img):
-        logger.info("执行OpenCV线程")
-        cv_thread = threading.Thread(target=self.cv_process, args=(input_img,), daemon=True)
+    def analysis_image(self, frame, image, cv_mode):
+        """选择当前模式的分析图像
+        使用分析码流的模式优先取设备端生成的低分辨率码流，没有时在主机端缩小主码流；
+        调度器的缩放比例(相对主码流)进一步限制分析宽度。结果与主码流同宽高比，
+        检测坐标除以 analysis_scale 即换算回主码流坐标。
+        Args:
+            frame: Frame
+            image: 主码流 BGR 图像
+            cv_mode: 模式码
+        """
+        height, width = image.shape[:2]
+        target_width = width * self.cv_sched.scale(cv_mode)
+        source = image
+        if self.cv_sched.analysis_stream(cv_mode) and self.analysis_size:
+            target_width = min(target_width, self.analysis_size[0])
+            analysis = frame.analysis_bgr()
+            if analysis is not None and analysis.shape[1] >= target_width:
+                source = analysis
+        if source.shape[1] - target_width >= 1:
+            target_height = int(round(height * target_width / width))
+            source = cv2.resize(source, (int(target_width), target_height), interpolation=cv2.INTER_AREA)
+        return source
+
+    def opencv_threading(self, input_frame):
+        hot_log.count('opencv_threading')
+        cv_thread = threading.Thread(target=self.cv_process, args=(input_frame,), daemon=True)
         cv_thread.start()
 
     def head_light_ctrl(self, input_mode):
@@ -1040,12 +1105,24 @@ class OpencvFuncs():
         if sam_pos_2 < sam_pos_1:
             sam_pos_2 = sam_pos_1 + 0.1
         self.sampling_line_2 = sam_pos_2
+        # 保留位于首尾采样线之间的中间采样线
+        middle_lines = [line for line in self.line_tracker.lines[1:-1] if sam_pos_1 < line < sam_pos_2]
+        self.line_tracker.set_lines([sam_pos_1] + middle_lines + [sam_pos_2])
         self.slope_impact = slope_im
         self.base_impact = base_im
         self.speed_impact = spd_im
         self.line_track_speed = lt_spd
         self.slope_on_speed = slope_spd
 
+    def set_line_sampling(self, lines):
+        logger.info(f"设置巡线采样线: {lines}")
+        lines = sorted(line for line in lines if 0 <= line < 1)
+        if len(lines) < 2:
+            return
+        self.sampling_line_1 = lines[0]
+        self.sampling_line_2 = lines[-1]
+        self.line_tracker.set_lines(lines)
+
     def set_pt_track_args(self, args_1, args_2):
         logger.info(f"设置PT跟踪参数: args_1={args_1}, args_2={args_2}")
         if args_1 == '-c' or args_1 == '--color_iterate':
@@ -1068,10 +1145,7 @@ class OpencvFuncs():
             time.sleep(input_time)
             self.base_ctrl.base_json_ctrl({"T":1,"L":0,"R":0})
             time.sleep(input_interval/2)
-            self.base_ctrl.lights_ctrl(255, 255)
-            time.sleep(0.01)
-            self.picture_capture()
-            self.base_ctrl.lights_ctrl(0, 0)
+            self.picture_capture(flash=True)
             time.sleep(input_interval/2)
             if not self.mission_flag:
                 self.mission_flag = False
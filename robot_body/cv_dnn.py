@@ -0,0 +1,173 @@
+import cv2
+import numpy as np
+import logging
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+# 结构化检测结果: 类别、置信度、画面坐标的框
+DETECTION_DTYPE = np.dtype([('class_id', np.int32),
+                            ('score', np.float32),
+                            ('x0', np.float32), ('y0', np.float32),
+                            ('x1', np.float32), ('y1', np.float32)])
+
+# 名称到 OpenCV DNN 常量名的映射，运行时按需获取，兼容不同的 OpenCV 构建
+DNN_BACKENDS = {
+    'default': 'DNN_BACKEND_DEFAULT',
+    'opencv': 'DNN_BACKEND_OPENCV',
+    'openvino': 'DNN_BACKEND_INFERENCE_ENGINE',
+    'vkcom': 'DNN_BACKEND_VKCOM',
+}
+DNN_TARGETS = {
+    'cpu': 'DNN_TARGET_CPU',
+    'opencl': 'DNN_TARGET_OPENCL',
+    'opencl_fp16': 'DNN_TARGET_OPENCL_FP16',
+    'vulkan': 'DNN_TARGET_VULKAN',
+}
+
+
+def nms(boxes, scores, class_ids, threshold):
+    """按类别的非极大值抑制
+    Args:
+        boxes: (N, 4) 的 x0, y0, x1, y1
+        scores: (N,) 置信度
+        class_ids: (N,) 类别，不同类别的框互不抑制
+        threshold: IoU 阈值
+    Returns:
+        保留的下标
+    """
+    if not len(boxes):
+        return np.empty(0, dtype=np.intp)
+    # 按类别平移框，使不同类别不会重叠
+    offset = class_ids.astype(np.float32)[:, None] * (float(boxes.max()) + 1)
+    x0, y0, x1, y1 = (boxes + offset).T
+    areas = np.maximum(0, x1 - x0) * np.maximum(0, y1 - y0)
+    order = np.argsort(scores)[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        inter = (np.clip(np.minimum(x1[i], x1[rest]) - np.maximum(x0[i], x0[rest]), 0, None) *
+                 np.clip(np.minimum(y1[i], y1[rest]) - np.maximum(y0[i], y0[rest]), 0, None))
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-6)
+        order = rest[iou <= threshold]
+    return np.array(keep, dtype=np.intp)
+
+
+class ObjectDetector:
+    """MobileNet-SSD 目标检测引擎
+
+    预分配输入 blob(缩放、BGR->RGB、归一化直接写入)，可配置后端/目标/线程数，
+    可选 forwardAsync 流水线(结果滞后一次检测调用，result_frame 给出结果对应的那一帧)；类别过滤和NMS用NumPy向量化完成，
+    输出 DETECTION_DTYPE 结构化数组而不是直接画在叠加层上。
+    """
+    def __init__(self, net, dnn_config, input_size=300, mean=127.5, scale=0.007843):
+        """
+        Args:
+            net: cv2.dnn.Net
+            dnn_config: config.yaml 中的 dnn 配置
+        """
+        self.net = net
+        self.input_size = input_size
+        self.mean = mean
+        self.scale = scale
+        self.confidence = dnn_config['confidence']
+        self.nms_threshold = dnn_config['nms_threshold']
+        self.classes = np.array(dnn_config.get('classes') or [], dtype=np.int32)
+        self.async_infer = dnn_config['async_infer']
+
+        threads = dnn_config['threads']
+        if threads:
+            cv2.setNumThreads(threads)
+        self._configure(dnn_config['backend'], dnn_config['target'])
+
+        # 预分配的缩放缓冲、浮点缓冲和输入blob(异步时两块交替使用)
+        self._resized = {}
+        self._float = np.empty((input_size, input_size, 3), dtype=np.float32)
+        self._blobs = [np.empty((1, 3, input_size, input_size), dtype=np.float32) for _ in range(2)]
+        self._blob_index = 0
+        self._pending = None
+        self._pending_info = None
+        # 最近一次 detect 返回的结果所对应的 frame 参数
+        self.result_frame = None
+
+    def _configure(self, backend, target):
+        backend_value = getattr(cv2.dnn, DNN_BACKENDS.get(backend, ''), None)
+        target_value = getattr(cv2.dnn, DNN_TARGETS.get(target, ''), None)
+        if backend_value is None or target_value is None:
+            logger.error(f"[cv_dnn] 不支持的后端/目标: {backend}/{target}，使用默认值")
+            return
+        self.net.setPreferableBackend(backend_value)
+        self.net.setPreferableTarget(target_value)
+        logger.info(f"[cv_dnn] 后端: {backend} 目标: {target}")
+
+    def _prepare(self, img):
+        """把图像写入下一块预分配的输入blob"""
+        channels = img.shape[2]
+        resized = self._resized.get(channels)
+        if resized is None:
+            resized = np.empty((self.input_size, self.input_size, channels), dtype=np.uint8)
+            self._resized[channels] = resized
+        cv2.resize(img, (self.input_size, self.input_size), dst=resized)
+
+        # (rgb - mean) * scale，BGR->RGB 通过反转通道顺序完成，不做整帧 cvtColor
+        np.subtract(resized[..., :3], self.mean, out=self._float, casting='unsafe')
+        self._float *= self.scale
+        blob = self._blobs[self._blob_index]
+        self._blob_index ^= 1
+        np.copyto(blob[0], self._float.transpose(2, 0, 1)[::-1])
+        return blob
+
+    def _postprocess(self, output, width, height):
+        """向量化的置信度/类别过滤和NMS"""
+        rows = output.reshape(-1, 7)
+        class_ids = rows[:, 1].astype(np.int32)
+        scores = rows[:, 2]
+        keep = scores > self.confidence
+        if self.classes.size:
+            keep &= np.isin(class_ids, self.classes)
+        rows, class_ids, scores = rows[keep], class_ids[keep], scores[keep]
+
+        boxes = rows[:, 3:7] * np.array([width, height, width, height], dtype=np.float32)
+        keep = nms(boxes, scores, class_ids, self.nms_threshold)
+
+        detections = np.empty(len(keep), dtype=DETECTION_DTYPE)
+        detections['class_id'] = class_ids[keep]
+        detections['score'] = scores[keep]
+        detections['x0'], detections['y0'], detections['x1'], detections['y1'] = boxes[keep].T
+        return detections
+
+    def detect(self, img, frame=None):
+        """检测目标
+        Args:
+            img: BGR图像
+            frame: 与图像一同提交的数据(如灰度图)，随对应的结果放到 result_frame
+        Returns:
+            DETECTION_DTYPE 结构化数组；异步模式下返回上一次提交的结果，首次调用返回 None
+        """
+        height, width = img.shape[:2]
+        if self.async_infer:
+            return self._detect_async(img, width, height, frame)
+        self.net.setInput(self._prepare(img))
+        self.result_frame = frame
+        return self._postprocess(self.net.forward(), width, height)
+
+    def _detect_async(self, img, width, height, frame):
+        result = None
+        self.result_frame = None
+        if self._pending is not None:
+            pending_width, pending_height, self.result_frame = self._pending_info
+            result = self._postprocess(self._pending.get(), pending_width, pending_height)
+            self._pending = None
+        self.net.setInput(self._prepare(img))
+        try:
+            self._pending = self.net.forwardAsync()
+            self._pending_info = (width, height, frame)
+        except cv2.error as e:
+            # forwardAsync 只有部分后端支持，不支持时退回同步推理
+            logger.error(f"[cv_dnn] forwardAsync 不可用，改为同步推理: {e}")
+            self.async_infer = False
+            self.result_frame = frame
+            result = self._postprocess(self.net.forward(), width, height)
+        return result
@@ -0,0 +1,110 @@
+import cv2
+import logging
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+
+def box_iou(a, b):
+    """两个 (x, y, w, h) 框的交并比"""
+    ax0, ay0, aw, ah = a
+    bx0, by0, bw, bh = b
+    ix = max(0, min(ax0 + aw, bx0 + bw) - max(ax0, bx0))
+    iy = max(0, min(ay0 + ah, by0 + bh) - max(ay0, by0))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0
+
+
+class FaceSearch:
+    """多分辨率Haar人脸搜索
+
+    全帧扫描在缩小后的图像上进行(粗扫描)，之后只在上一次人脸周围的ROI中
+    以原分辨率做精扫描，并限制搜索尺度到上次人脸大小附近；
+    每隔 full_scan_interval 次或目标全部丢失时重新全帧扫描以发现新人脸。
+    """
+    def __init__(self, cascade, cv_config):
+        """
+        Args:
+            cascade: cv2.CascadeClassifier
+            cv_config: config.yaml 中的 cv 配置
+        """
+        self.cascade = cascade
+        self.scale_factor = cv_config['face_scale_factor']
+        self.min_neighbors = cv_config['face_min_neighbors']
+        self.min_size = cv_config['face_min_size']
+        self.coarse_width = cv_config['face_coarse_width']
+        self.full_scan_interval = cv_config['face_full_scan_interval']
+        self.roi_margin = cv_config['face_roi_margin']
+        self.roi_size_range = cv_config['face_roi_size_range']
+
+        self.faces = []
+        self.calls = 0
+        self.full_scans = 0
+
+    def reset(self):
+        self.faces = []
+        self.calls = 0
+
+    def detect(self, gray, hints=None):
+        """搜索人脸
+        Args:
+            gray: 灰度图
+            hints: 可选的人脸位置提示 [(x, y, w, h), ...]，例如跟踪器传播后的框；
+                为 None 时使用上一次的检测结果
+        Returns:
+            [(x, y, w, h), ...]
+        """
+        self.calls += 1
+        previous = list(hints) if hints is not None else self.faces
+
+        if not previous or self.calls % self.full_scan_interval == 0:
+            faces = self.full_scan(gray)
+        else:
+            faces = self.roi_scan(gray, previous)
+            if not faces:
+                faces = self.full_scan(gray)
+        self.faces = faces
+        return faces
+
+    def full_scan(self, gray):
+        """在缩小的整帧上粗扫描"""
+        self.full_scans += 1
+        height, width = gray.shape[:2]
+        scale = min(1.0, self.coarse_width / width)
+        if scale < 1.0:
+            small = cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        else:
+            small = gray
+        min_size = max(1, int(self.min_size * scale))
+        found = self.cascade.detectMultiScale(small,
+                                              scaleFactor=self.scale_factor,
+                                              minNeighbors=self.min_neighbors,
+                                              minSize=(min_size, min_size))
+        return [tuple(int(round(v / scale)) for v in face) for face in found]
+
+    def roi_scan(self, gray, previous):
+        """只在上一次人脸周围的ROI中精扫描"""
+        height, width = gray.shape[:2]
+        min_ratio, max_ratio = self.roi_size_range
+        faces = []
+        for (x, y, w, h) in previous:
+            x, y, w, h = int(x), int(y), int(w), int(h)
+            margin = int(max(w, h) * self.roi_margin)
+            x0, y0 = max(0, x - margin), max(0, y - margin)
+            x1, y1 = min(width, x + w + margin), min(height, y + h + margin)
+            if x1 - x0 < self.min_size or y1 - y0 < self.min_size:
+                continue
+            min_side = max(self.min_size, int(min(w, h) * min_ratio))
+            max_side = max(min_side + 1, int(max(w, h) * max_ratio))
+            found = self.cascade.detectMultiScale(gray[y0:y1, x0:x1],
+                                                  scaleFactor=self.scale_factor,
+                                                  minNeighbors=self.min_neighbors,
+                                                  minSize=(min_side, min_side),
+                                                  maxSize=(max_side, max_side))
+            for (fx, fy, fw, fh) in found:
+                face = (int(fx) + x0, int(fy) + y0, int(fw), int(fh))
+                # ROI 重叠时同一张脸可能被找到两次
+                if all(box_iou(face, other) < 0.3 for other in faces):
+                    faces.append(face)
+        return faces
@@ -0,0 +1,110 @@
+import cv2
+import numpy as np
+import logging
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+
+class LineTracker:
+    """带状区域巡线引擎
+
+    只对每条采样线上下 band_half 行的横条做 HSV 转换、inRange、腐蚀和膨胀
+    (band_half 不小于腐蚀+膨胀的迭代次数时，采样行的结果与整帧处理一致)，
+    支持任意条采样线并用最小二乘拟合线条斜率。采样线、采样圆和分辨率变化时
+    才重新计算各横条范围和采样圆的像素下标。
+    """
+    def __init__(self, lines, band_half, sampling_rad, morph_iterations=2):
+        """
+        Args:
+            lines: 采样线位置列表(画面高度的比例，0~1)
+            band_half: 横条半高(行)
+            sampling_rad: 画面中心采样圆半径(像素)
+            morph_iterations: 腐蚀/膨胀迭代次数
+        """
+        self.lines = sorted(lines)
+        self.band_half = max(band_half, 2 * morph_iterations)
+        self.sampling_rad = sampling_rad
+        self.morph_iterations = morph_iterations
+        self._geometry_key = None
+        self.rows = []
+        self.bands = []
+        self.disk = None
+        self.disk_rect = None
+
+    def set_lines(self, lines):
+        """设置采样线，下一帧重新计算横条"""
+        self.lines = sorted(lines)
+        self._geometry_key = None
+
+    def set_sampling_rad(self, sampling_rad):
+        self.sampling_rad = sampling_rad
+        self._geometry_key = None
+
+    def _prepare(self, height, width):
+        """按当前分辨率预计算横条范围和采样圆"""
+        key = (height, width, tuple(self.lines), self.sampling_rad)
+        if key == self._geometry_key:
+            return
+        self.rows = [min(height - 1, max(0, int(height * line))) for line in self.lines]
+        self.bands = [(max(0, row - self.band_half), min(height, row + self.band_half + 1)) for row in self.rows]
+
+        center_x, center_y = width // 2, height // 2
+        rad = max(1, self.sampling_rad)
+        x0, y0 = max(0, center_x - rad), max(0, center_y - rad)
+        x1, y1 = min(width, center_x + rad + 1), min(height, center_y + rad + 1)
+        disk = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        cv2.circle(disk, (center_x - x0, center_y - y0), rad, 255, thickness=-1)
+        self.disk = disk.astype(bool)
+        self.disk_rect = (x0, y0, x1, y1)
+        self._geometry_key = key
+
+    def sampling_hsv(self, img):
+        """画面中心采样圆内的 HSV 最小/最大值"""
+        x0, y0, x1, y1 = self.disk_rect
+        hsv = cv2.cvtColor(img[y0:y1, x0:x1], cv2.COLOR_BGR2HSV)
+        pixels = hsv[self.disk]
+        return pixels.min(axis=0), pixels.max(axis=0)
+
+    def process(self, img, lower, upper):
+        """检测各采样线上的线条
+        Args:
+            img: BGR图像
+            lower: 线条颜色 HSV 下限
+            upper: 线条颜色 HSV 上限
+        Returns:
+            dict:
+                rows: 各采样线所在行
+                hits: 各采样线的 (left, right, center)，未检测到为 None
+                slope: 最小二乘拟合的斜率(至少两条线命中时)，否则为 None
+                bands: [(r0, r1, mask), ...] 各横条的二值掩码，用于叠加显示
+        """
+        height, width = img.shape[:2]
+        self._prepare(height, width)
+
+        hits = []
+        bands = []
+        for row, (r0, r1) in zip(self.rows, self.bands):
+            hsv = cv2.cvtColor(img[r0:r1], cv2.COLOR_BGR2HSV)
+            mask = cv2.inRange(hsv, lower, upper)
+            mask = cv2.erode(mask, None, iterations=self.morph_iterations)
+            mask = cv2.dilate(mask, None, iterations=self.morph_iterations)
+            bands.append((r0, r1, mask))
+
+            index = np.flatnonzero(mask[row - r0])
+            if index.size:
+                left, right = int(index[0]), int(index[-1])
+                hits.append((left, right, int((left + right) / 2)))
+            else:
+                hits.append(None)
+
+        slope = None
+        found_rows = [row for row, hit in zip(self.rows, hits) if hit]
+        if len(found_rows) >= 2:
+            found_centers = [hit[2] for hit in hits if hit]
+            # x = a*y + b，上方采样线在右侧时斜率为正，与两点公式一致
+            a, _ = np.polyfit(np.array(found_rows, dtype=np.float64),
+                              np.array(found_centers, dtype=np.float64), 1)
+            slope = -float(a)
+
+        return {'rows': self.rows, 'hits': hits, 'slope': slope, 'bands': bands}
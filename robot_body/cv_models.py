@@ -0,0 +1,160 @@
+import gc
+import time
+import threading
+import logging
+
+import psutil
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+
+class ModelEntry:
+    """注册表中的单个模型"""
+    def __init__(self, name, loader, modes):
+        """
+        Args:
+            name: 模型名
+            loader: 无参数的构建函数，返回模型对象
+            modes: 使用该模型的模式码列表
+        """
+        self.name = name
+        self.loader = loader
+        self.modes = modes
+        self.model = None
+        self.lock = threading.Lock()
+        self.load_time = 0.0     # 最近一次加载耗时(秒)
+        self.rss = 0             # 加载前后进程常驻内存的差值(字节)，近似值
+        self.last_used = 0.0
+        self.loads = 0
+        self.error = None
+
+
+class ModelRegistry:
+    """按需加载的模型注册表
+
+    模型在所属模式第一次被选中时才构建(可在后台线程预热)，
+    空闲超过 idle_timeout 且不属于当前模式的模型会被卸载，
+    每个模型记录加载耗时和加载引起的常驻内存增量。
+    """
+    def __init__(self, models_config, codes):
+        """
+        Args:
+            models_config: config.yaml 中的 models 配置
+            codes: config.yaml 中的 code 配置，用于把模式名映射到模式码
+        """
+        self.idle_timeout = models_config['idle_timeout']
+        self.prewarm_on_select = models_config['prewarm_on_select']
+        self.preload_names = models_config.get('preload') or []
+        self.codes = codes
+        self.entries = {}
+        self._process = psutil.Process()
+
+    def register(self, name, loader, modes):
+        """注册模型
+        Args:
+            name: 模型名
+            loader: 无参数的构建函数
+            modes: 使用该模型的模式名列表(config.yaml code 中的键)
+        """
+        self.entries[name] = ModelEntry(name, loader, [self.codes[mode] for mode in modes])
+
+    def get(self, name):
+        """获取模型，未加载时在当前线程加载(预热中则等待预热完成)"""
+        entry = self.entries[name]
+        entry.last_used = time.time()
+        if entry.model is None:
+            self._load(entry)
+        return entry.model
+
+    def peek(self, name):
+        """已加载时返回模型，否则返回 None，不触发加载"""
+        return self.entries[name].model
+
+    def _load(self, entry):
+        with entry.lock:
+            if entry.model is not None:
+                return
+            rss_before = self._process.memory_info().rss
+            start_time = time.perf_counter()
+            try:
+                model = entry.loader()
+            except Exception as e:
+                entry.error = str(e)
+                logger.error(f"[cv_models] 加载 {entry.name} 失败: {e}")
+                raise
+            entry.load_time = time.perf_counter() - start_time
+            entry.rss = max(0, self._process.memory_info().rss - rss_before)
+            entry.model = model
+            entry.last_used = time.time()
+            entry.loads += 1
+            entry.error = None
+            logger.info(f"[cv_models] 加载 {entry.name}: {entry.load_time * 1000:.0f}ms, "
+                        f"RSS +{entry.rss / 1048576:.1f}MB")
+
+    def _prewarm(self, entry):
+        try:
+            self._load(entry)
+        except Exception:
+            pass
+
+    def prewarm(self, name):
+        """在后台线程加载模型"""
+        entry = self.entries[name]
+        if entry.model is None:
+            threading.Thread(target=self._prewarm, args=(entry,), daemon=True).start()
+
+    def preload(self):
+        """启动时预热配置中指定的模型"""
+        for name in self.preload_names:
+            if name in self.entries:
+                self.prewarm(name)
+
+    def select_mode(self, mode):
+        """模式切换时调用，按配置预热该模式使用的模型"""
+        now = time.time()
+        for name, entry in self.entries.items():
+            if mode in entry.modes:
+                entry.last_used = now
+                if self.prewarm_on_select:
+                    self.prewarm(name)
+
+    def unload(self, name):
+        """卸载模型，模型对象有 close() 时先关闭"""
+        entry = self.entries[name]
+        with entry.lock:
+            model = entry.model
+            if model is None:
+                return
+            entry.model = None
+        close = getattr(model, 'close', None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                logger.error(f"[cv_models] 关闭 {name} 失败: {e}")
+        del model
+        gc.collect()
+        logger.info(f"[cv_models] 卸载空闲模型 {name}")
+
+    def release_idle(self, active_mode, now=None):
+        """卸载空闲超时且不属于当前模式的模型"""
+        if self.idle_timeout <= 0:
+            return
+        now = time.time() if now is None else now
+        for name, entry in self.entries.items():
+            if (entry.model is not None and active_mode not in entry.modes
+                    and now - entry.last_used > self.idle_timeout):
+                self.unload(name)
+
+    def status(self):
+        """各模型的加载状态、加载耗时(ms)和内存增量(MB)"""
+        now = time.time()
+        return {name: {
+                    'loaded': entry.model is not None,
+                    'load_ms': round(entry.load_time * 1000, 1),
+                    'rss_mb': round(entry.rss / 1048576, 1),
+                    'idle_s': round(now - entry.last_used, 1) if entry.last_used else None,
+                    'loads': entry.loads,
+                    'error': entry.error,
+                } for name, entry in self.entries.items()}
@@ -0,0 +1,140 @@
+import cv2
+import numpy as np
+import logging
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def clip_rect(rect, width, height):
+    """将矩形裁剪到画面范围内
+    Args:
+        rect: (x0, y0, x1, y1) 画面坐标
+        width: 画面宽度
+        height: 画面高度
+    Returns:
+        裁剪后的 (x0, y0, x1, y1)，完全在画面外时返回 None
+    """
+    x0, y0, x1, y1 = rect
+    x0, y0 = max(0, x0), max(0, y0)
+    x1, y1 = min(width, x1), min(height, y1)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1, y1
+
+
+class OverlayPanel:
+    """缓存的叠加面板
+
+    文字块和圆点只在内容变化时渲染到一块小图块上(前景色 + 不透明度掩码,
+    可选一个半透明纯色背景)，每帧只把图块所在区域混合到画面中，
+    避免整帧拷贝、整帧 addWeighted 和逐行 putText。
+    """
+    def __init__(self, bg_rect=None, bg_color=(0, 0, 0), bg_alpha=0.5):
+        """
+        Args:
+            bg_rect: 半透明背景矩形 (x0, y0, x1, y1)，None 表示无背景
+            bg_color: 背景颜色(BGR)
+            bg_alpha: 背景不透明度(0~1)
+        """
+        self.bg_rect = bg_rect
+        self.bg_color = bg_color
+        self.bg_alpha = bg_alpha if bg_rect else 0
+        self.rect = None
+        self.render_count = 0
+        self._key = None
+        self._channels = None
+        self._fg = None
+        self._mask = None
+        self._bg = None
+
+    def invalidate(self):
+        """强制下一次 update 重新渲染"""
+        self._key = None
+
+    def update(self, key, items_func, channels=3):
+        """内容变化时重新渲染图块
+        Args:
+            key: 内容标识，与上次相同则跳过渲染
+            items_func: 返回 (texts, circles) 的函数，仅在需要渲染时调用
+                texts: [(text, (x, y), scale, color, thickness), ...]
+                circles: [((x, y), radius, color), ...]
+            channels: 画面通道数(3 或 4)
+        Returns:
+            是否重新渲染
+        """
+        if key == self._key and channels == self._channels:
+            return False
+        texts, circles = items_func()
+        self._render(texts, circles, channels)
+        self._key = key
+        self._channels = channels
+        self.render_count += 1
+        return True
+
+    def _render(self, texts, circles, channels):
+        boxes = []
+        if self.bg_rect:
+            boxes.append(self.bg_rect)
+        for text, (x, y), scale, color, thickness in texts:
+            (w, h), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+            boxes.append((x - thickness, y - h - thickness, x + w + thickness, y + baseline + thickness))
+        for (x, y), radius, color in circles:
+            boxes.append((x - radius - 1, y - radius - 1, x + radius + 2, y + radius + 2))
+
+        if not boxes:
+            self.rect = None
+            self._fg = self._mask = self._bg = None
+            return
+
+        x0 = min(box[0] for box in boxes)
+        y0 = min(box[1] for box in boxes)
+        x1 = max(box[2] for box in boxes)
+        y1 = max(box[3] for box in boxes)
+        self.rect = (x0, y0, x1, y1)
+
+        fg = np.zeros((y1 - y0, x1 - x0, channels), dtype=np.uint8)
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        for text, (x, y), scale, color, thickness in texts:
+            cv2.putText(fg, text, (x - x0, y - y0), FONT, scale, color, thickness)
+            cv2.putText(mask, text, (x - x0, y - y0), FONT, scale, 255, thickness)
+        for (x, y), radius, color in circles:
+            cv2.circle(fg, (x - x0, y - y0), radius, color, -1)
+            cv2.circle(mask, (x - x0, y - y0), radius, 255, -1)
+        self._fg = fg
+        self._mask = mask.astype(bool)[..., None]
+
+        if self.bg_rect:
+            bx0, by0, bx1, by1 = self.bg_rect
+            color = tuple(self.bg_color) + (0,) * (channels - len(self.bg_color))
+            self._bg = np.full((by1 - by0, bx1 - bx0, channels), color[:channels], dtype=np.uint8)
+        else:
+            self._bg = None
+
+    def composite(self, frame):
+        """把缓存的图块混合到画面上(原地修改)"""
+        if self.rect is None or self._fg is None:
+            return frame
+        if frame.ndim != 3 or frame.shape[2] != self._channels:
+            return frame
+        height, width = frame.shape[:2]
+
+        if self._bg is not None:
+            clipped = clip_rect(self.bg_rect, width, height)
+            if clipped:
+                cx0, cy0, cx1, cy1 = clipped
+                bx0, by0 = self.bg_rect[:2]
+                roi = frame[cy0:cy1, cx0:cx1]
+                bg = self._bg[cy0 - by0:cy1 - by0, cx0 - bx0:cx1 - bx0]
+                frame[cy0:cy1, cx0:cx1] = cv2.addWeighted(roi, 1 - self.bg_alpha, bg, self.bg_alpha, 0)
+
+        clipped = clip_rect(self.rect, width, height)
+        if clipped:
+            cx0, cy0, cx1, cy1 = clipped
+            x0, y0 = self.rect[:2]
+            np.copyto(frame[cy0:cy1, cx0:cx1],
+                      self._fg[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0],
+                      where=self._mask[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0])
+        return frame
@@ -0,0 +1,160 @@
+import time
+import logging
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+
+class ModeBudget:
+    """单个CV模式的调度状态"""
+    def __init__(self, name, target_hz, budget, min_scale, fixed_rate=False, analysis_stream=False):
+        """
+        Args:
+            name: 模式名(config.yaml code 中的键)
+            target_hz: 目标分析频率
+            budget: CPU预算，每秒允许占用的单核时间比例(0~1)
+            min_scale: 允许的最小输入缩放比例，1 表示不降分辨率
+            fixed_rate: 对延迟敏感的模式，每帧都分析且不参与降频降分辨率
+            analysis_stream: 是否使用低分辨率分析码流(阈值按主码流分辨率调好的模式保持 False)
+        """
+        self.name = name
+        self.fixed_rate = fixed_rate
+        self.analysis_stream = analysis_stream
+        self.target_hz = target_hz
+        self.budget = budget
+        self.min_scale = min_scale
+        self.rate = target_hz      # 当前允许的分析频率
+        self.scale = 1.0           # 当前输入缩放比例
+        self.cost = 0.0            # 单次分析耗时(秒)的滑动平均
+        self.last_run = 0.0
+        self.run_count = 0
+
+    def effective_hz(self):
+        """受CPU预算限制后的实际频率上限"""
+        if self.cost > 0:
+            return min(self.rate, self.budget / self.cost)
+        return self.rate
+
+
+class CvScheduler:
+    """CV模式自适应调度器
+
+    每个模式有目标频率和CPU预算。调度器测量每个模式的单次耗时，
+    采集帧率低于下限时先降低输入分辨率、再降低分析频率；
+    帧率有余量时按相反顺序恢复。
+    """
+    def __init__(self, sched_config, codes):
+        """
+        Args:
+            sched_config: config.yaml 中的 cv_sched 配置
+            codes: config.yaml 中的 code 配置，用于把模式名映射到模式码
+        """
+        self.fps_floor = sched_config['capture_fps_floor']
+        self.fps_headroom = sched_config['capture_fps_headroom']
+        self.rate_step = sched_config['rate_step']
+        self.min_rate = sched_config['min_rate']
+        self.scale_step = sched_config['scale_step']
+        self.cost_smoothing = sched_config['cost_smoothing']
+
+        self.modes = {}
+        for name, mode_config in sched_config['modes'].items():
+            self.modes[codes[name]] = ModeBudget(name,
+                                                 mode_config['hz'],
+                                                 mode_config['budget'],
+                                                 mode_config.get('min_scale', 1.0),
+                                                 mode_config.get('fixed_rate', False),
+                                                 mode_config.get('analysis_stream', False))
+
+        self.last_decision = None
+        self.analysis_fps = 0
+        self._fps_count = 0
+        self._fps_start_time = time.time()
+
+    def should_run(self, mode, now=None):
+        """判断当前帧是否需要提交分析"""
+        budget = self.modes.get(mode)
+        if budget is None or budget.fixed_rate:
+            return True
+        now = time.time() if now is None else now
+        hz = budget.effective_hz()
+        if hz <= 0 or now - budget.last_run < 1.0 / hz:
+            return False
+        budget.last_run = now
+        return True
+
+    def scale(self, mode):
+        """当前模式的输入缩放比例"""
+        budget = self.modes.get(mode)
+        return budget.scale if budget else 1.0
+
+    def analysis_stream(self, mode):
+        """当前模式是否使用分析码流"""
+        budget = self.modes.get(mode)
+        return budget.analysis_stream if budget else False
+
+    def record(self, mode, cost):
+        """记录一次分析的耗时
+        Args:
+            mode: 模式码
+            cost: 耗时(秒)
+        """
+        self._fps_count += 1
+        now = time.time()
+        if now - self._fps_start_time >= 2:
+            self.analysis_fps = self._fps_count / (now - self._fps_start_time)
+            self._fps_count = 0
+            self._fps_start_time = now
+
+        budget = self.modes.get(mode)
+        if budget is None:
+            return
+        budget.run_count += 1
+        if budget.cost == 0:
+            budget.cost = cost
+        else:
+            budget.cost += self.cost_smoothing * (cost - budget.cost)
+
+    def adjust(self, mode, capture_fps):
+        """根据采集帧率调整当前模式的频率和分辨率
+        Args:
+            mode: 当前模式码
+            capture_fps: 最近统计的采集帧率
+        Returns:
+            调整说明字符串，无调整时返回 None
+        """
+        budget = self.modes.get(mode)
+        if budget is None or budget.run_count == 0 or budget.fixed_rate:
+            return None
+
+        decision = None
+        if capture_fps < self.fps_floor:
+            if budget.scale > budget.min_scale:
+                budget.scale = max(budget.min_scale, round(budget.scale - self.scale_step, 2))
+                decision = f"{budget.name}: fps {capture_fps} < {self.fps_floor}, scale -> {budget.scale}"
+            elif budget.rate > self.min_rate:
+                budget.rate = max(self.min_rate, round(budget.rate * self.rate_step, 2))
+                decision = f"{budget.name}: fps {capture_fps} < {self.fps_floor}, rate -> {budget.rate}Hz"
+        elif capture_fps > self.fps_headroom:
+            if budget.rate < budget.target_hz:
+                budget.rate = min(budget.target_hz, round(budget.rate / self.rate_step, 2))
+                decision = f"{budget.name}: fps {capture_fps} > {self.fps_headroom}, rate -> {budget.rate}Hz"
+            elif budget.scale < 1.0:
+                budget.scale = min(1.0, round(budget.scale + self.scale_step, 2))
+                decision = f"{budget.name}: fps {capture_fps} > {self.fps_headroom}, scale -> {budget.scale}"
+
+        if decision:
+            logger.info(f"[cv_sched] {decision}")
+            self.last_decision = decision
+        return decision
+
+    def status(self, mode):
+        """当前模式的调度状态，用于 websocket 反馈"""
+        budget = self.modes.get(mode)
+        if budget is None:
+            return {'rate': 0, 'scale': 1.0, 'cost': 0, 'fps': round(self.analysis_fps, 1)}
+        return {
+            'rate': round(budget.effective_hz(), 1),
+            'scale': budget.scale,
+            'cost': round(budget.cost * 1000, 1),
+            'fps': round(self.analysis_fps, 1),
+        }
@@ -0,0 +1,250 @@
+import cv2
+import numpy as np
+import time
+import logging
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+# 光流参数
+LK_PARAMS = dict(winSize=(15, 15), maxLevel=2,
+                 criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+
+class Track:
+    """单个目标的跟踪状态: 检测框 + 光流特征点 + 卡尔曼滤波平滑中心"""
+    def __init__(self, box, label, process_noise, measurement_noise):
+        """
+        Args:
+            box: (x, y, w, h)
+            label: 目标标签(可为 None)
+            process_noise: 卡尔曼过程噪声
+            measurement_noise: 卡尔曼测量噪声
+        """
+        self.box = np.array(box, dtype=np.float32)
+        self.label = label
+        self.score = 1.0
+        self.points = None
+        self.seed_count = 0
+        self.confidence = 1.0
+
+        self.kalman = cv2.KalmanFilter(4, 2)
+        self.kalman.transitionMatrix = np.array([[1, 0, 1, 0],
+                                                 [0, 1, 0, 1],
+                                                 [0, 0, 1, 0],
+                                                 [0, 0, 0, 1]], dtype=np.float32)
+        self.kalman.measurementMatrix = np.array([[1, 0, 0, 0],
+                                                  [0, 1, 0, 0]], dtype=np.float32)
+        self.kalman.processNoiseCov = np.eye(4, dtype=np.float32) * process_noise
+        self.kalman.measurementNoiseCov = np.eye(2, dtype=np.float32) * measurement_noise
+        self.kalman.errorCovPost = np.eye(4, dtype=np.float32)
+        cx, cy = self.center()
+        self.kalman.statePost = np.array([[cx], [cy], [0], [0]], dtype=np.float32)
+
+    def center(self):
+        """检测框中心"""
+        x, y, w, h = self.box
+        return x + w / 2, y + h / 2
+
+    def smoothed_center(self):
+        """卡尔曼滤波后的中心"""
+        return float(self.kalman.statePost[0, 0]), float(self.kalman.statePost[1, 0])
+
+    def area(self):
+        return float(self.box[2] * self.box[3])
+
+    def int_box(self):
+        """整数形式的 (x, y, w, h)"""
+        return tuple(int(v) for v in self.box)
+
+    def correct(self):
+        """用当前检测框中心修正卡尔曼滤波"""
+        self.kalman.predict()
+        cx, cy = self.center()
+        self.kalman.correct(np.array([[cx], [cy]], dtype=np.float32))
+
+    def seed(self, gray, max_points):
+        """在检测框内选取光流特征点"""
+        x, y, w, h = self.int_box()
+        height, width = gray.shape[:2]
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(width, x + w), min(height, y + h)
+        self.points = None
+        self.seed_count = 0
+        if x1 - x0 < 4 or y1 - y0 < 4:
+            return
+        points = cv2.goodFeaturesToTrack(gray[y0:y1, x0:x1], maxCorners=max_points,
+                                         qualityLevel=0.01, minDistance=4)
+        if points is None:
+            return
+        points += np.array([x0, y0], dtype=np.float32)
+        self.points = points.astype(np.float32)
+        self.seed_count = len(points)
+
+
+class DetectTracker:
+    """检测-跟踪调度
+
+    每隔 detect_interval 次调用(或跟踪置信度下降、目标丢失)才运行一次昂贵的检测器，
+    其余调用用金字塔光流在上一帧和当前帧之间传播检测框，
+    并用卡尔曼滤波平滑目标中心供云台跟踪使用。
+    """
+    def __init__(self, detect_interval, min_confidence, max_points, process_noise, measurement_noise):
+        self.detect_interval = detect_interval
+        self.min_confidence = min_confidence
+        self.max_points = max_points
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+
+        self.tracks = []
+        self.prev_gray = None
+        self.frames_since_detection = 0
+
+        # 检测频率和跟踪频率分别统计
+        self.detect_fps = 0
+        self.track_fps = 0
+        self._detect_count = 0
+        self._track_count = 0
+        self._stats_start_time = time.time()
+
+    def reset(self):
+        """清除所有跟踪目标"""
+        self.tracks = []
+        self.prev_gray = None
+        self.frames_since_detection = 0
+
+    def needs_detection(self, gray):
+        """判断本次调用是否需要运行检测器"""
+        if self.detect_interval <= 1:
+            return True
+        if not self.tracks or self.prev_gray is None:
+            return True
+        if self.prev_gray.shape != gray.shape:
+            return True
+        if self.frames_since_detection >= self.detect_interval - 1:
+            return True
+        return any(track.confidence < self.min_confidence for track in self.tracks)
+
+    def update_detections(self, gray, boxes, labels=None, scores=None):
+        """用检测结果重建跟踪目标
+        Args:
+            gray: 当前灰度图，每帧都检测时可为 None(不选取光流特征点)
+            boxes: [(x, y, w, h), ...]
+            labels: 与 boxes 对应的标签列表
+            scores: 与 boxes 对应的检测置信度列表
+        """
+        if labels is None:
+            labels = [None] * len(boxes)
+        if scores is None:
+            scores = [1.0] * len(boxes)
+
+        # 按中心距离把新检测框匹配到已有目标，保留卡尔曼状态
+        old_tracks = list(self.tracks)
+        tracks = []
+        for box, label, score in zip(boxes, labels, scores):
+            x, y, w, h = box
+            cx, cy = x + w / 2, y + h / 2
+            match = None
+            for track in old_tracks:
+                tx, ty = track.center()
+                if track.label == label and abs(tx - cx) < w / 2 and abs(ty - cy) < h / 2:
+                    match = track
+                    break
+            if match is not None:
+                old_tracks.remove(match)
+                match.box = np.array(box, dtype=np.float32)
+                match.confidence = 1.0
+                match.correct()
+                track = match
+            else:
+                track = Track(box, label, self.process_noise, self.measurement_noise)
+            track.score = score
+            if gray is not None:
+                track.seed(gray, self.max_points)
+            tracks.append(track)
+
+        self.tracks = tracks
+        self.prev_gray = gray
+        self.frames_since_detection = 0
+        self._count(detect=True)
+        return self.tracks
+
+    def track(self, gray):
+        """用光流把目标从上一帧传播到当前帧"""
+        self.frames_since_detection += 1
+        tracked = [track for track in self.tracks if track.points is not None]
+        for track in self.tracks:
+            if track.points is None:
+                track.confidence = 0
+
+        if tracked:
+            prev_points = np.concatenate([track.points for track in tracked])
+            next_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, prev_points, None, **LK_PARAMS)
+            status = status.reshape(-1).astype(bool)
+
+            start = 0
+            for track in tracked:
+                end = start + len(track.points)
+                good = status[start:end]
+                old = track.points[good].reshape(-1, 2)
+                new = next_points[start:end][good].reshape(-1, 2)
+                start = end
+
+                if len(new) < 3:
+                    track.points = None
+                    track.confidence = 0
+                    continue
+                shift = np.median(new - old, axis=0)
+                track.box[0] += shift[0]
+                track.box[1] += shift[1]
+                track.points = new.reshape(-1, 1, 2)
+                track.confidence = len(new) / max(1, track.seed_count)
+                track.correct()
+
+        self.prev_gray = gray
+        self._count(detect=False)
+        return self.tracks
+
+    def active(self):
+        """仍在跟踪中的目标"""
+        return [track for track in self.tracks if track.confidence > 0]
+
+    def primary(self):
+        """面积最大的跟踪目标"""
+        tracks = self.active()
+        if not tracks:
+            return None
+        return max(tracks, key=Track.area)
+
+    def _count(self, detect):
+        if detect:
+            self._detect_count += 1
+        else:
+            self._track_count += 1
+        now = time.time()
+        if now - self._stats_start_time >= 2:
+            elapsed = now - self._stats_start_time
+            self.detect_fps = self._detect_count / elapsed
+            self.track_fps = self._track_count / elapsed
+            self._detect_count = 0
+            self._track_count = 0
+            self._stats_start_time = now
+
+    def status(self):
+        """检测/跟踪频率，用于 websocket 反馈"""
+        return {'detect_fps': round(self.detect_fps, 1), 'track_fps': round(self.track_fps, 1)}
+
+
+def build_trackers(track_config, codes):
+    """根据 config.yaml 的 cv_track 配置为每个模式创建跟踪器
+    Returns:
+        {模式码: DetectTracker}
+    """
+    trackers = {}
+    for name, mode_config in track_config['modes'].items():
+        trackers[codes[name]] = DetectTracker(mode_config['detect_interval'],
+                                              track_config['min_confidence'],
+                                              track_config['max_points'],
+                                              track_config['kalman_process_noise'],
+                                              track_config['kalman_measurement_noise'])
+    return trackers
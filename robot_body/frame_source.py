@@ -0,0 +1,639 @@
+import cv2
+import time
+import threading
+import subprocess
+import logging
+import numpy as np
+from collections import deque
+
+from lazy_import import timed_import
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+# 像素格式统一按内存中的字节顺序命名(与 OpenCV 一致)，BGR888 即 OpenCV 的 BGR。
+# Picamera2(libcamera/DRM)的格式名按小端字序命名，与内存顺序相反，
+# 例如 Picamera2 的 RGB888 在内存中是 B,G,R，XRGB8888 是 B,G,R,X
+PICAMERA2_FORMATS = {
+    'BGR888': 'RGB888',
+    'RGB888': 'BGR888',
+    'BGRA8888': 'XRGB8888',
+    'RGBA8888': 'XBGR8888',
+    'YUV420': 'YUV420',
+}
+
+# 转换到 OpenCV BGR 的 cvtColor 代码
+BGR_CONVERSIONS = {
+    'BGRA8888': cv2.COLOR_BGRA2BGR,
+    'RGB888': cv2.COLOR_RGB2BGR,
+    'RGBA8888': cv2.COLOR_RGBA2BGR,
+    'YUV420': cv2.COLOR_YUV2BGR_I420,
+}
+GRAY_CONVERSIONS = {
+    'BGR888': cv2.COLOR_BGR2GRAY,
+    'BGRA8888': cv2.COLOR_BGRA2GRAY,
+    'RGB888': cv2.COLOR_RGB2GRAY,
+    'RGBA8888': cv2.COLOR_RGBA2GRAY,
+}
+
+
+def to_bgr(image, pixel_format, copy=False):
+    """转换为 OpenCV BGR 图像，只做一次转换
+    Args:
+        image: 图像数组
+        pixel_format: image 的像素格式
+        copy: 已经是 BGR 时是否复制(否则直接返回原数组)
+    """
+    if pixel_format == 'BGR888':
+        return image.copy() if copy else image
+    return cv2.cvtColor(image, BGR_CONVERSIONS[pixel_format])
+
+
+def center_crop(image, zoom, size=None):
+    """以画面中心裁剪 1/zoom 的区域
+    Args:
+        image: 图像数组(每像素连续存储的格式)
+        zoom: 变焦倍数，>= 1
+        size: 裁剪后缩放到的 (宽, 高)，None 表示不缩放
+    """
+    height, width = image.shape[:2]
+    crop_width, crop_height = int(round(width / zoom)), int(round(height / zoom))
+    x_start = (width - crop_width) // 2
+    y_start = (height - crop_height) // 2
+    cropped = image[y_start:y_start + crop_height, x_start:x_start + crop_width]
+    if size is None:
+        return cropped
+    return cv2.resize(cropped, size, interpolation=cv2.INTER_LINEAR)
+
+
+def to_gray(image, pixel_format):
+    """转换为灰度图，YUV420 直接返回 Y 平面的视图，不复制"""
+    if pixel_format == 'YUV420':
+        return image[:image.shape[0] * 2 // 3]
+    return cv2.cvtColor(image, GRAY_CONVERSIONS[pixel_format])
+
+
+class Frame:
+    """一帧图像及其采集信息"""
+    def __init__(self, image, seq, timestamp, pixel_format, sensor_timestamp=None,
+                 analysis=None, analysis_format=None, zoom=1.0):
+        """
+        Args:
+            image: 主码流图像数组
+            seq: 帧序号，从 1 开始递增
+            timestamp: 采集时刻，time.monotonic() 时钟(秒)
+            pixel_format: 内存中的像素格式，如 'BGR888'、'BGRA8888'
+            sensor_timestamp: 摄像头提供的原始时间戳(如有)
+            analysis: 同一时刻的低分辨率分析码流图像(如有)
+            analysis_format: 分析码流的像素格式
+            zoom: 这一帧的变焦倍数，画面是全视场中心 1/zoom 的区域
+        """
+        self.image = image
+        self.seq = seq
+        self.timestamp = timestamp
+        self.pixel_format = pixel_format
+        self.sensor_timestamp = sensor_timestamp
+        self.analysis = analysis
+        self.analysis_format = analysis_format
+        self.zoom = zoom
+
+    def bgr(self, copy=False):
+        """主码流的 BGR 图像"""
+        return to_bgr(self.image, self.pixel_format, copy)
+
+    def analysis_bgr(self):
+        """分析码流的 BGR 图像，没有分析码流时返回 None"""
+        if self.analysis is None:
+            return None
+        return to_bgr(self.analysis, self.analysis_format)
+
+
+class FrameSource:
+    """图像源基类
+
+    子类实现 open/grab/close。start() 后由采集线程不断调用 grab()，
+    把帧放入有界环形缓冲；read() 返回比指定序号新的最新一帧，
+    消费者处理慢时旧帧直接被覆盖，不会阻塞采集。
+
+    数字变焦在采集端完成：子类能在设备上裁剪时实现 _apply_zoom()，
+    否则在采集线程中裁剪并缩放回输出尺寸，之后的分析、叠加、录像和编码都只处理变焦后的画面。
+    """
+    name = 'none'
+
+    def __init__(self, width, height, fps=30, ring_size=4):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.pixel_format = 'BGR888'
+        # 设备端生成的低分辨率分析码流，不支持时为 None
+        self.analysis_size = None
+        self.analysis_format = None
+        self.ring = deque(maxlen=ring_size)
+        self.seq = 0
+        self.dropped = 0
+        self._last_read_seq = 0
+        self.capture_fps = 0
+        self.zoom = 1.0
+        self.device_zoom = False
+        self.running = False
+        self._cond = threading.Condition()
+        self._thread = None
+        self._fps_count = 0
+        self._fps_start_time = time.time()
+
+    def open(self):
+        """打开设备，失败时抛出异常"""
+        raise NotImplementedError
+
+    def grab(self):
+        """阻塞读取一帧
+        Returns:
+            (image, sensor_timestamp) 或 (image, sensor_timestamp, analysis)，读取失败返回 None
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def _apply_zoom(self, zoom):
+        """在设备上设置变焦裁剪
+        Returns:
+            设备不支持时返回 False，由采集线程裁剪
+        """
+        return False
+
+    def frame_zoom(self):
+        """最新一帧实际生效的变焦倍数，设备能回报裁剪区域时子类覆盖"""
+        return self.zoom
+
+    def set_zoom(self, zoom):
+        """以画面中心为基准的数字变焦
+        Args:
+            zoom: 变焦倍数，小于 1 时按 1 处理
+        """
+        zoom = max(1.0, float(zoom))
+        if zoom == self.zoom:
+            return
+        try:
+            self.device_zoom = self._apply_zoom(zoom)
+        except Exception as e:
+            logger.error(f"[frame_source] {self.name} 设备变焦失败: {e}")
+            self.device_zoom = False
+        self.zoom = zoom
+        logger.info(f"[frame_source] {self.name} 变焦 x{zoom} ({'设备' if self.device_zoom else '主机'}裁剪)")
+
+    def capture_still(self):
+        """拍摄一张与视频流分辨率无关的照片
+        Returns:
+            BGR 图像，图像源不支持时返回 None
+        """
+        return None
+
+    def start(self):
+        self.open()
+        self.running = True
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+        logger.info(f"[frame_source] {self.name}: {self.width}x{self.height} {self.pixel_format}")
+        return self
+
+    def stop(self):
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self.close()
+
+    def _capture_loop(self):
+        while self.running:
+            try:
+                result = self.grab()
+            except Exception as e:
+                logger.error(f"[frame_source] {self.name} 读取失败: {e}")
+                time.sleep(0.5)
+                continue
+            if result is None:
+                continue
+            self._push(*result)
+
+    def _push(self, image, sensor_timestamp=None, analysis=None):
+        zoom = self.frame_zoom()
+        if zoom > 1 and not self.device_zoom:
+            image = center_crop(image, zoom, (image.shape[1], image.shape[0]))
+            if analysis is not None:
+                analysis = center_crop(analysis, zoom, (analysis.shape[1], analysis.shape[0]))
+        with self._cond:
+            if len(self.ring) == self.ring.maxlen:
+                # 被覆盖的帧如果没有被读取过，计为丢帧
+                if self.ring[0].seq > self._last_read_seq:
+                    self.dropped += 1
+            self.seq += 1
+            self.ring.append(Frame(image, self.seq, time.monotonic(), self.pixel_format, sensor_timestamp,
+                                   analysis, self.analysis_format, zoom))
+            self._cond.notify_all()
+
+        self._fps_count += 1
+        now = time.time()
+        if now - self._fps_start_time >= 2:
+            self.capture_fps = round(self._fps_count / (now - self._fps_start_time), 1)
+            self._fps_count = 0
+            self._fps_start_time = now
+
+    def read(self, after_seq=0, timeout=1.0):
+        """返回序号大于 after_seq 的最新一帧，超时返回 None"""
+        with self._cond:
+            self._cond.wait_for(lambda: (self.ring and self.ring[-1].seq > after_seq) or not self.running,
+                                timeout)
+            if self.ring and self.ring[-1].seq > after_seq:
+                frame = self.ring[-1]
+                self._last_read_seq = max(self._last_read_seq, frame.seq)
+                return frame
+        return None
+
+    def recent(self, count=None):
+        """环形缓冲中最近的若干帧，旧的在前"""
+        with self._cond:
+            frames = list(self.ring)
+        return frames if count is None else frames[-count:]
+
+    def status(self):
+        return {
+            'source': self.name,
+            'pixel_format': self.pixel_format,
+            'width': self.width,
+            'height': self.height,
+            'analysis_size': self.analysis_size,
+            'zoom': self.zoom,
+            'device_zoom': self.device_zoom,
+            'fps': self.capture_fps,
+            'seq': self.seq,
+            'dropped': self.dropped,
+        }
+
+
+class V4L2Source(FrameSource):
+    """USB/V4L2 摄像头(cv2.VideoCapture)"""
+    name = 'usb'
+
+    def __init__(self, width, height, fps=30, ring_size=4, device=0):
+        super().__init__(width, height, fps, ring_size)
+        self.device = device
+        self.camera = None
+
+    def open(self):
+        self.camera = cv2.VideoCapture(self.device)
+        if not self.camera.isOpened():
+            raise RuntimeError(f"无法打开摄像头 {self.device}")
+        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.camera.set(cv2.CAP_PROP_FPS, self.fps)
+
+    def grab(self):
+        success, image = self.camera.read()
+        if not success:
+            # 读取失败时重新打开设备
+            self.camera.release()
+            time.sleep(1)
+            self.camera = cv2.VideoCapture(self.device)
+            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            return None
+        return image, None
+
+    def close(self):
+        if self.camera is not None:
+            self.camera.release()
+
+
+class Picamera2Source(FrameSource):
+    """CSI 摄像头(Picamera2)
+
+    主码流直接以请求的像素格式输出(默认 BGR888，每像素3字节，
+    比 XRGB8888 少 25% 的内存带宽，且不需要再转换)，
+    可选同时输出低分辨率 YUV420 的 lores 码流作为分析码流。
+    """
+    name = 'csi'
+
+    def __init__(self, width, height, fps=30, ring_size=4, pixel_format='BGR888', analysis_size=None,
+                 still_size=None):
+        """
+        Args:
+            pixel_format: 主码流内存像素格式，见 PICAMERA2_FORMATS
+            analysis_size: lores 码流的 (宽, 高)，None 表示不启用；宽度取 64 的倍数时没有行填充
+            still_size: capture_still 的照片 (宽, 高)，None 表示不支持
+        """
+        super().__init__(width, height, fps, ring_size)
+        if pixel_format not in PICAMERA2_FORMATS or pixel_format == 'YUV420':
+            raise ValueError(f"不支持的主码流像素格式: {pixel_format}")
+        self.pixel_format = pixel_format
+        self.camera_format = PICAMERA2_FORMATS[pixel_format]
+        if analysis_size:
+            self.analysis_size = tuple(analysis_size)
+            self.analysis_format = 'YUV420'
+        self.still_size = tuple(still_size) if still_size else None
+        self.picam2 = None
+        # 拍照时要切换传感器模式，期间采集线程不能取帧
+        self._camera_lock = threading.Lock()
+        # 不变焦时的 ScalerCrop(传感器坐标)，以及最新一帧元数据中的 ScalerCrop 对应的变焦倍数
+        self._base_crop = None
+        self._reported_zoom = 1.0
+
+    def open(self):
+        picamera2 = timed_import('picamera2')
+        self.picam2 = picamera2.Picamera2()
+        streams = {'main': {"format": self.camera_format, "size": (self.width, self.height)}}
+        if self.analysis_size:
+            streams['lores'] = {"format": "YUV420", "size": self.analysis_size}
+        self.picam2.configure(self.picam2.create_video_configuration(
+            controls={"FrameRate": self.fps}, **streams))
+        self.picam2.start()
+
+    def grab(self):
+        with self._camera_lock:
+            request = self.picam2.capture_request()
+        try:
+            image = request.make_array('main')
+            analysis = request.make_array('lores') if self.analysis_size else None
+            metadata = request.get_metadata()
+        finally:
+            request.release()
+        crop = metadata.get('ScalerCrop')
+        if crop:
+            if self._base_crop is None:
+                self._base_crop = tuple(crop)
+            self._reported_zoom = self._base_crop[2] / crop[2]
+        return image, metadata.get('SensorTimestamp'), analysis
+
+    def _apply_zoom(self, zoom):
+        """设置传感器裁剪区域 ScalerCrop，ISP 从裁剪区域缩放输出，放大画面保持原生分辨率"""
+        if self._base_crop is None:
+            return False
+        x, y, width, height = self._base_crop
+        crop_width, crop_height = int(width / zoom), int(height / zoom)
+        self.picam2.set_controls({"ScalerCrop": (x + (width - crop_width) // 2, y + (height - crop_height) // 2,
+                                                 crop_width, crop_height)})
+        return True
+
+    def frame_zoom(self):
+        # 裁剪控制几帧后才生效，以每帧元数据为准
+        if not self.device_zoom:
+            return self.zoom
+        return self._reported_zoom
+
+    def capture_still(self):
+        if not self.still_size:
+            return None
+        config = self.picam2.create_still_configuration(
+            main={"format": self.camera_format, "size": self.still_size})
+        with self._camera_lock:
+            image = self.picam2.switch_mode_and_capture_array(config, 'main')
+        return to_bgr(image, self.pixel_format)
+
+    def close(self):
+        if self.picam2 is not None:
+            self.picam2.stop()
+            self.picam2.close()
+
+
+class DepthAISource(FrameSource):
+    """OAK 摄像头(DepthAI)
+
+    主码流和分析码流都由设备上的 ImageManip 从 720p 视频缩放得到，
+    主机端不再做整帧 resize；两路帧按设备序号配对。
+    变焦时通过运行时 ImageManipConfig 在设备上裁剪(setCropRect)。
+    """
+    name = 'oak'
+
+    def __init__(self, width, height, fps=30, ring_size=4, analysis_size=None):
+        super().__init__(width, height, fps, ring_size)
+        if analysis_size:
+            self.analysis_size = tuple(analysis_size)
+            self.analysis_format = 'BGR888'
+        self.device = None
+        self.output_queue = None
+        self.analysis_queue = None
+        # 流名 -> (ImageManip 配置输入队列, 输出尺寸)
+        self.config_queues = {}
+
+    def _create_manip(self, pipeline, dai, source, size, stream_name):
+        """设备端缩放到 size 并输出 BGR 平面格式"""
+        manip = pipeline.createImageManip()
+        manip.initialConfig.setResize(size[0], size[1])
+        manip.initialConfig.setKeepAspectRatio(False)
+        manip.initialConfig.setFrameType(dai.ImgFrame.Type.BGR888p)
+        manip.setMaxOutputFrameSize(size[0] * size[1] * 3)
+        source.link(manip.inputImage)
+
+        xout = pipeline.createXLinkOut()
+        xout.setStreamName(stream_name)
+        manip.out.link(xout.input)
+
+        config_in = pipeline.createXLinkIn()
+        config_in.setStreamName(stream_name + "_config")
+        config_in.out.link(manip.inputConfig)
+
+    def open(self):
+        dai = timed_import('depthai')
+        pipeline = dai.Pipeline()
+
+        cam_rgb = pipeline.createColorCamera()
+        cam_rgb.setBoardSocket(dai.CameraBoardSocket.RGB)
+        cam_rgb.setInterleaved(False)
+        cam_rgb.setResolution(dai.ColorCameraProperties.SensorResolution.THE_720_P)
+        cam_rgb.setFps(self.fps)
+
+        self._create_manip(pipeline, dai, cam_rgb.video, (self.width, self.height), "video")
+        if self.analysis_size:
+            self._create_manip(pipeline, dai, cam_rgb.video, self.analysis_size, "analysis")
+
+        self.device = dai.Device(pipeline)
+        self.output_queue = self.device.getOutputQueue(name="video", maxSize=8, blocking=False)
+        self.config_queues = {"video": (self.device.getInputQueue("video_config"), (self.width, self.height))}
+        if self.analysis_size:
+            self.analysis_queue = self.device.getOutputQueue(name="analysis", maxSize=8, blocking=False)
+            self.config_queues["analysis"] = (self.device.getInputQueue("analysis_config"), self.analysis_size)
+
+    def _match_analysis(self, seq, timeout=0.05):
+        """取与主码流序号相同(或更新)的分析帧，超时返回 None"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            packet = self.analysis_queue.tryGet()
+            if packet is None:
+                time.sleep(0.002)
+            elif packet.getSequenceNum() >= seq:
+                return packet.getCvFrame()
+        return None
+
+    def grab(self):
+        packet = self.output_queue.get()
+        image = packet.getCvFrame()
+        analysis = None
+        if self.analysis_queue is not None:
+            analysis = self._match_analysis(packet.getSequenceNum())
+        # getTimestamp 与主机 steady clock 同步
+        return image, packet.getTimestamp().total_seconds(), analysis
+
+    def _apply_zoom(self, zoom):
+        if not self.config_queues:
+            return False
+        dai = timed_import('depthai')
+        margin = (1 - 1 / zoom) / 2
+        for config_queue, size in self.config_queues.values():
+            config = dai.ImageManipConfig()
+            config.setCropRect(margin, margin, 1 - margin, 1 - margin)
+            config.setResize(size[0], size[1])
+            config.setKeepAspectRatio(False)
+            config.setFrameType(dai.ImgFrame.Type.BGR888p)
+            config_queue.send(config)
+        return True
+
+    def close(self):
+        if self.device is not None:
+            self.device.close()
+
+
+class VideoFileSource(FrameSource):
+    """视频文件，按文件帧率节拍播放并循环"""
+    name = 'file'
+
+    def __init__(self, width, height, fps=30, ring_size=4, path='', loop=True):
+        super().__init__(width, height, fps, ring_size)
+        self.path = path
+        self.loop = loop
+        self.capture = None
+        self._next_time = 0
+
+    def open(self):
+        self.capture = cv2.VideoCapture(self.path)
+        if not self.capture.isOpened():
+            raise RuntimeError(f"无法打开视频文件: {self.path}")
+        file_fps = self.capture.get(cv2.CAP_PROP_FPS)
+        if file_fps and file_fps > 0:
+            self.fps = file_fps
+        self._next_time = time.monotonic()
+
+    def grab(self):
+        success, image = self.capture.read()
+        if not success:
+            if not self.loop:
+                self.running = False
+                return None
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            return None
+        position = self.capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if image.shape[1] != self.width or image.shape[0] != self.height:
+            image = cv2.resize(image, (self.width, self.height))
+
+        self._next_time += 1.0 / self.fps
+        delay = self._next_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            self._next_time = time.monotonic()
+        return image, position
+
+    def close(self):
+        if self.capture is not None:
+            self.capture.release()
+
+
+class SyntheticSource(FrameSource):
+    """合成测试图案：渐变背景、移动的蓝色圆、摆动的黄色线和帧计数，
+    用于在没有摄像头的机器上运行和测试整条处理流水线"""
+    name = 'synthetic'
+
+    def __init__(self, width, height, fps=30, ring_size=4):
+        super().__init__(width, height, fps, ring_size)
+        self.background = None
+        self.frame_index = 0
+        self._next_time = 0
+
+    def open(self):
+        gradient = np.linspace(40, 200, self.width, dtype=np.float32)
+        self.background = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self.background[:] = gradient[None, :, None].astype(np.uint8)
+        self._next_time = time.monotonic()
+
+    def grab(self):
+        self._next_time += 1.0 / self.fps
+        delay = self._next_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            self._next_time = time.monotonic()
+
+        t = self.frame_index / self.fps
+        self.frame_index += 1
+        image = self.background.copy()
+        # 黄色线(巡线颜色)在画面下半部左右摆动
+        line_x = int(self.width / 2 + self.width / 6 * np.sin(t * 0.5))
+        cv2.line(image, (line_x, self.height // 2), (self.width // 2, self.height), (0, 220, 255), 24)
+        # 蓝色圆(默认跟踪颜色)沿椭圆移动
+        center = (int(self.width / 2 + self.width / 4 * np.cos(t)),
+                  int(self.height / 2 + self.height / 4 * np.sin(t)))
+        cv2.circle(image, center, self.height // 12, (255, 160, 0), -1)
+        cv2.putText(image, f"{self.frame_index}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        return image, t
+
+
+def usb_camera_detection():
+    """检测USB摄像头是否连接"""
+    try:
+        lsusb_output = subprocess.check_output(["lsusb"]).decode("utf-8")
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    if "Camera" in lsusb_output:
+        print("USB Camera connected")
+        return True
+    print("USB Camera not connected")
+    return False
+
+
+def open_frame_source(video_config):
+    """按配置创建并启动图像源
+    Args:
+        video_config: config.yaml 中的 video 配置，source 为
+            auto(按 usb -> csi -> oak 顺序探测)、usb、csi、oak、file 或 synthetic
+    Returns:
+        已启动的 FrameSource，没有可用的图像源时返回 None
+    """
+    width, height = video_config['default_res_w'], video_config['default_res_h']
+    fps = video_config['source_fps']
+    ring_size = video_config['source_ring']
+    source = video_config['source']
+    analysis_size = video_config.get('analysis_size') or None
+    still_size = video_config.get('still_size') or None
+
+    candidates = []
+    if source == 'auto':
+        if usb_camera_detection():
+            candidates.append(lambda: V4L2Source(width, height, fps, ring_size))
+        candidates.append(lambda: Picamera2Source(width, height, fps, ring_size, analysis_size=analysis_size,
+                                                         still_size=still_size))
+        candidates.append(lambda: DepthAISource(width, height, fps, ring_size, analysis_size))
+    elif source == 'usb':
+        candidates.append(lambda: V4L2Source(width, height, fps, ring_size))
+    elif source == 'csi':
+        candidates.append(lambda: Picamera2Source(width, height, fps, ring_size, analysis_size=analysis_size,
+                                                         still_size=still_size))
+    elif source == 'oak':
+        candidates.append(lambda: DepthAISource(width, height, fps, ring_size, analysis_size))
+    elif source == 'file':
+        candidates.append(lambda: VideoFileSource(width, height, fps, ring_size, video_config['source_file']))
+    elif source == 'synthetic':
+        candidates.append(lambda: SyntheticSource(width, height, fps, ring_size))
+    else:
+        logger.error(f"[frame_source] 未知的图像源: {source}")
+
+    for create in candidates:
+        frame_source = create()
+        try:
+            return frame_source.start()
+        except Exception as e:
+            logger.info(f"[frame_source] {frame_source.name} 不可用: {e}")
+            try:
+                frame_source.close()
+            except Exception:
+                pass
+    return None
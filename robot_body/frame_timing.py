@@ -0,0 +1,130 @@
+import io
+import time
+import pstats
+import cProfile
+import threading
+import logging
+from collections import deque
+from contextlib import contextmanager
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+# 画面流水线各阶段，按处理顺序
+STAGES = ('capture', 'analysis', 'composite', 'osd', 'record', 'encode', 'write', 'total', 'glass')
+
+
+class FrameTiming:
+    """画面流水线分阶段耗时统计
+
+    每个阶段保留最近 window 个耗时样本，按需计算 p50/p95/max。
+    capture 为采集到 frame_process 取到帧的等待，total 为采集到编码完成，
+    write 为一次网络写入的耗时，glass 为采集到写入 socket 完成。
+    profile() 打开后，对接下来 profile_calls 次 cv_process 分析调用采样 cProfile，
+    结果按模式保存，用于定位具体检测器的性能退化。
+    """
+    def __init__(self, timing_config):
+        """
+        Args:
+            timing_config: config.yaml 中的 timing 配置
+        """
+        self.window = timing_config['window']
+        self.profile_calls = timing_config['profile_calls']
+        self.profile_top = timing_config['profile_top']
+        self.osd = timing_config['osd']
+        self.samples = {stage: deque(maxlen=self.window) for stage in STAGES}
+        self.last_seq = 0
+        self.last_timestamp = None
+        # 模式名 -> cProfile 文本报告
+        self.profiles = {}
+
+        self._lock = threading.Lock()
+        self._profiler = None
+        self._profile_mode = None
+        self._profile_remaining = 0
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def lap(self, stage, start):
+        """记录 start(perf_counter)到现在的耗时，返回现在的时刻作为下一阶段的起点"""
+        now = time.perf_counter()
+        self.record(stage, now - start)
+        return now
+
+    def frame(self, seq, timestamp):
+        """记录 frame_process 取到的帧"""
+        self.last_seq = seq
+        self.last_timestamp = timestamp
+        self.record('capture', time.monotonic() - timestamp)
+
+    def summary(self):
+        """各阶段 {p50, p95, max, count}，单位 ms"""
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self.samples.items()}
+        result = {}
+        for stage, values in samples.items():
+            if not values:
+                continue
+            result[stage] = {
+                'p50': round(values[len(values) // 2] * 1000, 2),
+                'p95': round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 2),
+                'max': round(values[-1] * 1000, 2),
+                'count': len(values),
+            }
+        return result
+
+    def osd_lines(self):
+        """OSD 上显示的文字行"""
+        return [f"{stage:<9} {value['p50']:>6.1f} {value['p95']:>6.1f} {value['max']:>6.1f}"
+                for stage, value in self.summary().items()]
+
+    def profile(self, mode_name, calls=None):
+        """对 mode_name 模式接下来的若干次分析调用采样 cProfile
+        Args:
+            mode_name: 模式名(config.yaml code 中的键)
+            calls: 采样次数，None 使用配置值，0 表示停止
+        """
+        with self._lock:
+            self._profile_mode = mode_name
+            self._profile_remaining = self.profile_calls if calls is None else calls
+            if not self._profile_remaining:
+                self._profiler = None
+            elif self._profiler is None:
+                self._profiler = cProfile.Profile()
+        logger.info(f"[frame_timing] cProfile 采样 {mode_name}: {self._profile_remaining} 次")
+
+    @contextmanager
+    def profiled(self, mode_name):
+        """在 profile() 打开且模式相同时，用 cProfile 包住 with 块"""
+        profiler = self._profiler
+        if profiler is None or mode_name != self._profile_mode:
+            yield
+            return
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self._lock:
+                self._profile_remaining -= 1
+                finished = self._profile_remaining <= 0
+                if finished:
+                    self._profiler = None
+            if finished:
+                self._finish_profile(mode_name, profiler)
+
+    def _finish_profile(self, mode_name, profiler):
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(self.profile_top)
+        self.profiles[mode_name] = output.getvalue()
+        logger.info(f"[frame_timing] {mode_name} cProfile:\n{self.profiles[mode_name]}")
+
+    def status(self):
+        return {
+            'seq': self.last_seq,
+            'stages': self.summary(),
+            'profiling': self._profile_mode if self._profiler is not None else None,
+            'profiles': list(self.profiles),
+        }
@@ -0,0 +1,47 @@
+import time
+import importlib
+import threading
+import logging
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+# 模块名到导入耗时(秒)，按导入顺序记录
+IMPORT_TIMES = {}
+_import_lock = threading.Lock()
+
+
+def timed_import(name):
+    """导入模块并记录耗时
+    Args:
+        name: 模块名，如 'picamera2' 或 'picamera2.encoders'
+    """
+    with _import_lock:
+        if name in IMPORT_TIMES:
+            return importlib.import_module(name)
+        start_time = time.perf_counter()
+        module = importlib.import_module(name)
+        IMPORT_TIMES[name] = time.perf_counter() - start_time
+    logger.info(f"[lazy_import] {name}: {IMPORT_TIMES[name] * 1000:.0f}ms")
+    return module
+
+
+class LazyModule:
+    """第一次访问属性时才导入的模块代理"""
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = timed_import(self._name)
+        return getattr(self._module, attr)
+
+    def loaded(self):
+        return self._module is not None
+
+
+def import_report():
+    """各模块导入耗时(ms)，耗时长的在前"""
+    return {name: round(seconds * 1000, 1)
+            for name, seconds in sorted(IMPORT_TIMES.items(), key=lambda item: item[1], reverse=True)}
@@ -0,0 +1,152 @@
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+import threading
+from collections import Counter
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """非阻塞的队列日志处理器
+
+    调用线程只把日志记录放入有界队列，消息格式化和文件写入在 QueueListener 线程中进行；
+    队列满时丢弃并计数，不阻塞画面处理或串口线程。
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # 记录只在本进程内传递，不需要像默认实现那样提前格式化消息
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# 已安装的 (QueueListener, DroppingQueueHandler)
+_listeners = []
+
+
+def install_queue_logging(logger_names, queue_size=10000):
+    """把指定 logger 的处理器移到后台线程
+    处理器组合相同的 logger 共用一个队列和监听线程。
+    Args:
+        logger_names: logger 名列表，'' 表示 root
+        queue_size: 每个队列的最大记录数
+    """
+    groups = {}
+    for name in logger_names:
+        target = logging.getLogger(name)
+        handlers = tuple(target.handlers)
+        if not handlers or any(isinstance(handler, logging.handlers.QueueHandler) for handler in handlers):
+            continue
+        groups.setdefault(handlers, []).append(target)
+
+    for handlers, targets in groups.items():
+        log_queue = queue.Queue(maxsize=queue_size)
+        queue_handler = DroppingQueueHandler(log_queue)
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _listeners.append((listener, queue_handler))
+        for target in targets:
+            for handler in handlers:
+                target.removeHandler(handler)
+            target.addHandler(queue_handler)
+
+    if groups:
+        # 退出时把队列中剩余的日志写完
+        atexit.unregister(stop_queue_logging)
+        atexit.register(stop_queue_logging)
+
+
+def stop_queue_logging():
+    while _listeners:
+        listener, queue_handler = _listeners.pop()
+        listener.stop()
+
+
+def queue_logging_status():
+    return [{'queued': queue_handler.queue.qsize(), 'dropped': queue_handler.dropped}
+            for listener, queue_handler in _listeners]
+
+
+class HotPathLog:
+    """热路径日志
+
+    每帧或每条指令都会执行的代码不再逐次写日志：count() 只累加计数，
+    每 summary_interval 秒汇总输出一行；every() 对同一条消息限频，
+    sample() 每 N 次输出一次。消息使用 % 格式参数，只有真正输出时才格式化。
+    passthrough 为 True 时恢复逐次输出(用于对比测试)。
+    """
+    def __init__(self, target_logger, summary_interval=60.0):
+        """
+        Args:
+            target_logger: 输出用的 logger
+            summary_interval: 计数汇总的输出间隔(秒)，0 表示不输出
+        """
+        self.logger = target_logger
+        self.summary_interval = summary_interval
+        self.passthrough = False
+        self.counters = Counter()
+        self._window = Counter()
+        self._last_emit = {}
+        self._suppressed = Counter()
+        self._samples = Counter()
+        self._summary_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        """累加调用计数"""
+        self.counters[name] += 1
+        self._window[name] += 1
+        if self.passthrough:
+            self.logger.info(name)
+        if self.summary_interval and time.monotonic() - self._summary_time >= self.summary_interval:
+            self._emit_summary()
+
+    def every(self, interval, level, msg, *args):
+        """同一条消息(按 msg 模板区分)每 interval 秒最多输出一次，期间被抑制的次数附在下一次输出后"""
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        if not self.passthrough and now - self._last_emit.get(msg, -interval) < interval:
+            self._suppressed[msg] += 1
+            return
+        self._last_emit[msg] = now
+        suppressed = self._suppressed.pop(msg, 0)
+        if suppressed:
+            self.logger.log(level, msg + " (+%d)", *args, suppressed)
+        else:
+            self.logger.log(level, msg, *args)
+
+    def sample(self, n, level, msg, *args):
+        """同一条消息每 n 次输出一次"""
+        if not self.logger.isEnabledFor(level):
+            return
+        self._samples[msg] += 1
+        if self.passthrough or n <= 1 or self._samples[msg] % n == 1:
+            self.logger.log(level, msg, *args)
+
+    def _emit_summary(self):
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._summary_time
+            if elapsed < self.summary_interval:
+                return
+            window, self._window = self._window, Counter()
+            self._summary_time = now
+        if window:
+            self.logger.info("[hot_path] %.0fs: %s", elapsed,
+                             ', '.join(f'{name}={count}' for name, count in window.most_common()))
+
+
+# body logger 的热路径日志，cv_ctrl 和 base_ctrl 共用一份计数汇总
+hot_log = HotPathLog(logger)
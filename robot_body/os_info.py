@@ -42,6 +42,10 @@ class SystemInfo(threading.Thread):
         self.pictures_size = self.get_folder_size(self.this_path + '/templates/pictures')
         self.videos_size = self.get_folder_size(self.this_path + '/templates/videos')
 
+    def add_pictures_size(self, size_bytes):
+        """拍照或删除照片后增量更新，不重新遍历目录"""
+        self.pictures_size = max(0, round(self.pictures_size + size_bytes / (1024 * 1024), 2))
+
     def update_folder(self, input_path):
         self.this_path = input_path
         threading.Thread(target=self.update_folder_size, daemon=True).start()
@@ -5,7 +5,6 @@ import random  # 用于随机选择音频文件
 import threading  # 用于多线程操作
 import time  # 用于时间相关操作
 import yaml  # 用于读取配置文件
-import pyttsx3  # 用于文字转语音
 
 # 标记USB音频设备连接状态
 usb_connected = False
@@ -34,9 +33,20 @@ except:
 play_audio_event = threading.Event()
 min_time_bewteen_play = config['audio_config']['min_time_bewteen_play']
 
-# 初始化文字转语音引擎
-engine = pyttsx3.init()
-engine.setProperty('rate', config['audio_config']['speed_rate'])
+# 文字转语音引擎在第一次播报时才导入和初始化
+engine = None
+engine_lock = threading.Lock()
+
+
+def get_engine():
+	"""获取文字转语音引擎，首次调用时初始化"""
+	global engine
+	with engine_lock:
+		if engine is None:
+			import pyttsx3  # 用于文字转语音
+			engine = pyttsx3.init()
+			engine.setProperty('rate', config['audio_config']['speed_rate'])
+	return engine
 
 
 def play_audio(input_audio_file):
@@ -118,8 +128,9 @@ def play_speech(input_text):
 	"""播放文字转语音"""
 	if not usb_connected:
 		return
-	engine.say(input_text)
-	engine.runAndWait()
+	tts_engine = get_engine()
+	tts_engine.say(input_text)
+	tts_engine.runAndWait()
 	play_audio_event.clear()
 
 
@@ -0,0 +1,262 @@
+import os
+import cv2
+import time
+import queue
+import datetime
+import threading
+import logging
+from collections import deque
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+
+class PhotoGallery:
+    """照片目录索引
+
+    启动时扫描一次目录，之后由拍照和删除增量维护，获取照片列表时不再每次 listdir + stat。
+    """
+    def __init__(self, photo_path):
+        self.photo_path = photo_path
+        self.total_bytes = 0
+        self._entries = {}  # 文件名 -> (修改时间, 字节数)
+        self._lock = threading.Lock()
+        self.rescan()
+
+    def rescan(self):
+        entries = {}
+        try:
+            with os.scandir(self.photo_path) as dir_entries:
+                for entry in dir_entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        entries[entry.name] = (stat.st_mtime, stat.st_size)
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self._entries = entries
+            self.total_bytes = sum(size for _, size in entries.values())
+
+    def add(self, filename, size):
+        with self._lock:
+            old_entry = self._entries.get(filename)
+            if old_entry is not None:
+                self.total_bytes -= old_entry[1]
+            self._entries[filename] = (time.time(), size)
+            self.total_bytes += size
+
+    def remove(self, filename):
+        """移出索引
+        Returns:
+            该文件的字节数，不在索引中时为 0
+        """
+        with self._lock:
+            entry = self._entries.pop(filename, None)
+            if entry is None:
+                return 0
+            self.total_bytes -= entry[1]
+            return entry[1]
+
+    def names(self):
+        """文件名列表，新的在前"""
+        with self._lock:
+            items = list(self._entries.items())
+        return [name for name, _ in sorted(items, key=lambda item: item[1][0], reverse=True)]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SnapshotWriter:
+    """后台拍照
+
+    frame_process 每帧调用 push()，只有存在拍照请求时才取走画面的引用
+    (snapshot.source 为 stream 时取视频流已编码的 JPEG)，JPEG 编码和写文件在 I/O 线程中完成。
+    连拍按采集时间戳间隔取帧；需要补光时先开灯，等 flash_settle 秒之后的帧才取用，调用线程不等待。
+    full_res 照片由 I/O 线程通过图像源单独拍摄，与视频流分辨率和缩放无关。
+    """
+    def __init__(self, snapshot_config, photo_path, frame_source=None, lights=None):
+        """
+        Args:
+            snapshot_config: config.yaml 中的 snapshot 配置
+            photo_path: 照片保存目录(以 / 结尾)
+            frame_source: 图像源，拍摄 full_res 照片时使用
+            lights: 补光灯控制函数，参数为 True/False
+        """
+        self.photo_path = photo_path
+        self.quality = snapshot_config['quality']
+        self.source = snapshot_config['source']
+        self.flash_settle = snapshot_config['flash_settle']
+        self.frame_source = frame_source
+        self.lights = lights
+        self.gallery = PhotoGallery(photo_path)
+        # 每写入一张照片回调 on_saved(文件名, 字节数)
+        self.on_saved = None
+
+        self.requests = deque()
+        self.queue = queue.Queue(maxsize=snapshot_config['queue_size'])
+        self.saved = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def capture(self, count=1, interval=0.0, full_res=False, flash=False):
+        """请求拍照，立即返回
+        Args:
+            count: 连拍张数
+            interval: 连拍间隔(秒)
+            full_res: 通过图像源拍摄高分辨率照片(不带叠加层)
+            flash: 拍照时打开补光灯
+        """
+        request = {
+            'name': datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
+            'count': max(1, int(count)),
+            'interval': max(0.0, float(interval)),
+            'flash': flash,
+            'flash_on': False,
+            'taken': 0,
+            'next_time': time.monotonic(),
+        }
+        logger.info(f"[snapshot] 拍照请求: {request['count']} 张, 间隔 {request['interval']}s, full_res={full_res}")
+        if full_res:
+            self._enqueue(('still', request))
+        else:
+            with self._lock:
+                self.requests.append(request)
+
+    def pending(self):
+        return bool(self.requests)
+
+    def push(self, frame, image, encoded=None):
+        """每帧调用，没有拍照请求时直接返回
+        Args:
+            frame: 当前采集帧，提供采集时间戳
+            image: 带叠加层的 BGR 画面，之后不能再被修改
+            encoded: 视频流中同一帧的 JPEG 数据
+        Returns:
+            是否取用了这一帧
+        """
+        if not self.requests:
+            return False
+        with self._lock:
+            if not self.requests:
+                return False
+            request = self.requests[0]
+            if request['flash'] and not request['flash_on']:
+                self._set_lights(True)
+                request['flash_on'] = True
+                request['next_time'] = time.monotonic() + self.flash_settle
+                return False
+            if frame.timestamp < request['next_time']:
+                return False
+
+            data = encoded if self.source == 'stream' and encoded is not None else image
+            filename = self._filename(request)
+            request['taken'] += 1
+            request['next_time'] = frame.timestamp + request['interval']
+            if request['taken'] >= request['count']:
+                self.requests.popleft()
+                if request['flash']:
+                    self._set_lights(False)
+        self._enqueue(('frame', filename, data))
+        return True
+
+    def cancel(self):
+        """取消未完成的拍照请求"""
+        with self._lock:
+            if any(request['flash_on'] for request in self.requests):
+                self._set_lights(False)
+            self.requests.clear()
+
+    def _filename(self, request):
+        if request['count'] == 1:
+            return f"photo_{request['name']}.jpg"
+        return f"photo_{request['name']}_{request['taken'] + 1:02d}.jpg"
+
+    def _set_lights(self, on):
+        if self.lights is not None:
+            try:
+                self.lights(on)
+            except Exception as e:
+                logger.error(f"[snapshot] 补光控制失败: {e}")
+
+    def _enqueue(self, job):
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("[snapshot] 写入队列已满，丢弃照片")
+
+    def _save(self, filename, data):
+        if isinstance(data, bytes):
+            payload = data
+        else:
+            ret, buffer = cv2.imencode('.jpg', data, [int(cv2.IMWRITE_JPEG_QUALITY), self.quality])
+            if not ret:
+                raise RuntimeError("JPEG 编码失败")
+            payload = buffer.tobytes()
+
+        # 同一秒内的多次拍照不覆盖已有文件
+        path = os.path.join(self.photo_path, filename)
+        stem, ext = os.path.splitext(path)
+        suffix = 1
+        while os.path.exists(path):
+            path = f'{stem}_{suffix}{ext}'
+            suffix += 1
+        with open(path, 'wb') as photo_file:
+            photo_file.write(payload)
+
+        filename = os.path.basename(path)
+        self.gallery.add(filename, len(payload))
+        self.saved += 1
+        logger.info(f"[snapshot] 保存照片: {filename} ({len(payload) // 1024}KB)")
+        if self.on_saved is not None:
+            self.on_saved(filename, len(payload))
+
+    def _capture_still(self, request):
+        if self.frame_source is None:
+            logger.error("[snapshot] 没有可用的图像源")
+            return
+        if request['flash']:
+            self._set_lights(True)
+            time.sleep(self.flash_settle)
+        try:
+            for index in range(request['count']):
+                if index:
+                    time.sleep(request['interval'])
+                image = self.frame_source.capture_still()
+                if image is None:
+                    # 图像源不支持单独拍照时使用最新的原始采集帧
+                    frame = self.frame_source.read(0)
+                    if frame is None:
+                        logger.error("[snapshot] 读取图像失败")
+                        return
+                    image = frame.bgr()
+                self._save(self._filename(request), image)
+                request['taken'] += 1
+        finally:
+            if request['flash']:
+                self._set_lights(False)
+
+    def _write_loop(self):
+        while True:
+            job = self.queue.get()
+            try:
+                if job[0] == 'still':
+                    self._capture_still(job[1])
+                else:
+                    self._save(job[1], job[2])
+            except Exception as e:
+                logger.error(f"[snapshot] 保存照片失败: {e}")
+
+    def status(self):
+        return {
+            'pending': len(self.requests),
+            'queued': self.queue.qsize(),
+            'saved': self.saved,
+            'dropped': self.dropped,
+            'photos': len(self.gallery),
+            'bytes': self.gallery.total_bytes,
+        }
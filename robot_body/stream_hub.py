@@ -0,0 +1,275 @@
+import cv2
+import time
+import threading
+import logging
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+
+class StreamFrame:
+    """发布给各路视频流的一帧"""
+    __slots__ = ('seq', 'timestamp', 'image', 'encoded', 'quality')
+
+    def __init__(self, seq, timestamp, image, encoded, quality):
+        """
+        Args:
+            seq: 发布序号，从 1 开始递增
+            timestamp: 采集时刻，time.monotonic() 时钟
+            image: 叠加后的 BGR 画面，None 表示只有 encoded(如摄像头读取失败的提示画面)
+            encoded: 按 quality 编码的 JPEG 数据
+            quality: encoded 的 JPEG 质量
+        """
+        self.seq = seq
+        self.timestamp = timestamp
+        self.image = image
+        self.encoded = encoded
+        self.quality = quality
+
+
+class StreamHub:
+    """MJPEG 视频流分发
+
+    一个生产线程调用 produce()(即 frame_process)生成画面，所有客户端共享同一路处理结果，
+    画面处理的节拍不再由某个客户端的发送速度决定。有客户端(attach 的任何消费者，
+    如 MJPEG 会话或 WebRTC 视频轨道)时生产线程才运行。每个 MJPEG 客户端一个 StreamSession，
+    只取最新一帧(来不及发送的帧直接丢弃，不排队)，按发送耗时在 levels 档位间调整
+    JPEG 质量、分辨率和帧率；同一帧同一档位的编码结果在客户端之间共享。
+    """
+    def __init__(self, stream_config, produce, keep_alive=None, timing=None):
+        """
+        Args:
+            stream_config: config.yaml 中的 stream 配置
+            produce: 生成一帧的函数，返回 (BGR 画面或 None, JPEG 数据, JPEG 质量, 采集时刻)
+            keep_alive: 没有客户端时是否仍继续生成画面(如正在录像)的判断函数
+            timing: FrameTiming，记录网络写入耗时和采集到写入完成的延迟
+        """
+        self.config = stream_config
+        self.levels = [tuple(level) for level in stream_config['levels']]
+        self.produce = produce
+        self.keep_alive = keep_alive
+        self.timing = timing
+        self.sessions = []
+        self.latest = None
+        self.encodes = 0
+        self.shared = 0
+
+        self._seq = 0
+        self._cond = threading.Condition()
+        # 只缓存最新一帧的各档位编码: (质量, 缩放) -> [锁, JPEG]
+        self._cache_seq = 0
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        self._thread = None
+
+    def attach(self, consumer):
+        """登记一个消费者，consumer 需提供 name 和 status()"""
+        with self._cond:
+            self.sessions.append(consumer)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._produce_loop, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        logger.info(f"[stream_hub] 新的视频流客户端: {consumer.name}, 共 {len(self.sessions)} 个")
+
+    def detach(self, consumer):
+        with self._cond:
+            if consumer not in self.sessions:
+                return
+            self.sessions.remove(consumer)
+            self._cond.notify_all()
+        logger.info(f"[stream_hub] 视频流客户端断开: {consumer.name}, 剩余 {len(self.sessions)} 个")
+
+    def open_session(self, name=''):
+        session = StreamSession(self, name)
+        self.attach(session)
+        return session
+
+    def publish(self, image, encoded, quality, timestamp=None):
+        with self._cond:
+            self._seq += 1
+            self.latest = StreamFrame(self._seq, timestamp or time.monotonic(), image, encoded, quality)
+            self._cond.notify_all()
+
+    def wait(self, after_seq, timeout=1.0):
+        """返回序号大于 after_seq 的最新一帧，超时返回 None"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.latest is not None and self.latest.seq > after_seq, timeout)
+            if self.latest is not None and self.latest.seq > after_seq:
+                return self.latest
+        return None
+
+    def _active(self):
+        return bool(self.sessions) or (self.keep_alive is not None and self.keep_alive())
+
+    def _produce_loop(self):
+        while True:
+            with self._cond:
+                if not self._active():
+                    self._cond.wait(timeout=1.0)
+                    continue
+            try:
+                image, encoded, quality, timestamp = self.produce()
+            except Exception as e:
+                logger.error(f"[stream_hub] 生成画面失败: {e}")
+                time.sleep(0.1)
+                continue
+            if encoded is not None:
+                self.publish(image, encoded, quality, timestamp)
+
+    def encoded(self, stream_frame, quality, scale):
+        """取 stream_frame 在指定档位下的 JPEG，最新一帧的编码结果在客户端之间共享
+        Args:
+            stream_frame: StreamFrame
+            quality: JPEG 质量，0 或不低于原始质量时使用原始编码
+            scale: 分辨率缩放比例
+        """
+        if stream_frame.image is None:
+            return stream_frame.encoded
+        if quality <= 0 or quality >= stream_frame.quality:
+            quality = stream_frame.quality
+            if scale >= 1:
+                return stream_frame.encoded
+
+        key = (quality, scale)
+        with self._cache_lock:
+            if stream_frame.seq > self._cache_seq:
+                self._cache_seq = stream_frame.seq
+                self._cache = {}
+            if stream_frame.seq == self._cache_seq:
+                entry = self._cache.setdefault(key, [threading.Lock(), None])
+            else:
+                # 落后的客户端拿到的旧帧不进入缓存
+                entry = [threading.Lock(), None]
+        with entry[0]:
+            if entry[1] is None:
+                image = stream_frame.image
+                if scale < 1:
+                    height, width = image.shape[:2]
+                    image = cv2.resize(image, (int(width * scale), int(height * scale)),
+                                       interpolation=cv2.INTER_AREA)
+                ret, buffer = cv2.imencode('.jpg', image, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+                entry[1] = buffer.tobytes() if ret else stream_frame.encoded
+                self.encodes += 1
+            else:
+                self.shared += 1
+        return entry[1]
+
+    def status(self):
+        return {
+            'seq': self._seq,
+            'encodes': self.encodes,
+            'shared': self.shared,
+            'sessions': [session.status() for session in list(self.sessions)],
+        }
+
+
+class StreamSession:
+    """一个 MJPEG 客户端
+
+    生成器 frames() 每次 yield 后由 Web 服务器把数据写入 socket，
+    写入阻塞的时间即为发送耗时。发送耗时占帧间隔的比例超过 down_ratio 时降一档，
+    持续 up_time 秒低于 up_ratio 时升一档，两次调整至少间隔 hold_time 秒。
+    """
+    def __init__(self, hub, name=''):
+        self.hub = hub
+        self.name = name or f'mjpeg-{id(self) & 0xffff:04x}'
+        self.level = 0
+        self.closed = False
+        self.sent = 0
+        self.skipped = 0
+        self.bytes_sent = 0
+
+        self.send_ratio = 0.0
+        self.throughput = 0.0
+        self.bitrate = 0.0
+        # 采集到发送完成(写入 socket)的延迟
+        self.latency = 0.0
+        self._last_sent = 0.0
+        self._last_change = time.monotonic()
+        self._low_since = None
+
+    def frames(self):
+        """按本客户端的档位生成 JPEG 数据，只发送最新的帧"""
+        last_seq = 0
+        try:
+            while not self.closed:
+                stream_frame = self.hub.wait(last_seq)
+                if stream_frame is None:
+                    continue
+                if last_seq:
+                    self.skipped += stream_frame.seq - last_seq - 1
+                last_seq = stream_frame.seq
+
+                quality, scale, max_fps = self.hub.levels[self.level]
+                now = time.monotonic()
+                # 留 10% 余量，避免采集帧率等于上限时因抖动隔帧发送
+                if now - self._last_sent < 0.9 / max_fps:
+                    continue
+                frame_interval = max(1 / max_fps, now - self._last_sent)
+                data = self.hub.encoded(stream_frame, quality, scale)
+                self._last_sent = now
+
+                send_start = time.monotonic()
+                yield data
+                send_end = time.monotonic()
+                self.latency += 0.2 * (send_end - stream_frame.timestamp - self.latency)
+                if self.hub.timing is not None:
+                    self.hub.timing.record('write', send_end - send_start)
+                    self.hub.timing.record('glass', send_end - stream_frame.timestamp)
+                self._record(len(data), send_end - send_start, frame_interval)
+        finally:
+            self.close()
+
+    def _record(self, size, send_time, frame_interval):
+        self.sent += 1
+        self.bytes_sent += size
+        self.send_ratio += 0.2 * (send_time / frame_interval - self.send_ratio)
+        self.bitrate += 0.2 * (size / frame_interval - self.bitrate)
+        if send_time > 0:
+            self.throughput += 0.2 * (size / send_time - self.throughput)
+
+        config = self.hub.config
+        now = time.monotonic()
+        if now - self._last_change < config['hold_time']:
+            return
+        if self.send_ratio > config['down_ratio'] and self.level < len(self.hub.levels) - 1:
+            self._set_level(self.level + 1, now)
+        elif self.send_ratio < config['up_ratio'] and self.level > 0:
+            if self._low_since is None:
+                self._low_since = now
+            elif now - self._low_since >= config['up_time']:
+                self._set_level(self.level - 1, now)
+        else:
+            self._low_since = None
+
+    def _set_level(self, level, now):
+        logger.info(f"[stream_hub] {self.name}: 档位 {self.level} -> {level} {self.hub.levels[level]}, "
+                    f"发送占比 {self.send_ratio:.2f}")
+        self.level = level
+        self._last_change = now
+        self._low_since = None
+        # 新档位的帧间隔不同，重新估计
+        self.send_ratio = 0.0
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.hub.detach(self)
+
+    def status(self):
+        quality, scale, max_fps = self.hub.levels[self.level]
+        return {
+            'name': self.name,
+            'type': 'mjpeg',
+            'level': self.level,
+            'quality': quality,
+            'scale': scale,
+            'max_fps': max_fps,
+            'sent': self.sent,
+            'skipped': self.skipped,
+            'send_ratio': round(self.send_ratio, 2),
+            'throughput_kbps': round(self.throughput * 8 / 1000, 1),
+            'bitrate_kbps': round(self.bitrate * 8 / 1000, 1),
+            'latency_ms': round(self.latency * 1000, 1),
+        }
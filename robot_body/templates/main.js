@@ -1,33 +1,91 @@
-// Create a new RTCPeerConnection instance
-let pc = new RTCPeerConnection();
+// WebRTC video: open the page with ?webrtc=1 to replace the MJPEG <img> with a
+// WebRTC <video>. The browser sends the offer and the server answers with a
+// video track fed from the same frame pipeline as /video_feed.
+let pc = null;
 
-// Function to send an offer request to the server
-async function createOffer() {
-    console.log("Sending offer request");
-
-    // Fetch the offer from the server
-    const offerResponse = await fetch("/offer", {
-        method: "POST",
-        headers: {
-            "Content-Type": "application/json",
-        },
-        body: JSON.stringify({
-            sdp: "",
-            type: "offer",
-        }),
+function waitForIceGathering(peer) {
+    if (peer.iceGatheringState === "complete") {
+        return Promise.resolve();
+    }
+    return new Promise((resolve) => {
+        function checkState() {
+            if (peer.iceGatheringState === "complete") {
+                peer.removeEventListener("icegatheringstatechange", checkState);
+                resolve();
+            }
+        }
+        peer.addEventListener("icegatheringstatechange", checkState);
     });
+}
+
+function webrtcVideoElement() {
+    let video = document.getElementById("remoteVideo");
+    if (video) {
+        return video;
+    }
+    const mjpeg = document.querySelector(".video img");
+    if (!mjpeg) {
+        return null;
+    }
+    video = document.createElement("video");
+    video.id = "remoteVideo";
+    video.autoplay = true;
+    video.playsInline = true;
+    video.muted = true;
+    video.dataset.mjpegSrc = mjpeg.src;
+    mjpeg.replaceWith(video);
+    return video;
+}
 
-    // Parse the offer response
-    const offer = await offerResponse.json();
-    console.log("Received offer response:", offer);
+function fallbackToMjpeg(video) {
+    if (!video.dataset.mjpegSrc) {
+        return;
+    }
+    const img = document.createElement("img");
+    img.src = video.dataset.mjpegSrc;
+    video.replaceWith(img);
+}
+
+// Send the offer to the server and apply its answer
+async function startWebrtc() {
+    const video = webrtcVideoElement();
+    if (!video) {
+        return;
+    }
+    pc = new RTCPeerConnection();
+    pc.addTransceiver("video", { direction: "recvonly" });
+    pc.addEventListener("track", (event) => {
+        video.srcObject = event.streams[0] || new MediaStream([event.track]);
+    });
 
-    // Set the remote description based on the received offer
-    await pc.setRemoteDescription(new RTCSessionDescription(offer));
+    try {
+        const offer = await pc.createOffer();
+        await pc.setLocalDescription(offer);
+        await waitForIceGathering(pc);
 
-    // Create an answer and set it as the local description
-    const answer = await pc.createAnswer();
-    await pc.setLocalDescription(answer);
+        const answerResponse = await fetch("/offer", {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+            },
+            body: JSON.stringify({
+                sdp: pc.localDescription.sdp,
+                type: pc.localDescription.type,
+            }),
+        });
+        if (!answerResponse.ok) {
+            throw new Error(`offer rejected: ${answerResponse.status}`);
+        }
+        const answer = await answerResponse.json();
+        await pc.setRemoteDescription(new RTCSessionDescription(answer));
+    } catch (error) {
+        console.log("WebRTC failed, using MJPEG:", error);
+        pc.close();
+        pc = null;
+        fallbackToMjpeg(video);
+    }
 }
 
-// Trigger the process by creating and sending an offer
-createOffer();
+if (new URLSearchParams(window.location.search).get("webrtc") === "1") {
+    startWebrtc();
+}
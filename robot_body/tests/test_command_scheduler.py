@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+import unittest
+
+curpath = os.path.realpath(__file__)
+thisPath = os.path.dirname(os.path.dirname(curpath))
+sys.path.insert(0, thisPath)
+
+from base_ctrl import CommandScheduler
+
+
+class CommandSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = CommandScheduler([[1, 13], [132], [133, 134, 135, 141]], [0], [1, 13])
+
+    def put(self, *commands):
+        for command in commands:
+            self.scheduler.put(command)
+            # 保证每条指令的排队时刻不同
+            time.sleep(0.001)
+
+    def drain(self):
+        sent = []
+        while True:
+            item = self.scheduler.get(timeout=0)
+            if item is None:
+                return sent
+            sent.append(item[0])
+
+    def test_gimbal_group_ends_at_last_request(self):
+        self.put({'T': 134, 'X': 10}, {'T': 135}, {'T': 134, 'X': 50})
+        self.assertEqual(self.drain(), [{'T': 134, 'X': 50}])
+
+    def test_chassis_group_ends_at_last_request(self):
+        self.put({'T': 1, 'L': 0.5, 'R': 0.5}, {'T': 13, 'X': 0, 'Z': 0}, {'T': 1, 'L': 0.3, 'R': 0.3})
+        self.assertEqual(self.drain(), [{'T': 1, 'L': 0.3, 'R': 0.3}])
+
+    def test_overwritten_slot_moves_behind_later_commands(self):
+        self.put({'T': 1, 'L': 0.5, 'R': 0.5}, {'T': 3, 'text': 'a'}, {'T': 132, 'IO4': 10},
+                 {'T': 13, 'X': 0, 'Z': 0})
+        self.assertEqual(self.drain(), [{'T': 3, 'text': 'a'}, {'T': 132, 'IO4': 10}, {'T': 13, 'X': 0, 'Z': 0}])
+
+    def test_urgent_cancels_motion_group_only(self):
+        self.put({'T': 1, 'L': 0.5, 'R': 0.5}, {'T': 133, 'X': 0, 'Y': 0}, {'T': 0})
+        self.assertEqual(self.drain(), [{'T': 0}, {'T': 133, 'X': 0, 'Y': 0}])
+        self.assertEqual(self.scheduler.counters['cancelled'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
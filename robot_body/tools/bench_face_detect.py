@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""人脸检测基准测试
+
+在录制的视频上比较原始整帧 detectMultiScale 调用与 cv_face.FaceSearch
+多分辨率搜索的耗时(ms/帧)和召回率(以整帧检测结果为参照，IoU>=0.5 视为命中)。
+
+用法:
+    python3 tools/bench_face_detect.py video.mp4 [--frames 300]
+"""
+import os
+import sys
+import time
+import argparse
+
+import cv2
+import yaml
+
+curpath = os.path.realpath(__file__)
+thisPath = os.path.dirname(os.path.dirname(curpath))
+sys.path.insert(0, thisPath)
+
+from cv_face import FaceSearch, box_iou
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Haar人脸检测基准测试")
+    parser.add_argument('video', help="录制的视频文件")
+    parser.add_argument('--frames', type=int, default=0, help="最多处理的帧数(0 表示全部)")
+    parser.add_argument('--width', type=int, default=640, help="缩放到的分析宽度")
+    args = parser.parse_args()
+
+    with open(thisPath + '/config/config.yaml', 'r') as yaml_file:
+        f = yaml.safe_load(yaml_file)
+
+    cascade = cv2.CascadeClassifier(thisPath + '/models/haarcascade_frontalface_default.xml')
+    search = FaceSearch(cascade, f['cv'])
+
+    cap = cv2.VideoCapture(args.video)
+    if not cap.isOpened():
+        print(f"无法打开视频: {args.video}")
+        return 1
+
+    frames = 0
+    baseline_time = 0.0
+    search_time = 0.0
+    reference_faces = 0
+    matched_faces = 0
+    while True:
+        ok, frame = cap.read()
+        if not ok or (args.frames and frames >= args.frames):
+            break
+        height, width = frame.shape[:2]
+        if width != args.width:
+            frame = cv2.resize(frame, (args.width, int(height * args.width / width)))
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        start = time.perf_counter()
+        reference = cascade.detectMultiScale(gray, scaleFactor=1.2, minNeighbors=5, minSize=(20, 20))
+        baseline_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = search.detect(gray)
+        search_time += time.perf_counter() - start
+
+        reference_faces += len(reference)
+        for face in reference:
+            if any(box_iou(tuple(face), other) >= 0.5 for other in found):
+                matched_faces += 1
+        frames += 1
+
+    cap.release()
+    if not frames:
+        print("视频中没有可用帧")
+        return 1
+
+    recall = matched_faces / reference_faces if reference_faces else 1.0
+    print(f"frames:            {frames}")
+    print(f"baseline ms/frame: {baseline_time * 1000 / frames:.2f}")
+    print(f"search   ms/frame: {search_time * 1000 / frames:.2f}")
+    print(f"full scans:        {search.full_scans}")
+    print(f"reference faces:   {reference_faces}")
+    print(f"recall:            {recall * 100:.1f}%")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
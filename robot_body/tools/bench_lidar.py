@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""激光雷达解析基准测试
+
+对同一段字节流，比较逐字节查找帧头、逐点解析的旧实现和 LidarDriver 的帧率。
+字节流可以是录制的文件，也可以用 sim_firmware 的激光雷达模拟器生成。
+
+用法:
+    python3 tools/bench_lidar.py [--input lidar.bin] [--seconds 60] [--corrupt 0.01] [--chunk 2048]
+    python3 tools/bench_lidar.py --record lidar.bin --device /dev/ttyACM0 --seconds 10
+"""
+import io
+import os
+import sys
+import time
+import random
+import argparse
+import numpy as np
+
+curpath = os.path.realpath(__file__)
+thisPath = os.path.dirname(os.path.dirname(curpath))
+sys.path.insert(0, thisPath)
+
+from lidar_driver import LidarDriver, FRAME_SIZE
+from sim_firmware import LidarSim, corrupt
+
+
+class ByteStream:
+    """用内存中的字节流代替串口，read/in_waiting 与 serial.Serial 相同"""
+    def __init__(self, data, chunk):
+        self.stream = io.BytesIO(data)
+        self.size = len(data)
+        self.chunk = chunk
+
+    @property
+    def in_waiting(self):
+        return min(self.chunk, self.size - self.stream.tell())
+
+    def read(self, size=1):
+        return self.stream.read(size)
+
+    def flushInput(self):
+        # 真实串口上旧实现会丢掉已缓存的数据，这里不丢，两种实现解析相同的数据
+        pass
+
+
+class LegacyParser:
+    """旧实现：逐字节找 0x54，再读 46 字节，逐点换算角度"""
+    def __init__(self, ser):
+        self.lidar_ser = ser
+        self.lidar_angles = []
+        self.lidar_distances = []
+        self.lidar_scan_id = 0
+        self.last_start_angle = 0
+        self.frames = 0
+
+    def parse_lidar_frame(self, data):
+        start_angle = (data[5] << 8 | data[4]) * 0.01
+        for i in range(0, 12):
+            offset = 6 + i * 3
+            distance = data[offset+1] << 8 | data[offset]
+            self.lidar_angles.append(np.radians(start_angle + i * 0.83333 + 180))
+            self.lidar_distances.append(distance)
+        return start_angle
+
+    def lidar_data_recv(self):
+        while True:
+            header = self.lidar_ser.read(1)
+            if not header:
+                raise EOFError
+            if header == b'\x54':
+                data = header + self.lidar_ser.read(46)
+                if len(data) < FRAME_SIZE:
+                    raise EOFError
+                hex_data = [int(hex(byte), 16) for byte in data]
+                start_angle = self.parse_lidar_frame(hex_data)
+                self.frames += 1
+                if self.last_start_angle > start_angle:
+                    break
+                self.last_start_angle = start_angle
+            else:
+                self.lidar_ser.flushInput()
+        self.last_start_angle = start_angle
+        self.lidar_scan_id += 1
+        self.lidar_angles.clear()
+        self.lidar_distances.clear()
+
+
+def synthetic_stream(seconds, corrupt_rate, seed):
+    """用激光雷达模拟器生成 seconds 秒的帧(10Hz，4500 点/秒)"""
+    rng = random.Random(seed)
+    sim = LidarSim(None, 10, 4500, 1.0, corrupt_rate, rng)
+    frame_angle = 360.0 * sim.scan_hz / sim.frames_per_sec
+    step = frame_angle / sim.ANGLE_PER_FRAME
+    chunks = []
+    angle = 0.0
+    for index in range(int(seconds * sim.frames_per_sec)):
+        frame, _ = corrupt(sim.frame(angle, step, int(index * 1000 / sim.frames_per_sec)), corrupt_rate, rng)
+        chunks.append(frame)
+        angle = (angle + frame_angle) % 360
+    return b''.join(chunks)
+
+
+def record(device, seconds, path):
+    import serial
+    ser = serial.Serial(device, 230400, timeout=1)
+    end_time = time.time() + seconds
+    with open(path, 'wb') as output:
+        while time.time() < end_time:
+            output.write(ser.read(max(1, ser.in_waiting)))
+    ser.close()
+
+
+def run_legacy(data):
+    parser = LegacyParser(ByteStream(data, 0))
+    start = time.perf_counter()
+    try:
+        while True:
+            parser.lidar_data_recv()
+    except EOFError:
+        pass
+    return parser.frames, parser.lidar_scan_id, time.perf_counter() - start
+
+
+def run_driver(data, chunk):
+    stream = ByteStream(data, chunk)
+    driver = LidarDriver(stream)
+    start = time.perf_counter()
+    while stream.in_waiting:
+        driver.read()
+    return driver.counters['frames'], driver.scan_id, time.perf_counter() - start, driver
+
+
+def main():
+    parser = argparse.ArgumentParser(description="激光雷达解析基准测试")
+    parser.add_argument('--input', default='', help="录制的字节流文件，不指定时用模拟器生成")
+    parser.add_argument('--seconds', type=float, default=60, help="生成或录制的时长(秒)")
+    parser.add_argument('--corrupt', type=float, default=0.0, help="生成时帧的损坏比例(0~1)")
+    parser.add_argument('--seed', type=int, default=0, help="随机数种子")
+    parser.add_argument('--chunk', type=int, default=2048, help="LidarDriver 每次读取的最大字节数")
+    parser.add_argument('--record', default='', help="从 --device 录制字节流到此文件后退出")
+    parser.add_argument('--device', default='/dev/ttyACM0', help="录制用的激光雷达串口")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.device, args.seconds, args.record)
+        print(f"recorded {os.path.getsize(args.record)} bytes to {args.record}")
+        return 0
+
+    if args.input:
+        with open(args.input, 'rb') as input_file:
+            data = input_file.read()
+    else:
+        data = synthetic_stream(args.seconds, args.corrupt, args.seed)
+    print(f"stream: {len(data)} bytes")
+
+    legacy_frames, legacy_scans, legacy_time = run_legacy(data)
+    frames, scans, elapsed, driver = run_driver(data, args.chunk)
+    print(f"{'':<8} {'frames':>8} {'scans':>6} {'seconds':>8} {'frames/s':>10}")
+    print(f"{'legacy':<8} {legacy_frames:>8} {legacy_scans:>6} {legacy_time:>8.3f} {legacy_frames / legacy_time:>10.0f}")
+    print(f"{'driver':<8} {frames:>8} {scans:>6} {elapsed:>8.3f} {frames / elapsed:>10.0f}")
+    print(f"driver: {driver.status()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""热路径日志基准测试
+
+按 config/logging_config.yaml 配置日志(级别 INFO，日志文件写到临时目录)，
+用合成图案跑 frame_process，对比两种配置下的输出帧率：
+    before: 同步处理器，热路径逐次输出日志(HotPathLog.passthrough)
+    after:  队列处理器(后台线程格式化和写文件)，热路径只计数/限频
+
+用法:
+    python3 tools/bench_logging.py [--modes cv_clor,cv_face] [--seconds 10] [--console]
+"""
+import os
+import sys
+import time
+import yaml
+import shutil
+import argparse
+import tempfile
+import logging.config
+
+curpath = os.path.realpath(__file__)
+thisPath = os.path.dirname(os.path.dirname(curpath))
+sys.path.insert(0, thisPath)
+
+import log_utils
+import cv_ctrl
+from bench_pipeline import DryRunBase
+
+
+def configure_logging(log_dir, use_queue, console):
+    """按 logging_config.yaml 配置日志，文件写到 log_dir"""
+    log_utils.stop_queue_logging()
+    with open(os.path.join(thisPath, 'config', 'logging_config.yaml'), 'r') as config_file:
+        config = yaml.safe_load(config_file)
+    queue_config = config.pop('queue', None) or {}
+    for handler in config['handlers'].values():
+        if 'filename' in handler:
+            handler['filename'] = os.path.join(log_dir, os.path.basename(handler['filename']))
+            # 不切分文件，便于统计写入量
+            handler.pop('maxBytes', None)
+    for logger_config in list(config['loggers'].values()) + [config['root']]:
+        logger_config['level'] = 'INFO'
+        if not console:
+            logger_config['handlers'] = [name for name in logger_config['handlers'] if name != 'console']
+    logging.config.dictConfig(config)
+    if use_queue:
+        log_utils.install_queue_logging(list(config['loggers']) + [''], queue_config.get('size', 10000))
+
+
+def run_modes(cvf, modes, seconds):
+    results = {}
+    for name in modes:
+        cvf.set_cv_mode(cv_ctrl.f['code'][name])
+        warmup_end = time.time() + 1
+        while time.time() < warmup_end:
+            cvf.frame_process()
+        frames = 0
+        start = time.time()
+        while time.time() - start < seconds:
+            cvf.frame_process()
+            frames += 1
+        results[name] = frames / (time.time() - start)
+    cvf.set_cv_mode(cv_ctrl.f['code']['cv_none'])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="热路径日志基准测试")
+    parser.add_argument('--modes', default='cv_clor,cv_face,cv_moti',
+                        help="逗号分隔的模式名(config.yaml code 中的键)")
+    parser.add_argument('--seconds', type=float, default=10, help="每个模式的测试时长")
+    parser.add_argument('--console', action='store_true', help="同时输出到控制台")
+    args = parser.parse_args()
+    modes = args.modes.split(',')
+
+    cv_ctrl.f['video']['source'] = 'synthetic'
+    log_dir = tempfile.mkdtemp(prefix='bench_logging_')
+    configure_logging(log_dir, False, args.console)
+    cvf = cv_ctrl.OpencvFuncs(thisPath, DryRunBase())
+    if cvf.frame_source is None:
+        print("图像源不可用")
+        return 1
+
+    try:
+        runs = {}
+        for label, use_queue, passthrough in (('before', False, True), ('after', True, False)):
+            configure_logging(log_dir, use_queue, args.console)
+            log_utils.hot_log.passthrough = passthrough
+            log_path = os.path.join(log_dir, 'body.log')
+            size_start = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+            runs[label] = run_modes(cvf, modes, args.seconds)
+            log_utils.stop_queue_logging()
+            runs[label]['log KB'] = (os.path.getsize(log_path) - size_start) / 1024
+
+        print(f"{'':<10} {'before':>10} {'after':>10}")
+        for key in modes + ['log KB']:
+            print(f"{key:<10} {runs['before'][key]:>10.1f} {runs['after'][key]:>10.1f}")
+        print("(模式行为帧/秒)")
+    finally:
+        cvf.frame_source.stop()
+        shutil.rmtree(log_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
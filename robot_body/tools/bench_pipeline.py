@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""整条视觉流水线基准测试
+
+不需要摄像头和下位机：用合成图案或视频文件作为图像源，
+依次切换各个CV模式，统计 frame_process(采集->分析->叠加->JPEG编码) 的输出帧率、
+每帧耗时以及调度器记录的分析耗时。发往下位机的指令只计数不发送。
+
+用法:
+    python3 tools/bench_pipeline.py [--source synthetic|file] [--file video.mp4]
+                                    [--modes cv_none,cv_clor,cv_auto] [--seconds 10]
+"""
+import os
+import sys
+import time
+import argparse
+
+curpath = os.path.realpath(__file__)
+thisPath = os.path.dirname(os.path.dirname(curpath))
+sys.path.insert(0, thisPath)
+
+import cv_ctrl
+
+
+class DryRunBase:
+    """只记录指令的下位机控制器，提供 OpencvFuncs 用到的属性和方法"""
+    def __init__(self):
+        self.base_light_status = 0
+        self.head_light_status = 0
+        self.commands = 0
+
+    def base_json_ctrl(self, input_json):
+        self.commands += 1
+
+    def lights_ctrl(self, pwmA, pwmB):
+        self.commands += 1
+        self.base_light_status = pwmA
+        self.head_light_status = pwmB
+
+
+def main():
+    parser = argparse.ArgumentParser(description="视觉流水线基准测试")
+    parser.add_argument('--source', default='synthetic', choices=['synthetic', 'file'], help="图像源")
+    parser.add_argument('--file', default='', help="--source file 时使用的视频文件")
+    parser.add_argument('--modes', default='cv_none,cv_moti,cv_face,cv_objs,cv_clor,cv_auto',
+                        help="逗号分隔的模式名(config.yaml code 中的键)")
+    parser.add_argument('--seconds', type=float, default=10, help="每个模式的测试时长")
+    parser.add_argument('--fps', type=int, default=30, help="图像源帧率")
+    args = parser.parse_args()
+
+    cv_ctrl.f['video']['source'] = args.source
+    cv_ctrl.f['video']['source_file'] = args.file
+    cv_ctrl.f['video']['source_fps'] = args.fps
+    base = DryRunBase()
+    cvf = cv_ctrl.OpencvFuncs(thisPath, base)
+    if cvf.frame_source is None:
+        print("图像源不可用")
+        return 1
+
+    print(f"source: {cvf.frame_source.name} {cvf.frame_source.width}x{cvf.frame_source.height} "
+          f"{cvf.frame_source.pixel_format} @ {args.fps}fps")
+    print(f"{'mode':<8} {'out fps':>8} {'ms/frame':>9} {'cv ms':>7} {'cv fps':>7} {'dropped':>8}")
+    for name in args.modes.split(','):
+        cvf.set_cv_mode(cv_ctrl.f['code'][name])
+        # 先跑一秒让模型加载、调度器收敛
+        warmup_end = time.time() + 1
+        while time.time() < warmup_end:
+            cvf.frame_process()
+
+        dropped_start = cvf.frame_source.dropped
+        frames = 0
+        busy = 0.0
+        start = time.time()
+        while time.time() - start < args.seconds:
+            frame_start = time.perf_counter()
+            cvf.frame_process()
+            busy += time.perf_counter() - frame_start
+            frames += 1
+        elapsed = time.time() - start
+
+        sched_status = cvf.cv_sched.status(cvf.cv_mode)
+        print(f"{name:<8} {frames / elapsed:>8.1f} {busy * 1000 / max(frames, 1):>9.2f} "
+              f"{sched_status['cost']:>7} {sched_status['fps']:>7} "
+              f"{cvf.frame_source.dropped - dropped_start:>8}")
+
+    cvf.set_cv_mode(cv_ctrl.f['code']['cv_none'])
+    cvf.frame_source.stop()
+    print(f"base commands (not sent): {base.commands}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
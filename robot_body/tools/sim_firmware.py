@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""下位机固件模拟器
+
+在 Linux 伪终端(PTY)上模拟下位机、激光雷达和 USB 传感器，不接 ESP32 也能运行和压测串口代码：
+    base:   JSON 协议，按 T:142 设置的间隔发送 T:1001 反馈(带递增的 seq)，T:143 控制回显，应答 T:900/T:4
+    lidar:  LD 系列激光雷达帧(0x54 帧头，每帧 12 点，CRC8)
+    sensor: USB 传感器文本行
+各路按波特率限速输出，对端来不及读取时和真实串口一样丢数据；可以设置速率、噪声和损坏比例。
+
+用法:
+    python3 tools/sim_firmware.py [--link-dir /tmp/robot_sim] [--corrupt 0.01] [--noise 1.0]
+        启动模拟器并打印各路 PTY 路径，--link-dir 下同时建立 base/lidar/sensor 符号链接
+    python3 tools/sim_firmware.py --bench 10 [--command-rate 50] [--feedback-ms 50]
+        用 BaseController、ReadLine 和 base_data_loop 相同的读取流程连接模拟器，统计吞吐和丢失
+"""
+import os
+import pty
+import sys
+import tty
+import json
+import math
+import time
+import random
+import select
+import argparse
+import threading
+from collections import Counter
+
+curpath = os.path.realpath(__file__)
+thisPath = os.path.dirname(os.path.dirname(curpath))
+sys.path.insert(0, thisPath)
+
+
+def crc8(data):
+    """LD 系列激光雷达帧的 CRC8(多项式 0x4D)"""
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x4D) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+def corrupt(data, rate, rng):
+    """按比例损坏数据：翻转一个字节或截掉一段"""
+    if rate <= 0 or rng.random() >= rate:
+        return data, False
+    data = bytearray(data)
+    pos = rng.randrange(len(data))
+    if rng.random() < 0.5:
+        data[pos] ^= 1 << rng.randrange(8)
+    else:
+        del data[pos:pos + rng.randint(1, 8)]
+    return bytes(data), True
+
+
+class PtyPort:
+    """一路伪终端，模拟器持有主端，被测代码打开从端路径"""
+    def __init__(self, name, baud):
+        self.name = name
+        self.baud = baud
+        self.master, self.slave = pty.openpty()
+        # 原始模式：不回显，不转换换行
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.path = os.ttyname(self.slave)
+        self.counters = Counter()
+        self._lock = threading.Lock()
+        self._free_time = time.monotonic()
+
+    def write(self, data):
+        """按波特率(8N1 每字节 10 位)限速写入，缓冲区满时丢弃，相当于串口溢出"""
+        with self._lock:
+            now = time.monotonic()
+            self._free_time = max(self._free_time, now) + len(data) * 10 / self.baud
+            wait = self._free_time - now
+            try:
+                written = os.write(self.master, data)
+            except (BlockingIOError, OSError):
+                written = 0
+            self.counters['bytes'] += written
+            self.counters['overrun'] += len(data) - written
+        if wait > 0:
+            time.sleep(wait)
+        return written == len(data)
+
+    def read(self, timeout=0.1):
+        ready, _, _ = select.select([self.master], [], [], timeout)
+        if not ready:
+            return b""
+        try:
+            return os.read(self.master, 4096)
+        except (BlockingIOError, OSError):
+            return b""
+
+    def link(self, link_dir):
+        path = os.path.join(link_dir, self.name)
+        if os.path.lexists(path):
+            os.unlink(path)
+        os.symlink(self.path, path)
+        return path
+
+
+class FirmwareSim:
+    """下位机 JSON 协议"""
+    def __init__(self, port, feedback_ms, noise, corrupt_rate, rng):
+        self.port = port
+        self.interval = feedback_ms / 1000.0
+        self.noise = noise
+        self.corrupt_rate = corrupt_rate
+        self.rng = rng
+        self.feedback = True
+        self.echo = False
+        self.state = {'L': 0, 'R': 0, 'pan': 0, 'tilt': 0, 'main': 2, 'module': 0}
+        self.counters = Counter()
+        self.commands = Counter()
+        # 收到的带 seq 的指令的序号
+        self.command_seqs = set()
+
+    def start(self):
+        threading.Thread(target=self._feedback_loop, daemon=True).start()
+        threading.Thread(target=self._command_loop, daemon=True).start()
+        return self
+
+    def _send(self, message):
+        line = (json.dumps(message, separators=(',', ':')) + '\n').encode('utf-8')
+        line, damaged = corrupt(line, self.corrupt_rate, self.rng)
+        self.counters['corrupted'] += damaged
+        self.port.write(line)
+
+    def _feedback_loop(self):
+        next_time = time.monotonic()
+        while True:
+            next_time += self.interval
+            if self.feedback:
+                gauss = self.rng.gauss
+                self._send({
+                    'T': 1001, 'seq': self.counters['feedback'], 'L': self.state['L'], 'R': self.state['R'],
+                    'r': round(gauss(0, 0.5 * self.noise), 2), 'p': round(gauss(0, 0.5 * self.noise), 2),
+                    'y': round(gauss(0, 0.5 * self.noise), 2), 'temp': round(35 + gauss(0, 0.2 * self.noise), 1),
+                    'v': round(11.8 + gauss(0, 0.02 * self.noise), 2),
+                    'pan': self.state['pan'], 'tilt': self.state['tilt'],
+                })
+                self.counters['feedback'] += 1
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_time = time.monotonic()
+
+    def _command_loop(self):
+        buf = bytearray()
+        while True:
+            buf.extend(self.port.read())
+            *lines, rest = buf.split(b'\n')
+            buf = bytearray(rest)
+            for line in lines:
+                if line.strip():
+                    self._handle(line)
+
+    def _handle(self, line):
+        try:
+            command = json.loads(line)
+            t = command['T']
+        except (ValueError, KeyError, TypeError):
+            self.counters['bad_commands'] += 1
+            return
+        self.commands[t] += 1
+        if 'seq' in command:
+            self.command_seqs.add(command['seq'])
+        if self.echo:
+            self.port.write(line + b'\n')
+        if t == 1:
+            self.state['L'], self.state['R'] = command.get('L', 0), command.get('R', 0)
+        elif t in (133, 134, 141):
+            self.state['pan'], self.state['tilt'] = command.get('X', 0), command.get('Y', 0)
+        elif t == 131:
+            self.feedback = bool(command.get('cmd', 1))
+        elif t == 142:
+            # 0 表示尽快发送，这里按 10ms 处理
+            self.interval = max(command.get('cmd', 0), 10) / 1000.0
+        elif t == 143:
+            self.echo = bool(command.get('cmd', 0))
+        elif t == 900:
+            self.state['main'], self.state['module'] = command.get('main', 2), command.get('module', 0)
+            self._send({'T': 900, 'main': self.state['main'], 'module': self.state['module']})
+        elif t == 4:
+            self.state['module'] = command.get('cmd', 0)
+            self._send({'T': 4, 'cmd': self.state['module']})
+
+    def status(self):
+        status = dict(self.counters)
+        status['commands'] = sum(self.commands.values())
+        status['types'] = {str(t): count for t, count in self.commands.most_common()}
+        return status
+
+
+class LidarSim:
+    """LD 系列激光雷达，矩形房间内旋转扫描"""
+    ANGLE_PER_FRAME = 12
+
+    def __init__(self, port, scan_hz, points_per_sec, noise, corrupt_rate, rng, room=(2000, 3000)):
+        self.port = port
+        self.scan_hz = scan_hz
+        self.frames_per_sec = points_per_sec / self.ANGLE_PER_FRAME
+        self.noise = noise
+        self.corrupt_rate = corrupt_rate
+        self.rng = rng
+        self.room = room
+        self.counters = Counter()
+
+    def start(self):
+        threading.Thread(target=self._loop, daemon=True).start()
+        return self
+
+    def distance(self, angle):
+        """原点在房间中心，到墙的距离(mm)"""
+        radians = math.radians(angle)
+        cos, sin = abs(math.cos(radians)), abs(math.sin(radians))
+        half_x, half_y = self.room
+        wall = min(half_x / cos if cos > 1e-6 else math.inf, half_y / sin if sin > 1e-6 else math.inf)
+        return max(0, min(65535, int(wall + self.rng.gauss(0, 10 * self.noise))))
+
+    def frame(self, start_angle, step, timestamp):
+        data = bytearray([0x54, 0x2C])
+        data += int(self.scan_hz * 360).to_bytes(2, 'little')
+        data += int(start_angle * 100).to_bytes(2, 'little')
+        for i in range(self.ANGLE_PER_FRAME):
+            data += self.distance(start_angle + i * step).to_bytes(2, 'little')
+            data.append(200)
+        data += int(((start_angle + (self.ANGLE_PER_FRAME - 1) * step) % 360) * 100).to_bytes(2, 'little')
+        data += (timestamp % 30000).to_bytes(2, 'little')
+        data.append(crc8(data))
+        return bytes(data)
+
+    def _loop(self):
+        frame_angle = 360.0 * self.scan_hz / self.frames_per_sec
+        step = frame_angle / self.ANGLE_PER_FRAME
+        angle = 0.0
+        next_time = time.monotonic()
+        while True:
+            next_time += 1.0 / self.frames_per_sec
+            frame, damaged = corrupt(self.frame(angle, step, int(time.monotonic() * 1000)),
+                                     self.corrupt_rate, self.rng)
+            self.counters['corrupted'] += damaged
+            self.port.write(frame)
+            self.counters['frames'] += 1
+            angle += frame_angle
+            if angle >= 360:
+                angle -= 360
+                self.counters['scans'] += 1
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_time = time.monotonic()
+
+    def status(self):
+        return dict(self.counters)
+
+
+class SensorSim:
+    """USB 传感器，每行一组读数"""
+    def __init__(self, port, rate, noise, rng):
+        self.port = port
+        self.rate = rate
+        self.noise = noise
+        self.rng = rng
+        self.counters = Counter()
+
+    def start(self):
+        threading.Thread(target=self._loop, daemon=True).start()
+        return self
+
+    def _loop(self):
+        while True:
+            gauss = self.rng.gauss
+            line = f"temp:{24 + gauss(0, 0.2 * self.noise):.1f},hum:{50 + gauss(0, 1 * self.noise):.1f}\r\n"
+            self.port.write(line.encode('utf-8'))
+            self.counters['lines'] += 1
+            time.sleep(1.0 / self.rate)
+
+    def status(self):
+        return dict(self.counters)
+
+
+def bench(args, base_port, lidar_port, sensor_port, sims):
+    """按 app.py 的方式读取模拟器：串口读取线程 + base_data_loop(传感器、激光雷达)"""
+    import base_ctrl
+
+    # 不占用正在运行的程序的 IPC 端点
+    base_ctrl.f['uart']['ipc_path'] = ''
+    base = base_ctrl.BaseController(base_port.path, 115200)
+    base.rl = base_ctrl.ReadLine(None, sensor_port.path, lidar_port.path)
+    base.base_json_ctrl({"T": 142, "cmd": args.feedback_ms})
+    base.base_json_ctrl({"T": 143, "cmd": 0})
+    firmware, lidar, sensor = sims
+    time.sleep(0.5)
+    # 丢掉启动前积压在 PTY 里的激光雷达帧和传感器行，计数从同一时刻开始，收到的不会多于发出的
+    base.rl.lidar_ser.reset_input_buffer()
+    base.rl.sensor_data_ser.reset_input_buffer()
+    start_counts = (lidar.counters['scans'], base.rl.lidar_scan_id, sensor.counters['lines'])
+
+    # 反馈和指令都带序号，丢失数按序号缺口计算，不受开始/结束时刻在途消息的影响
+    feedback_seqs = []
+    base.reader.subscribe(1001, lambda message: feedback_seqs.append(message.get('seq')))
+    first_feedback = firmware.counters['feedback']
+    start_coalesced = base.transport.scheduler.counters['coalesced']
+    running = True
+    sent = Counter()
+
+    def command_loop():
+        # 模拟界面摇杆和 gimbal_track 持续发送的运动指令，与 base_speed_ctrl/gimbal_ctrl 相同，另加 seq
+        while running:
+            phase = time.monotonic()
+            base.base_json_ctrl({"T": 1, "L": round(math.sin(phase) * 0.3, 4), "R": round(math.cos(phase) * 0.3, 4),
+                                 "seq": sent['commands']})
+            base.base_json_ctrl({"T": 133, "X": round(math.sin(phase) * 90, 3), "Y": round(math.cos(phase) * 30, 3),
+                                 "SPD": 0, "ACC": 0, "seq": sent['commands'] + 1})
+            sent['commands'] += 2
+            time.sleep(1.0 / args.command_rate)
+
+    threading.Thread(target=command_loop, daemon=True).start()
+
+    sensor_lines = 0
+    loops = 0
+    sensor_read_time = time.time()
+    end_time = time.time() + args.bench
+    while time.time() < end_time:
+        if time.time() - sensor_read_time > 1:
+            base.rl.read_sensor_data()
+            sensor_lines += len(base.rl.sensor_data)
+            sensor_read_time = time.time()
+        base.rl.lidar_data_recv()
+        loops += 1
+        time.sleep(0.025)
+    last_feedback = firmware.counters['feedback']
+    running = False
+    time.sleep(0.2)
+
+    # 压测期间发出的反馈序号为 [first_feedback, last_feedback)
+    feedback = last_feedback - first_feedback
+    received = len({seq for seq in feedback_seqs if seq is not None and first_feedback <= seq < last_feedback})
+    # 被合并的指令不发送，不算丢失
+    commands_received = len(firmware.command_seqs)
+    coalesced = base.transport.scheduler.counters['coalesced'] - start_coalesced
+    commands_lost = sent['commands'] - commands_received - coalesced
+    scans = lidar.counters['scans'] - start_counts[0]
+    scans_read = base.rl.lidar_scan_id - start_counts[1]
+    commands = base.transport.scheduler.status()
+    link = base.transport.link.status()
+    print(f"{'':<22} {'sent':>10} {'received':>10} {'lost':>6}")
+    print(f"{'base feedback':<22} {feedback:>10} {received:>10} {feedback - received:>6}   "
+          f"parse_errors={base.reader.counters['parse_errors']} dropped={base.reader.counters['dropped']}")
+    print(f"{'commands':<22} {sent['commands']:>10} {commands_received:>10} {commands_lost:>6}   "
+          f"coalesced={coalesced} delay_ms={commands.get('delay_ms')}")
+    print(f"{'lidar scans':<22} {scans:>10} {scans_read:>10}   "
+          f"frames={lidar.counters['frames']} overrun_bytes={lidar_port.counters['overrun']}")
+    print(f"{'sensor lines':<22} {sensor.counters['lines'] - start_counts[2]:>10} {sensor_lines:>10}")
+    print(f"base_data_loop: {loops / args.bench:.1f} loops/s, "
+          f"uart tx {link['tx']['utilization'] * 100:.1f}% rx {link['rx']['utilization'] * 100:.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="下位机固件模拟器")
+    parser.add_argument('--link-dir', default='', help="在此目录下建立 base/lidar/sensor 符号链接")
+    parser.add_argument('--feedback-ms', type=int, default=50, help="初始反馈间隔(ms)，T:142 可修改")
+    parser.add_argument('--lidar-hz', type=float, default=10, help="激光雷达扫描频率")
+    parser.add_argument('--lidar-points', type=int, default=4500, help="激光雷达每秒点数")
+    parser.add_argument('--sensor-rate', type=float, default=5, help="传感器每秒行数")
+    parser.add_argument('--noise', type=float, default=1.0, help="噪声倍数，0 表示无噪声")
+    parser.add_argument('--corrupt', type=float, default=0.0, help="消息/帧的损坏比例(0~1)")
+    parser.add_argument('--seed', type=int, default=None, help="随机数种子")
+    parser.add_argument('--bench', type=float, default=0, help="连接模拟器压测的时长(秒)，0 表示只运行模拟器")
+    parser.add_argument('--command-rate', type=float, default=50, help="压测时每秒发送的运动指令组数")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    base_port = PtyPort('base', 115200)
+    lidar_port = PtyPort('lidar', 230400)
+    sensor_port = PtyPort('sensor', 115200)
+    firmware = FirmwareSim(base_port, args.feedback_ms, args.noise, args.corrupt, rng).start()
+    lidar = LidarSim(lidar_port, args.lidar_hz, args.lidar_points, args.noise, args.corrupt, rng).start()
+    sensor = SensorSim(sensor_port, args.sensor_rate, args.noise, rng).start()
+
+    for port in (base_port, lidar_port, sensor_port):
+        path = port.path
+        if args.link_dir:
+            os.makedirs(args.link_dir, exist_ok=True)
+            path = f"{port.link(args.link_dir)} -> {port.path}"
+        print(f"{port.name:<7} {path}")
+
+    if args.bench:
+        bench(args, base_port, lidar_port, sensor_port, (firmware, lidar, sensor))
+        return 0
+
+    try:
+        while True:
+            time.sleep(5)
+            print(f"base {firmware.status()} lidar {lidar.status()} sensor {sensor.status()}")
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
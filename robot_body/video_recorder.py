@@ -0,0 +1,165 @@
+import os
+import cv2
+import queue
+import datetime
+import threading
+import logging
+import numpy as np
+from collections import deque
+
+from lazy_import import LazyModule
+
+imageio = LazyModule('imageio')
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+
+class VideoRecorder:
+    """后台录像器
+
+    采集线程只把帧的引用和采集时间戳放入队列，颜色转换和 ffmpeg 编码在录像线程中完成。
+    输出为固定帧率文件，按时间戳放置每一帧(采集间隔大时重复、重复帧丢弃)，
+    使视频时长与实际时间一致。始终保留最近 pre_roll 秒已编码的 JPEG 帧，
+    开始录像时先写入这段预录内容；单个文件超过时长或大小限制时自动切分。
+    """
+    def __init__(self, recorder_config, video_path):
+        """
+        Args:
+            recorder_config: config.yaml 中的 recorder 配置
+            video_path: 录像保存目录(以 / 结尾)
+        """
+        self.video_path = video_path
+        self.fps_setting = recorder_config['fps']
+        self.max_seconds = recorder_config['max_seconds']
+        self.max_bytes = recorder_config['max_bytes']
+        self.pre_roll = recorder_config['pre_roll']
+
+        self.pre_roll_frames = deque()
+        self.queue = queue.Queue(maxsize=recorder_config['queue_size'])
+        self.recording = False
+        self.dropped = 0
+        self.files = []
+
+        # 以下只在录像线程中访问
+        self.writer = None
+        self.filename = None
+        self.fps = 30
+        self.size = None
+        self.start_ts = None
+        self.file_start_ts = None
+        self.frame_index = 0
+
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def push(self, timestamp, image, encoded=None):
+        """每帧调用
+        Args:
+            timestamp: 采集时间戳(time.monotonic 时钟)
+            image: 带叠加层的 BGR 画面，之后不能再被修改
+            encoded: 同一帧的 JPEG 数据，用于预录缓冲
+        """
+        if self.pre_roll > 0 and encoded is not None:
+            self.pre_roll_frames.append((timestamp, encoded))
+            while self.pre_roll_frames and timestamp - self.pre_roll_frames[0][0] > self.pre_roll:
+                self.pre_roll_frames.popleft()
+        if self.recording:
+            try:
+                self.queue.put_nowait(('frame', timestamp, image))
+            except queue.Full:
+                self.dropped += 1
+
+    def start(self, capture_fps):
+        """开始录像
+        Args:
+            capture_fps: 当前采集帧率，配置的 fps 为 0 时作为输出帧率
+        """
+        if self.recording:
+            return
+        fps = self.fps_setting or capture_fps or 30
+        self.recording = True
+        self.queue.put(('start', fps, list(self.pre_roll_frames)))
+
+    def stop(self):
+        if not self.recording:
+            return
+        self.recording = False
+        self.queue.put(('stop',))
+
+    def _open(self):
+        current_time = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.filename = f'{self.video_path}video_{current_time}.mp4'
+        if self.filename in self.files:
+            self.filename = f'{self.video_path}video_{current_time}_{len(self.files)}.mp4'
+        self.writer = imageio.get_writer(self.filename, fps=self.fps)
+        self.files.append(self.filename)
+        self.start_ts = None
+        self.frame_index = 0
+        logger.info(f"[video_recorder] 开始录像: {self.filename} @ {self.fps}fps")
+
+    def _close(self):
+        if self.writer is None:
+            return
+        try:
+            self.writer.close()
+        except Exception as e:
+            logger.error(f"[video_recorder] 关闭录像文件失败: {e}")
+        logger.info(f"[video_recorder] 结束录像: {self.filename}, {self.frame_index} 帧, 丢帧 {self.dropped}")
+        self.writer = None
+
+    def _write(self, timestamp, image):
+        if self.start_ts is None:
+            self.start_ts = timestamp
+            self.file_start_ts = timestamp
+            self.size = (image.shape[1], image.shape[0])
+        elif (image.shape[1], image.shape[0]) != self.size:
+            # 预录帧来自缩放后的视频流，尺寸可能不同
+            image = cv2.resize(image, self.size)
+
+        target = int(round((timestamp - self.start_ts) * self.fps))
+        if target < self.frame_index:
+            return
+        if target - self.frame_index > self.fps * 2:
+            # 长时间没有帧(如采集中断)，不补帧，时间轴顺延
+            self.start_ts = timestamp - self.frame_index / self.fps
+            target = self.frame_index
+
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        while self.frame_index <= target:
+            self.writer.append_data(rgb)
+            self.frame_index += 1
+
+        if (timestamp - self.file_start_ts > self.max_seconds
+                or (self.frame_index % 30 == 0 and os.path.getsize(self.filename) > self.max_bytes)):
+            self._close()
+            self._open()
+
+    def _write_loop(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item[0] == 'start':
+                    _, self.fps, pre_roll_frames = item
+                    self._open()
+                    for timestamp, encoded in pre_roll_frames:
+                        image = cv2.imdecode(np.frombuffer(encoded, dtype=np.uint8), cv2.IMREAD_COLOR)
+                        if image is not None:
+                            self._write(timestamp, image)
+                elif item[0] == 'frame':
+                    if self.writer is not None:
+                        self._write(item[1], item[2])
+                elif item[0] == 'stop':
+                    self._close()
+            except Exception as e:
+                logger.error(f"[video_recorder] 写入失败: {e}")
+                self._close()
+
+    def status(self):
+        return {
+            'recording': self.recording,
+            'file': self.filename if self.writer is not None else None,
+            'queued': self.queue.qsize(),
+            'dropped': self.dropped,
+            'pre_roll': len(self.pre_roll_frames),
+        }
@@ -0,0 +1,228 @@
+import cv2
+import time
+import uuid
+import asyncio
+import fractions
+import threading
+import logging
+import numpy as np
+
+from lazy_import import timed_import
+
+# 创建日志记录器，统一使用body
+logger = logging.getLogger('body')
+
+# RTP 视频时钟频率
+VIDEO_CLOCK_RATE = 90000
+VIDEO_TIME_BASE = fractions.Fraction(1, VIDEO_CLOCK_RATE)
+
+_track_class = None
+
+
+def pipeline_track_class():
+    """PipelineVideoTrack 类，第一次使用时才导入 aiortc 并定义"""
+    global _track_class
+    if _track_class is not None:
+        return _track_class
+    mediastreams = timed_import('aiortc.mediastreams')
+    av = timed_import('av')
+
+    class PipelineVideoTrack(mediastreams.VideoStreamTrack):
+        """从 StreamHub 取最新一帧的视频轨道
+
+        不使用 VideoStreamTrack 固定 30fps 的节拍，按配置帧率取帧，来不及编码的帧直接跳过；
+        pts 使用采集时刻，接收端的播放节奏与实际采集一致。
+        """
+        def __init__(self, hub, fps, name):
+            super().__init__()
+            self.hub = hub
+            self.fps = fps
+            self.name = name
+            self.sent = 0
+            self.skipped = 0
+            # 采集到交给编码器的延迟，以及由统计任务更新的链路信息
+            self.latency = 0.0
+            self.stats = {}
+            self._last_seq = 0
+            self._start_ts = None
+            self._next_time = 0.0
+            hub.attach(self)
+
+        async def recv(self):
+            delay = self._next_time - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            loop = asyncio.get_running_loop()
+            stream_frame = None
+            while stream_frame is None:
+                if self.readyState != 'live':
+                    raise mediastreams.MediaStreamError
+                stream_frame = await loop.run_in_executor(None, self.hub.wait, self._last_seq, 1.0)
+            if self._last_seq:
+                self.skipped += stream_frame.seq - self._last_seq - 1
+            self._last_seq = stream_frame.seq
+            self._next_time = time.monotonic() + 0.9 / self.fps
+
+            image = stream_frame.image
+            if image is None:
+                image = cv2.imdecode(np.frombuffer(stream_frame.encoded, dtype=np.uint8), cv2.IMREAD_COLOR)
+            video_frame = av.VideoFrame.from_ndarray(image, format='bgr24')
+            if self._start_ts is None:
+                self._start_ts = stream_frame.timestamp
+            video_frame.pts = int((stream_frame.timestamp - self._start_ts) * VIDEO_CLOCK_RATE)
+            video_frame.time_base = VIDEO_TIME_BASE
+
+            self.sent += 1
+            self.latency += 0.2 * (time.monotonic() - stream_frame.timestamp - self.latency)
+            return video_frame
+
+        def stop(self):
+            super().stop()
+            self.hub.detach(self)
+
+        def status(self):
+            status = {
+                'name': self.name,
+                'type': 'webrtc',
+                'max_fps': self.fps,
+                'sent': self.sent,
+                'skipped': self.skipped,
+                'latency_ms': round(self.latency * 1000, 1),
+            }
+            status.update(self.stats)
+            return status
+
+    _track_class = PipelineVideoTrack
+    return _track_class
+
+
+class WebRtcServer:
+    """WebRTC 视频推流
+
+    所有 PeerConnection 运行在同一个常驻 asyncio 事件循环线程中；
+    浏览器发来 offer，服务端加入从 StreamHub 取帧的视频轨道后返回 answer。
+    编码码率通过 aiortc 编码器的码率范围设置，帧率由视频轨道控制。
+    """
+    def __init__(self, webrtc_config, stream_hub):
+        """
+        Args:
+            webrtc_config: config.yaml 中的 webrtc 配置
+            stream_hub: 视频流分发 StreamHub
+        """
+        self.config = webrtc_config
+        self.hub = stream_hub
+        self.pcs = {}
+        self.loop = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(target=self._run_loop, daemon=True).start()
+                self._configure_codecs()
+        return self.loop
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def _configure_codecs(self):
+        """aiortc 编码器从模块级常量读取码率范围，拥塞控制在此范围内调整"""
+        bitrate, min_bitrate, max_bitrate = (self.config['bitrate'], self.config['min_bitrate'],
+                                             self.config['max_bitrate'])
+        for module_name in ('aiortc.codecs.h264', 'aiortc.codecs.vpx'):
+            codec = timed_import(module_name)
+            codec.DEFAULT_BITRATE = bitrate
+            codec.MIN_BITRATE = min_bitrate
+            codec.MAX_BITRATE = max_bitrate
+
+    def handle_offer(self, sdp, offer_type, timeout=10):
+        """处理浏览器的 offer，返回 answer
+        Args:
+            sdp: offer 的 SDP
+            offer_type: 描述类型，应为 'offer'
+            timeout: 等待 ICE 收集完成的最长时间(秒)
+        Returns:
+            {'sdp': ..., 'type': 'answer'}
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._handle_offer(sdp, offer_type), loop)
+        return future.result(timeout)
+
+    async def _handle_offer(self, sdp, offer_type):
+        aiortc = timed_import('aiortc')
+        offer = aiortc.RTCSessionDescription(sdp=sdp, type=offer_type)
+        pc = aiortc.RTCPeerConnection()
+        pc_id = f"PeerConnection({uuid.uuid4().hex[:8]})"
+
+        track = pipeline_track_class()(self.hub, self.config['fps'], pc_id)
+
+        @pc.on("connectionstatechange")
+        async def on_connectionstatechange():
+            logger.info(f"[webrtc] {pc_id}: {pc.connectionState}")
+            if pc.connectionState in ('failed', 'closed'):
+                await self._close(pc_id)
+
+        try:
+            await pc.setRemoteDescription(offer)
+            sender = pc.addTrack(track)
+            self._prefer_codec(aiortc, pc, sender)
+            answer = await pc.createAnswer()
+            await pc.setLocalDescription(answer)
+        except Exception:
+            # 协商失败：轨道从 StreamHub 断开，不占用连接数
+            track.stop()
+            await pc.close()
+            raise
+
+        # 协商成功后才登记，超过连接数上限时关闭最早的连接
+        while len(self.pcs) >= self.config['max_connections']:
+            oldest_id = next(iter(self.pcs))
+            await self._close(oldest_id)
+        self.pcs[pc_id] = (pc, track)
+        asyncio.ensure_future(self._stats_loop(pc_id, pc, sender, track))
+        logger.info(f"[webrtc] 创建连接: {pc_id}")
+        return {"sdp": pc.localDescription.sdp, "type": pc.localDescription.type}
+
+    def _prefer_codec(self, aiortc, pc, sender):
+        codec_name = self.config['codec']
+        codecs = [codec for codec in aiortc.RTCRtpSender.getCapabilities('video').codecs
+                  if codec.mimeType.lower() in (f'video/{codec_name}'.lower(), 'video/rtx')]
+        for transceiver in pc.getTransceivers():
+            if transceiver.sender is sender and codecs:
+                transceiver.setCodecPreferences(codecs)
+
+    async def _stats_loop(self, pc_id, pc, sender, track, interval=2.0):
+        """定期读取 RTP 统计：发送码率、往返时延，估算端到端延迟"""
+        last_bytes, last_time = 0, time.monotonic()
+        while pc_id in self.pcs:
+            await asyncio.sleep(interval)
+            try:
+                report = await sender.getStats()
+            except Exception:
+                continue
+            now = time.monotonic()
+            for stats in report.values():
+                if stats.type == 'outbound-rtp':
+                    track.stats['bitrate_kbps'] = round(
+                        (stats.bytesSent - last_bytes) * 8 / 1000 / (now - last_time), 1)
+                    last_bytes = stats.bytesSent
+                elif stats.type == 'remote-inbound-rtp' and stats.roundTripTime is not None:
+                    track.stats['rtt_ms'] = round(stats.roundTripTime * 1000, 1)
+            last_time = now
+            # 采集->编码器输入的延迟加上单程网络时延，不含编码和浏览器抖动缓冲
+            track.stats['glass_ms'] = round(track.latency * 1000 + track.stats.get('rtt_ms', 0) / 2, 1)
+            track.stats['state'] = pc.connectionState
+
+    async def _close(self, pc_id):
+        entry = self.pcs.pop(pc_id, None)
+        if entry is None:
+            return
+        pc, track = entry
+        track.stop()
+        await pc.close()
+        logger.info(f"[webrtc] 关闭连接: {pc_id}")
+
+    def status(self):
+        return {pc_id: track.status() for pc_id, (pc, track) in list(self.pcs.items())}